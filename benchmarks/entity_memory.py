@@ -0,0 +1,98 @@
+"""Memory of the Block tree of a structured matrix
+
+Builds a Matrix of n x n x n structured and quadrated blocks, transforms
+and registers it with the "dry" factory of the registry and reports
+memory allocated by Python (tracemalloc) and numbers of entities,
+Structure and Quadrate objects (distinct objects are counted by id).
+
+Usage:
+    python benchmarks/entity_memory.py -n 20
+"""
+import time
+import argparse
+import tracemalloc
+
+from gmsh_scripts import registry
+from gmsh_scripts.run import init_walk, set_parent
+from gmsh_scripts.factory import FACTORY
+
+
+def get_data(n):
+    """Matrix of n x n x n blocks with 3 nodes by each direction
+
+    Args:
+        n (int): number of blocks by each direction
+
+    Returns:
+        dict: data of the Matrix
+    """
+    xs = ['0;1'] + [f'{i + 1};1;3' for i in range(n)]
+    return {'class': 'block.Matrix', 'matrix': [xs, list(xs), list(xs)],
+            'items_do_quadrate_map': True}
+
+
+def count_objects(block):
+    """Numbers of entities and distinct structures and quadrates
+
+    Args:
+        block (Block): top block
+
+    Returns:
+        dict: numbers of blocks, entities, structures and quadrates
+    """
+    counts = {'blocks': 0, 'points': 0, 'curves': 0, 'surfaces': 0}
+    structures, quadrates = set(), set()
+    for b in block:
+        counts['blocks'] += 1
+        counts['points'] += len(b.points)
+        counts['curves'] += len(b.curves)
+        counts['surfaces'] += len(b.surfaces)
+        for s in (b.curves_structures + b.surfaces_structures
+                  + b.volumes_structures):
+            if s is not None:
+                structures.add(id(s))
+        quadrates.update(id(x) for x in b.surfaces_quadrates if x is not None)
+    counts['structures'] = len(structures)
+    counts['quadrates'] = len(quadrates)
+    return counts
+
+
+def benchmark(n):
+    """Memory of construction and registration of the Matrix
+
+    Args:
+        n (int): number of blocks by each direction
+
+    Returns:
+        dict: memory (MB), time (s) and numbers of objects
+    """
+    registry.reset(factory=registry.DRY_FACTORY)
+    data = get_data(n)
+    init_walk(data)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    block = FACTORY(data)
+    set_parent(block)
+    constructed = tracemalloc.get_traced_memory()[0]
+    block.transform()
+    block.register()
+    registered, peak = tracemalloc.get_traced_memory()
+    t = time.perf_counter() - t0
+    tracemalloc.stop()
+    return {'constructed, MB': constructed / 2 ** 20,
+            'registered, MB': registered / 2 ** 20,
+            'peak, MB': peak / 2 ** 20, 'time, s': t,
+            **count_objects(block)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Entity memory benchmark')
+    parser.add_argument('-n', '--number', type=int, default=20,
+                        help='number of blocks by each direction')
+    args = parser.parse_args()
+    for k, v in benchmark(args.number).items():
+        print(f'{k:16} {v:.3f}' if isinstance(v, float) else f'{k:16} {v}')
+
+
+if __name__ == '__main__':
+    main()
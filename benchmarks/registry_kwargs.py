@@ -0,0 +1,94 @@
+"""Per-entity overhead of arguments of registry add_* functions
+
+Compares registry.correct_kwargs (copy of the entity dict and deep copy
+of default kwargs) with builders compiled once per factory
+(registry.KWARGS_BUILDERS).
+
+Usage:
+    python benchmarks/registry_kwargs.py -n 100000 -g geo occ
+"""
+import timeit
+import argparse
+
+from gmsh_scripts import registry
+from gmsh_scripts.entity.point import Point
+from gmsh_scripts.entity.curve import Curve
+from gmsh_scripts.entity.curve_loop import CurveLoop
+from gmsh_scripts.entity.surface import Surface
+from gmsh_scripts.entity.surface_loop import SurfaceLoop
+from gmsh_scripts.entity.volume import Volume
+from gmsh_scripts.structure.structure import Structure
+from gmsh_scripts.quadrate.quadrate import Quadrate
+
+
+def get_entities():
+    """Typical entities of a structured block
+
+    Returns:
+        list of tuple: kind, key of the builder, entity
+    """
+    points = [Point(coordinates=[0., 0., 0.], meshSize=0.1),
+              Point(coordinates=[1., 0., 0.], meshSize=0.1)]
+    curve = Curve(points=points, structure=Structure(nPoints=5))
+    curve_loop = CurveLoop(curves=[curve] * 4, curves_signs=[1, 1, -1, -1])
+    surface = Surface(name='fill', curves_loops=[curve_loop])
+    surface_loop = SurfaceLoop(surfaces=[surface] * 6)
+    volume = Volume(surfaces_loops=[surface_loop])
+    structure_curve = Structure(nPoints=5, meshType=1, coef=1.2)
+    structure_surface = Structure(arrangement='Left', cornerTags=[1, 2, 3, 4])
+    structure_volume = Structure(cornerTags=[1, 2, 3, 4, 5, 6, 7, 8])
+    return [
+        ('curve', ('curve', curve.name), curve),
+        ('curve_loop', 'curve_loop', curve_loop),
+        ('surface', ('surface', surface.name), surface),
+        ('surface_loop', 'surface_loop', surface_loop),
+        ('volume', 'volume', volume),
+        ('quadrate', 'quadrate', Quadrate()),
+        ('structure_curve', 'structure_curve', structure_curve),
+        ('structure_surface', 'structure_surface', structure_surface),
+        ('structure_volume', 'structure_volume', structure_volume),
+    ]
+
+
+def benchmark(factory, number):
+    """Time per entity of correct_kwargs and compiled builders
+
+    Args:
+        factory (str): factory
+        number (int): number of calls per entity kind
+
+    Returns:
+        list of tuple: kind, correct_kwargs time, builder time (seconds)
+    """
+    registry.reset(factory=factory)
+    results = []
+    for name, key, entity in get_entities():
+        build = registry.KWARGS_BUILDERS[key]
+        kwargs = build(entity)['kwargs']
+        if registry.correct_kwargs(entity, name)['kwargs'] != kwargs:
+            raise ValueError(f'Different kwargs of {name}')
+        before = min(timeit.repeat(lambda: registry.correct_kwargs(entity, name),
+                                   number=number, repeat=3)) / number
+        after = min(timeit.repeat(lambda: build(entity),
+                                  number=number, repeat=3)) / number
+        results.append((name, before, after))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registry kwargs benchmark')
+    parser.add_argument('-n', '--number', type=int, default=100000,
+                        help='number of calls per entity kind')
+    parser.add_argument('-g', '--factories', nargs='*', default=['geo', 'occ'],
+                        help='factories')
+    args = parser.parse_args()
+    print(f'{"factory":8} {"entity":18} {"before, us":>11} {"after, us":>10} '
+          f'{"speedup":>8}')
+    for factory in args.factories:
+        for name, before, after in benchmark(factory, args.number):
+            print(f'{factory:8} {name:18} {before * 1e6:11.3f} {after * 1e6:10.3f} '
+                  f'{before / after:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
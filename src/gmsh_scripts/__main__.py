@@ -1,14 +1,35 @@
 import argparse
 
-from gmsh_scripts.run import main as main_run
-
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('input', help='input')
+    parser.add_argument('input', help='input', nargs='?')
     parser.add_argument('--plot', help='plot graph only', action='store_true')
+    parser.add_argument('--batch', help='run many inputs in parallel',
+                        action='store_true')
+    parser.add_argument('--sweep', help='run variants of parameters of input',
+                        action='store_true')
+    parser.add_argument('--serve', help='start mesh service',
+                        action='store_true')
+    parser.add_argument('--submit', help='submit input to mesh service',
+                        action='store_true')
+    parser.add_argument('--preflight', help='estimate model size without gmsh',
+                        action='store_true')
     args = vars(parser.parse_known_args()[0])
-    if args['plot']:
+    if args['serve'] or args['submit']:
+        from gmsh_scripts.service import main as main_service
+        main_service()
+    elif args['preflight']:
+        from gmsh_scripts.preflight import main as main_preflight
+        main_preflight()
+    elif args['sweep']:
+        from gmsh_scripts.sweep import main as main_sweep
+        main_sweep()
+    elif args['batch']:
+        from gmsh_scripts.batch import main as main_batch
+        main_batch()
+    elif args['plot']:
         from gmsh_scripts.plot import main as main_plot
         main_plot()
     else:
+        from gmsh_scripts.run import main as main_run
         main_run()
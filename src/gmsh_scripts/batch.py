@@ -0,0 +1,288 @@
+"""Batch meshing of many input files in a process pool
+
+Each worker process initializes gmsh once and runs jobs one by one.
+
+Usage:
+    python -m gmsh_scripts "inputs/*.yml" other.json --batch -n 4
+    python -m gmsh_scripts --batch -m manifest.txt -o output -a "-g occ"
+
+Manifest is a text file with an input path (or glob) per line optionally
+followed by arguments of the job, e.g. "container.yml -g occ".
+Empty lines and lines that start with "#" are skipped.
+"""
+import os
+import sys
+import csv
+import glob
+import time
+import shlex
+import atexit
+import logging
+import argparse
+import traceback
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import gmsh
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Batch meshing')
+    parser.add_argument('inputs', nargs='*', help='input paths or globs')
+    parser.add_argument('--batch', action='store_true', help='batch mode')
+    parser.add_argument('-m', '--manifest', help='manifest file path')
+    parser.add_argument('-n', '--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('-o', '--output_dir', default=None,
+                        help='output directory (default: input directory)')
+    parser.add_argument('--summary_path', default=None,
+                        help='summary CSV path (default: batch.csv in output directory)')
+    parser.add_argument('--fail_fast', action='store_true',
+                        help='cancel remaining jobs after the first failure')
+    parser.add_argument('-a', '--args', default='',
+                        help='arguments of each job, e.g. "-g occ -f msh2"')
+    args = vars(parser.parse_args(argv))
+    args['args'] = shlex.split(args['args'])
+    return args
+
+
+def get_jobs(inputs=None, manifest=None, args=None):
+    """Make jobs from inputs and manifest
+
+    Args:
+        inputs (list of str): input paths or globs
+        manifest (str): manifest file path
+        args (list of str): arguments for all jobs
+
+    Returns:
+        list of dict: jobs with "input" path, unique "name" and "args"
+    """
+    inputs = [] if inputs is None else inputs
+    args = [] if args is None else args
+    items = [(x, []) for x in inputs]
+    if manifest is not None:
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if len(line) == 0 or line.startswith('#'):
+                    continue
+                tokens = shlex.split(line)
+                items.append((tokens[0], tokens[1:]))
+    jobs, names = [], {}
+    for pattern, item_args in items:
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for p in paths:
+            p = Path(p).resolve()
+            # Unique model name for the common output directory
+            n = names.setdefault(p.stem, 0)
+            names[p.stem] += 1
+            name = p.stem if n == 0 else f'{p.stem}_{n}'
+            jobs.append({'input': str(p), 'name': name, 'args': args + item_args})
+    return jobs
+
+
+def init_worker():
+    """Initialize gmsh once per worker process"""
+    if gmsh.isInitialized():
+        return
+    gmsh.initialize()
+    atexit.register(gmsh.finalize)
+
+
+def make_executor(workers, initializer=init_worker):
+    """Pool of worker processes initialized by the initializer
+
+    Python < 3.7 has no initializer of the pool,
+    so workers are initialized by the first job (see run_job).
+
+    Args:
+        workers (int): number of worker processes
+        initializer (callable): initializer of the worker
+
+    Returns:
+        ProcessPoolExecutor: pool
+    """
+    if sys.version_info >= (3, 7):
+        return ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def reset_logging():
+    """Close and remove handlers of the root logger"""
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+        h.close()
+
+
+def run_job(job, output_dir=None):
+    """Run job in the initialized gmsh
+
+    Job runs in the directory of the input file, so include files
+    are resolved as in the single run.
+
+    Args:
+        job (dict): job with "input" path, "args", optional model "name"
+            and optional "data" of the input file to use instead of the file
+        output_dir (str): output directory, if None use the input directory
+
+    Returns:
+        dict: job result with "returncode", "duration", "log_path"
+            and mesh "nodes" and "elements" if the strategy meshed the model
+    """
+    from gmsh_scripts.run import parse_arguments as parse_run_arguments
+    from gmsh_scripts.run import run
+    from gmsh_scripts.support.support import LoggingDecorator, GmshOptionsDecorator
+    init_worker()  # Python < 3.7 (see make_executor)
+    t0 = time.perf_counter()
+    cwd = os.getcwd()
+    input_path = Path(job['input'])
+    model_name = job.get('name', input_path.stem)
+    job_args = list(job['args'])
+    if output_dir is not None:
+        output_dir = Path(output_dir).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        job_args += ['-o', str(output_dir / model_name),
+                     '-l', str(output_dir / f'{model_name}.log')]
+    log_path, returncode, error = None, 0, None
+    options, statistics = {}, {}
+    try:
+        os.chdir(input_path.parent)
+        args = parse_run_arguments([input_path.name] + job_args,
+                                   data=job.get('data'))
+        args['model_name'] = model_name
+        log_path = str(Path(args['log_path']).resolve()) if args['log_path'] else None
+        reset_logging()
+        gmsh.clear()
+        options_decorator = GmshOptionsDecorator(options=args['options'])
+        # Save options to restore them for the next job
+        options = {k: gmsh.option.getNumber(k) for k in options_decorator.options}
+
+        @LoggingDecorator(filename=args['log_path'], level=args['log_level'])
+        @options_decorator
+        def pipeline(args):
+            return run(args)
+
+        statistics = pipeline(args).statistics
+    except (Exception, SystemExit) as e:  # SystemExit from argparse
+        returncode, error = 1, f'{type(e).__name__}: {e}'
+        logging.error(traceback.format_exc())
+    finally:
+        for k, v in options.items():
+            gmsh.option.setNumber(k, v)
+        reset_logging()
+        os.chdir(cwd)
+    result = {k: v for k, v in job.items() if k != 'data'}
+    return {**result, 'returncode': returncode, 'error': error,
+            'duration': time.perf_counter() - t0, 'log_path': log_path,
+            'nodes': statistics.get('nodes'),
+            'elements': statistics.get('elements')}
+
+
+def run_jobs(jobs, workers=None, output_dir=None, fail_fast=False,
+             max_attempts=2):
+    """Run jobs in the process pool
+
+    If a worker crashes (e.g. segmentation fault in gmsh) the pool is
+    restarted and unfinished jobs are run again, up to max_attempts times.
+
+    Args:
+        jobs (list of dict): jobs
+        workers (int): number of worker processes
+        output_dir (str): output directory
+        fail_fast (bool): cancel remaining jobs after the first failure
+        max_attempts (int): maximum number of attempts after worker crashes
+
+    Returns:
+        list of dict: results in the order of jobs
+    """
+    results = [None for _ in jobs]
+    attempts = [0 for _ in jobs]
+    pending = list(range(len(jobs)))
+    is_failed = False
+    while len(pending) > 0 and not is_failed:
+        with make_executor(workers) as executor:
+            futures = {executor.submit(run_job, jobs[i], output_dir): i
+                       for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    continue
+                except Exception as e:  # e.g. pickling error
+                    results[i] = {**jobs[i], 'returncode': 1, 'duration': 0,
+                                  'error': f'{type(e).__name__}: {e}',
+                                  'log_path': None}
+                print_result(i, len(jobs), results[i])
+                if fail_fast and results[i]['returncode'] != 0:
+                    is_failed = True
+                    for f in futures:
+                        f.cancel()
+                    break
+        pending = [i for i in pending if results[i] is None]
+        for i in pending:
+            attempts[i] += 1
+            if attempts[i] >= max_attempts or is_failed:
+                error = 'cancelled' if is_failed else 'worker crashed'
+                results[i] = {**jobs[i], 'returncode': -1, 'duration': 0,
+                              'error': error, 'log_path': None}
+        pending = [i for i in pending if results[i] is None]
+    return results
+
+
+def print_result(index, total, result):
+    status = 'OK' if result['returncode'] == 0 else 'FAILED'
+    print(f'[{index + 1}/{total}] {status} {result["duration"]:.2f}s '
+          f'{result["name"]} {result["input"]}', flush=True)
+
+
+def print_summary(results):
+    """Print table of job durations and exit codes"""
+    rows = [('#', 'code', 'time, s', 'name', 'input', 'log')]
+    for i, r in enumerate(results):
+        rows.append((str(i + 1), str(r['returncode']), f'{r["duration"]:.2f}',
+                     r['name'], r['input'], str(r['log_path'])))
+    widths = [max(len(x[j]) for x in rows) for j in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(x.ljust(w) for x, w in zip(row, widths)))
+    n_failed = sum(1 for x in results if x['returncode'] != 0)
+    total = sum(x['duration'] for x in results)
+    print(f'jobs: {len(results)}, failed: {n_failed}, '
+          f'total job time: {total:.2f}s')
+
+
+def write_summary(results, path):
+    """Write results to CSV file"""
+    fields = ['input', 'name', 'args', 'returncode', 'duration', 'nodes',
+              'elements', 'log_path', 'error']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for r in results:
+            writer.writerow({**r, 'args': ' '.join(shlex.quote(x) for x in r['args'])})
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    jobs = get_jobs(args['inputs'], args['manifest'], args['args'])
+    if len(jobs) == 0:
+        print('No jobs')
+        sys.exit(1)
+    t0 = time.perf_counter()
+    results = run_jobs(jobs, args['workers'], args['output_dir'],
+                       args['fail_fast'])
+    print_summary(results)
+    print(f'wall time: {time.perf_counter() - t0:.2f}s')
+    summary_path = args['summary_path']
+    if summary_path is None:
+        output_dir = '.' if args['output_dir'] is None else args['output_dir']
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        summary_path = Path(output_dir) / 'batch.csv'
+    write_summary(results, summary_path)
+    sys.exit(0 if all(x['returncode'] == 0 for x in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,28 @@
+import itertools
+
 import numpy as np
 
 from gmsh_scripts.support.support import volumes_surfaces_to_volumes_groups_surfaces
 from gmsh_scripts.transform.transform import str2obj as tr_str2obj
 from gmsh_scripts.transform.transform import BlockToCartesian, \
     CartesianToCartesianByBlock
-from gmsh_scripts.transform.transform import reduce_transforms
-from gmsh_scripts.registry import register_point, register_curve, register_curve_loop, \
+from gmsh_scripts.transform.transform import compile_transforms, transform_points
+from gmsh_scripts.registry import register_points, register_curve, register_curve_loop, \
     register_surface, register_surface_loop, register_volume, \
     register_curve_structure, register_surface_structure, \
     register_surface_quadrate, register_volume_structure, unregister_volumes, \
     register_volume2block, get_boolean_old2news, get_boolean_new2olds, \
     get_volume2block, pre_unregister_volume
 from gmsh_scripts.coordinate_system.coordinate_system import Block as BlockCS
+from gmsh_scripts.coordinate_system.coordinate_system import get_coordinate_system_key
 from gmsh_scripts.entity import Point
 from gmsh_scripts.entity import Curve
 from gmsh_scripts.entity import CurveLoop
 from gmsh_scripts.entity import Surface
 from gmsh_scripts.entity import SurfaceLoop
 from gmsh_scripts.entity import Volume
-from gmsh_scripts.structure.structure import Structure
-from gmsh_scripts.quadrate.quadrate import Quadrate
+from gmsh_scripts.structure.structure import Structure, intern_structure
+from gmsh_scripts.quadrate.quadrate import intern_quadrate
 
 
 class Block:
@@ -136,6 +139,8 @@ class Block:
         self.boolean_level = 0 if boolean_level is None else boolean_level
         # Path
         self.path = path
+        # Transform
+        self.is_transformed = False
         # Parent/Children
         self.parent = parent
         self.children = [] if children is None else children
@@ -332,7 +337,7 @@ class Block:
                     kwargs = {'nPoints': values[0],
                               'meshType': values[1],
                               'coef': values[2]}
-                    cs_ss.append(Structure(name='curve', **kwargs))
+                    cs_ss.append(intern_structure(name='curve', **kwargs))
             elif len(structure) == 3:  # X, Y and Z directions
                 # Curves
                 for values in structure:
@@ -341,7 +346,7 @@ class Block:
                             kwargs = {'nPoints': values[0],
                                       'meshType': values[1],
                                       'coef': values[2]}
-                            cs_ss.append(Structure(name='curve', **kwargs))
+                            cs_ss.append(intern_structure(name='curve', **kwargs))
                     elif values is None:
                         for _ in range(4):
                             cs_ss.append(None)
@@ -349,8 +354,8 @@ class Block:
                         raise ValueError(values)
             else:
                 raise ValueError(structure)
-            ss_ss = [Structure(name='surface') for _ in range(6)]
-            return cs_ss, ss_ss, [Structure(name='volume')]
+            ss_ss = [intern_structure(name='surface') for _ in range(6)]
+            return cs_ss, ss_ss, [intern_structure(name='volume')]
         else:
             raise ValueError(structure)
 
@@ -359,7 +364,7 @@ class Block:
         if do_quadrate is None or not do_quadrate:
             return [None for _ in range(6)]
         elif do_quadrate:
-            return [Quadrate(name='surface') for _ in range(6)]
+            return [intern_quadrate(name='surface') for _ in range(6)]
         else:
             raise ValueError(do_quadrate)
 
@@ -488,22 +493,39 @@ class Block:
         return surfaces_arrangement, surfaces_points, volume_points
 
     def register(self):
-        # Children
+        """Register the Block tree
+
+        Points of all registered blocks are registered in one batch,
+        other entities block by block, children before parents.
+        """
+        blocks = list(self.iter_registered())
+        points = []
+        for b in blocks:
+            points.extend(b.points)
+            for c in b.curves:
+                points.extend(c.points)
+        register_points(points)
+        for b in blocks:
+            b.register_curve_points()
+            b.register_curves()
+            b.register_curves_loops()
+            b.register_surfaces()  # TODO Too long fill surface in occ factory!
+            b.register_surfaces_loops()
+            b.register_volumes()
+            b.register_structure()
+            b.register_quadrate()
+
+    def iter_registered(self):
+        """Iterate blocks to register, children before parents
+
+        Returns:
+            generator of Block: blocks
+        """
         if self.do_register_children:
-            for i, c in enumerate(self.children):
-                c.register()
-        # Self
-        if not self.do_register:
-            return
-        self.register_points()
-        self.register_curve_points()
-        self.register_curves()
-        self.register_curves_loops()
-        self.register_surfaces()  # TODO Too long fill surface in occ factory!
-        self.register_surfaces_loops()
-        self.register_volumes()
-        self.register_structure()
-        self.register_quadrate()
+            for c in self.children:
+                yield from c.iter_registered()
+        if self.do_register:
+            yield self
 
     def add_child(self, child, transforms=None):
         transforms = [] if transforms is None else transforms
@@ -512,47 +534,106 @@ class Block:
         self.children_transforms.append(transforms)
 
     def transform(self):
+        if self.is_transformed:  # e.g. Block from cache
+            return
         # Self Transform
-        for i, p in enumerate(self.points):
-            if isinstance(p.coordinate_system, BlockCS):
-                p.coordinate_system.ps = [x.coordinates
-                                          for x in self.parent.points]
-            self.points[i] = reduce_transforms(self.self_transforms, p)
-        # Curve Points
-        for i, c in enumerate(self.curves):
-            for j, p in enumerate(c.points):
-                if isinstance(p.coordinate_system, BlockCS):
-                    p.coordinate_system.ps = [x.coordinates
-                                              for x in self.parent.points]
-                self.curves[i].points[j] = reduce_transforms(self.self_transforms, p)
-        # Children
+        self.transform_points(self.self_transforms)
+        # Children (consecutive children without children are transformed together)
+        leaves = []
         for i, c in enumerate(self.children):
             c.transforms.extend(self.children_transforms[i])
             c.transforms.extend(self.transforms)
-            c.transform()
+            if len(c.children) == 0 and not c.is_transformed:
+                leaves.append(c)
+            else:
+                self.transform_leaves(leaves)
+                leaves = []
+                c.transform()
+        self.transform_leaves(leaves)
         # Transform
-        for i, p in enumerate(self.points):
-            if isinstance(p.coordinate_system, BlockCS):
-                p.coordinate_system.ps = [x.coordinates
+        self.transform_points(self.transforms)
+        self.is_transformed = True
+
+    def transform_points(self, transforms):
+        """Transform points and curves points of the Block
+
+        Runs of affine transforms are fused (see compile_transforms).
+
+        Args:
+            transforms (list of Transform): transforms
+        """
+        ps = list(itertools.chain(self.points, *(c.points for c in self.curves)))
+        for p in ps:
+            self.update_block_coordinate_system(p)
+        ps = transform_points(compile_transforms(transforms), ps)
+        n = len(self.points)
+        self.points[:] = ps[:n]
+        for c in self.curves:
+            c.points[:] = ps[n:n + len(c.points)]
+            n += len(c.points)
+
+    def update_block_coordinate_system(self, point):
+        """Set coordinates of parent points to the Block coordinate system of the point"""
+        if isinstance(point.coordinate_system, BlockCS):
+            point.coordinate_system.ps = [x.coordinates
                                           for x in self.parent.points]
-            self.points[i] = reduce_transforms(self.transforms, p)
-        # Curve Points
-        for i, c in enumerate(self.curves):
-            for j, p in enumerate(c.points):
-                if isinstance(p.coordinate_system, BlockCS):
-                    p.coordinate_system.ps = [x.coordinates
-                                              for x in self.parent.points]
-                self.curves[i].points[j] = reduce_transforms(self.transforms, p)
 
-    def register_points(self):
-        for i, p in enumerate(self.points):
-            self.points[i] = register_point(p)
+    @staticmethod
+    def transform_leaves(blocks):
+        """Transform blocks without children together
+
+        Neighbouring blocks (e.g. items of Matrix or Layer) share nodes,
+        so points and curves points with the same transforms, coordinate
+        system and coordinates are pooled: each unique point is transformed
+        once and all points of the pool share its coordinates array.
+        Unique points with the same transforms are transformed together
+        (see Block.transform_points).
+
+        Args:
+            blocks (list of Block): blocks without children
+        """
+        pool, unique = {}, []  # key -> index of the unique point, unique points
+        indices = []  # point -> index of the unique point
+        chains, chains_blocks, chains_items = {}, [], []  # Transforms
+        cs_keys = {}  # Keys of coordinate systems
+        for b in blocks:
+            chain = (tuple(id(x) for x in b.self_transforms),
+                     tuple(id(x) for x in b.transforms))
+            chain_index = chains.get(chain, None)
+            if chain_index is None:
+                chain_index = chains[chain] = len(chains_blocks)
+                chains_blocks.append(b)
+                chains_items.append([])  # Blocks and indices of unique points
+            for p in itertools.chain(b.points, *(c.points for c in b.curves)):
+                cs = p.coordinate_system
+                cs_key = cs_keys.get(id(cs), None)
+                if cs_key is None:
+                    cs_key = cs_keys[id(cs)] = get_coordinate_system_key(cs)
+                key = (chain_index, cs_key, p.coordinates.tobytes())
+                index = pool.get(key, None)
+                if index is None:
+                    index = pool[key] = len(unique)
+                    unique.append(p)
+                    chains_items[chain_index].append((b, index))
+                indices.append((p, index))
+        for b0, items in zip(chains_blocks, chains_items):
+            for transforms in (b0.self_transforms, b0.transforms):
+                for b, i in items:
+                    b.update_block_coordinate_system(unique[i])
+                ps = transform_points(compile_transforms(transforms),
+                                      [unique[i] for _, i in items])
+                for (_, i), p in zip(items, ps):
+                    unique[i] = p
+        for p, index in indices:
+            q = unique[index]
+            p.coordinates = q.coordinates
+            p.coordinate_system = q.coordinate_system
+        for b in blocks:
+            b.is_transformed = True
 
     def register_curve_points(self):
+        """Add start and end points to curves, points must be registered"""
         for i, c in enumerate(self.curves):
-            for j, p in enumerate(c.points):
-                c.points[j] = register_point(p)
-            # Add start and end points to curves
             p0 = self.points[self.curves_points[i][0]]
             p1 = self.points[self.curves_points[i][1]]
             c.points = [p0] + c.points + [p1]
@@ -610,10 +691,12 @@ class Block:
                 register_curve_structure(c.points, st)
         for i, s in enumerate(self.surfaces):
             st = self.surfaces_structures[i]
-            if st is not None:
-                st.kwargs['cornerTags'] = [
-                    self.points[x].tag for x in self.surfaces_points[i]]
-                st.kwargs['arrangement'] = self.surfaces_arrangement[i]
+            if st is not None:  # Structures are shared (see parse_structure)
+                st = Structure(name=st.name, **{
+                    **st.kwargs,
+                    'cornerTags': [self.points[x].tag
+                                   for x in self.surfaces_points[i]],
+                    'arrangement': self.surfaces_arrangement[i]})
                 ps_ids = self.surfaces_points[i]
                 ps = [self.points[x] for x in ps_ids]
                 register_surface_structure(ps, st)
@@ -621,8 +704,10 @@ class Block:
             if i < len(self.volumes_structures):
                 st = self.volumes_structures[i]
                 if st is not None:
-                    st.kwargs['cornerTags'] = [
-                        self.points[x].tag for x in self.volume_points]
+                    st = Structure(name=st.name, **{
+                        **st.kwargs,
+                        'cornerTags': [self.points[x].tag
+                                       for x in self.volume_points]})
                     # Too long
                     # ps = self.points
                     # register_volume_structure(ps, st)
@@ -4,7 +4,8 @@ import numpy as np
 
 from gmsh_scripts.block.block import Block
 from gmsh_scripts.parse.parse import parse_grid
-from gmsh_scripts.coordinate_system.coordinate_system import str2obj as cs_str2obj
+from gmsh_scripts.coordinate_system.coordinate_system import str2obj as cs_str2obj, \
+    Path
 from gmsh_scripts.support.support import flatten
 
 
@@ -137,6 +138,13 @@ class Matrix(Block):
                 else:
                     new_ts = ts
                 items_children_transforms[i] = new_ts
+        # Paths are shared by items, so their curves are evaluated once
+        paths = Matrix.get_paths([items_transforms, items_self_transforms,
+                                  items_children, items_children_transforms])
+
+        def deepcopy(x):
+            return copy.deepcopy(x, {id(y): y for y in paths})
+
         # Items
         items = [Block(
             points=x,
@@ -147,9 +155,9 @@ class Matrix(Block):
             do_unregister=items_do_unregister_map[i],
             do_unregister_children=items_do_unregister_children_map[i],
             do_unregister_boolean=items_do_unregister_boolean_map[i],
-            transforms=copy.deepcopy(
+            transforms=deepcopy(
                 items_transforms[items_transforms_map[i]]),
-            self_transforms=copy.deepcopy(
+            self_transforms=deepcopy(
                 items_self_transforms[items_self_transforms_map[i]]),
             do_quadrate=items_do_quadrate_map[i],
             do_structure=items_do_structure_map[i],
@@ -159,9 +167,9 @@ class Matrix(Block):
             zone=items_zone[items_zone_map[i]],
             boolean_level=items_boolean_level_map[i],
             parent=self,
-            children=copy.deepcopy(
+            children=deepcopy(
                 items_children[items_children_map[i]]),
-            children_transforms=copy.deepcopy(
+            children_transforms=deepcopy(
                 items_children_transforms[items_children_transforms_map[i]]))
             for i, x in enumerate(items_points)]
         # All Children (Items + Children)
@@ -192,6 +200,39 @@ class Matrix(Block):
             children=all_children,
             children_transforms=all_children_transforms)
 
+    @staticmethod
+    def get_paths(obj, paths=None, visited=None):
+        """Find Path coordinate systems in lists, dicts and attributes of objects
+
+        Args:
+            obj: object to search
+            paths (list of Path): found paths
+            visited (set of int): ids of visited objects
+
+        Returns:
+            list of Path: found paths
+        """
+        paths = [] if paths is None else paths
+        visited = set() if visited is None else visited
+        if id(obj) in visited:
+            return paths
+        visited.add(id(obj))
+        if isinstance(obj, Path):
+            paths.append(obj)
+        elif isinstance(obj, (list, tuple)):
+            for x in obj:
+                Matrix.get_paths(x, paths, visited)
+        elif isinstance(obj, dict):
+            for x in obj.values():
+                Matrix.get_paths(x, paths, visited)
+        elif hasattr(obj, '__slots__') and not isinstance(obj, type):  # Entities
+            for k in obj.__slots__:
+                Matrix.get_paths(getattr(obj, k, None), paths, visited)
+        elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+            for x in vars(obj).values():
+                Matrix.get_paths(x, paths, visited)
+        return paths
+
     @staticmethod
     def evaluate_items_values(values, b2ids, gm=0., gs=None, gcs='Cartesian'):
         cs, ms, ss = values
@@ -0,0 +1,125 @@
+"""On-disk cache of transformed Block trees
+
+Trees are pickled to the cache directory with a key that is a hash of
+the input data, all resolved include files and the package version.
+"""
+import os
+import sys
+import json
+import uuid
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+
+from gmsh_scripts.load import load_include
+
+
+def get_version():
+    """Get version of the package
+
+    Returns:
+        str: version or "unknown" if the package is not installed
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # Python < 3.8
+        return 'unknown'
+    try:
+        return version('gmsh-scripts')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def get_includes(data):
+    """Get paths of all include files of the data, including nested ones
+
+    Include files are strings that start with "/", paths are resolved
+    relative to the current working directory like in run.init_walk.
+
+    Args:
+        data (dict or list): input data
+
+    Returns:
+        list of Path: resolved paths of include files in order of appearance
+    """
+    paths, visited = [], set()
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+        elif isinstance(obj, str) and obj.startswith('/'):
+            p = Path(obj[1:]).resolve()
+            if p in visited or not p.is_file():
+                continue
+            visited.add(p)
+            paths.append(p)
+            stack.append(load_include(p).get('data', {}))
+    return paths
+
+
+def make_key(data, input_path=None):
+    """Make cache key
+
+    Metadata of the input file (e.g. gmsh options) are not a part of the key.
+
+    Args:
+        data (dict): data of the input file (before run.init_walk)
+        input_path (str): path to the input file
+
+    Returns:
+        str: hex digest of the key
+    """
+    h = hashlib.sha256()
+    h.update(get_version().encode())
+    h.update(f'{sys.version_info.major}.{sys.version_info.minor}'.encode())
+    h.update(str(input_path).encode())
+    h.update(json.dumps(data, sort_keys=True, default=str).encode())
+    for p in get_includes(data):
+        h.update(str(p).encode())
+        with open(p, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_block(key, cache_dir):
+    """Load Block tree from cache
+
+    Args:
+        key (str): cache key
+        cache_dir (str): cache directory
+
+    Returns:
+        block.Block or None: top Block or None if there is no such key
+    """
+    path = Path(cache_dir) / f'{key}.pickle'
+    if not path.is_file():
+        logging.info(f'cache miss: {path}')
+        return None
+    logging.info(f'cache hit: {path}')
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def dump_block(block, key, cache_dir):
+    """Save Block tree to cache
+
+    File is written under a temporary name and then renamed,
+    so concurrent runs never read a partial file.
+
+    Args:
+        block (block.Block): top Block
+        key (str): cache key
+        cache_dir (str): cache directory
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f'{key}.pickle'
+    tmp_path = cache_dir / f'{key}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    logging.info(f'cache dump: {path}')
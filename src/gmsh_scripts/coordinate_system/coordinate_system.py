@@ -157,6 +157,8 @@ class Path(CoordinateSystem):
         self.orientations = self.parse_orientations(
             orientations=orientations, do_deg2rad=True)
         self.is_registered = False
+        self.is_initialized = False
+        self.evaluators = None
 
     def parse_orientations(self, orientations, do_deg2rad):
         if orientations is None:
@@ -241,11 +243,51 @@ class Path(CoordinateSystem):
                     ts = [any2car] + self.transforms[i]
                     reduce_transforms(ts, p)
 
+    def initialize(self):
+        """Transform curves points and evaluate bounds and weights of curves
+
+        Curves are evaluated by NumPy (see entity.curve.CurveEvaluator)
+        if all of them are supported, otherwise curves are registered
+        and synchronized to be evaluated by gmsh.
+        """
+        if self.is_initialized:
+            return
+        self.transform()
+        from gmsh_scripts.registry import FACTORY
+        from gmsh_scripts.entity.curve import CurveEvaluator
+        factory = 'geo' if FACTORY in ['dry', 'script'] else FACTORY
+        css = [[x.coordinates for x in c.points] for c in self.curves]
+        if all(CurveEvaluator.is_supported(c.name, x, factory, c.kwargs)
+               for c, x in zip(self.curves, css)):
+            self.evaluators = [CurveEvaluator(c.name, x, factory, c.kwargs)
+                               for c, x in zip(self.curves, css)]
+        else:
+            self.evaluators = None
+            self.register()
+            if FACTORY == 'geo':
+                gmsh.model.geo.synchronize()
+            elif FACTORY == 'occ':
+                gmsh.model.occ.synchronize()
+            elif FACTORY in ['dry', 'script']:
+                raise NotImplementedError(
+                    'Path evaluation of curves '
+                    f'{[x.name for x in self.curves]} requires gmsh, '
+                    'use geo or occ factory')
+            else:
+                raise ValueError(FACTORY)
+            self.is_registered = True
+        self.evaluate_bounds()
+        self.evaluate_local_weights()
+        self.is_initialized = True
+
     def evaluate_bounds(self):
-        self.curves_bounds = []
-        for c in self.curves:
-            bs = gmsh.model.get_parametrization_bounds(1, c.tag)
-            self.curves_bounds.append([bs[0][0], bs[1][0]])
+        if self.evaluators is not None:
+            self.curves_bounds = [x.bounds for x in self.evaluators]
+        else:
+            self.curves_bounds = []
+            for c in self.curves:
+                bs = gmsh.model.get_parametrization_bounds(1, c.tag)
+                self.curves_bounds.append([bs[0][0], bs[1][0]])
         cnt = 0
         self.global_curves_bounds = []
         for i, bs in enumerate(self.curves_bounds):
@@ -258,109 +300,195 @@ class Path(CoordinateSystem):
         self.global_normalized_curves_bounds = np.divide(
             self.global_curves_bounds, np.max(self.global_curves_bounds))
 
-    def get_value_derivative_orientation(self, u):
-        if not self.is_registered:  # lazy init
-            self.transform()
-            self.register()
-            from gmsh_scripts.registry import FACTORY
-            if FACTORY == 'geo':
-                gmsh.model.geo.synchronize()
-            elif FACTORY == 'occ':
-                gmsh.model.occ.synchronize()
+    def evaluate_local_weights(self, n=10000):
+        """Tabulate beta distributions of local weights of curves
+
+        Cumulative distribution function is integrated once per curve
+        on n steps and then interpolated (see get_local_coordinates).
+
+        Args:
+            n (int): number of integration steps
+        """
+        self.curves_cdfs = []
+        for lws in self.local_weights:
+            if len(lws) == 2:  # Beta distribution
+                a, b = lws
+                xs = np.linspace(0, 1, n + 1)
+                ts = xs[1:-1]  # Exclude 0 and 1
+                vs = ts ** (a - 1) * (1 - ts) ** (b - 1)
+                cdf = np.concatenate([[0], np.cumsum(vs), [np.sum(vs)]])
+                self.curves_cdfs.append((xs, cdf / cdf[-1]))
+            else:  # Linear
+                self.curves_cdfs.append(None)
+
+    def get_local_coordinates(self, us):
+        """Curves and relative local coordinates of curves
+
+        Args:
+            us (np.ndarray): relative path coordinates [0, 1] of shape (N,)
+
+        Returns:
+            tuple: tuple of:
+                curves (np.ndarray): indices of curves of shape (N,)
+                lus (np.ndarray): relative [0, 1] local coordinates
+                    of curves of shape (N,)
+        """
+        us = np.asarray(us, dtype=float)
+        bs_gn = np.asarray(self.global_normalized_curves_bounds, dtype=float)
+        curves = np.searchsorted(bs_gn[:, 1], us, side='left')  # First curve
+        is_out = curves == len(bs_gn)
+        curves[is_out] = 0
+        is_out |= us < bs_gn[curves, 0]
+        if np.any(is_out):
+            raise ValueError(f'Path coordinates out of bounds: {us[is_out]}')
+        bs_gn = bs_gn[curves]
+        lus = (us - bs_gn[:, 0]) / (bs_gn[:, 1] - bs_gn[:, 0])
+        for i, cdf in enumerate(self.curves_cdfs):
+            if cdf is not None:  # Beta distribution
+                m = curves == i
+                lus[m] = np.interp(lus[m], *cdf)
+        return curves, lus
+
+    def get_values_derivatives_orientations(self, us):
+        """Values, derivatives and orientations at path coordinates
+
+        Each curve is evaluated by NumPy or by one gmsh call
+        for all its coordinates (see initialize).
+
+        Args:
+            us (np.ndarray): relative path coordinates [0, 1] of shape (N,)
+
+        Returns:
+            tuple: tuple of:
+                values (np.ndarray): Cartesian coordinates of shape (N, 3)
+                derivatives (np.ndarray): derivatives of shape (N, 3)
+                orientations (np.ndarray): orientations of shape (N, 3, 3)
+                lus (np.ndarray): relative local coordinates of shape (N,)
+        """
+        self.initialize()
+        curves, lus = self.get_local_coordinates(us)
+        bs = np.asarray(self.curves_bounds, dtype=float)[curves]
+        lus_abs = bs[:, 0] + lus * (bs[:, 1] - bs[:, 0])  # Absolute local
+        vs, dvs = np.empty((len(lus), 3)), np.empty((len(lus), 3))
+        for i in np.unique(curves):
+            m = curves == i
+            if self.evaluators is not None:
+                vs[m], dvs[m] = self.evaluators[i].evaluate(lus[m])
             else:
-                raise ValueError(FACTORY)
-            self.evaluate_bounds()
-            self.is_registered = True
-        v, dv, ori, lu_rel = None, None, None, None
-        for i, c in enumerate(self.curves):
-            bs_gn = self.global_normalized_curves_bounds[i]
-            if bs_gn[0] <= u <= bs_gn[1]:
-                # Relative [0, 1] local coordinate
-                lu_rel = (u - bs_gn[0]) / (bs_gn[1] - bs_gn[0])
-                lws = self.local_weights[i]
-                if len(lws) == 2:  # Beta distribution
-                    if lu_rel == 0 or lu_rel == 1:
-                        pass
-                    else:
-                        a, b = lws
-                        n = 10000
-                        xs, dx = np.linspace(0, lu_rel, n, retstep=True)
-                        ts, dt = np.linspace(0, 1, n, retstep=True, endpoint=False)
-                        xs, ts = xs[1:], ts[1:]  # Exclude 0's
-                        t = np.sum(ts ** (a - 1) * (1 - ts) ** (b - 1) * dt)
-                        x = np.sum(xs ** (a - 1) * (1 - xs) ** (b - 1) * dx)
-                        lu_rel = x / t
-                        # print(f'beta {a}, {b}, {x}, {t}, {lu_rel}')
-                else:  # Linear
-                    pass
-                bs = self.curves_bounds[i]
-                # Absolute local coordinate
-                lu_abs = bs[0] + lu_rel * (bs[1] - bs[0])
-                # Value (Cartesian coordinates)
-                v = gmsh.model.getValue(1, c.tag, (lu_abs,))
-                # Derivative (Cartesian)
-                dv = gmsh.model.getDerivative(1, c.tag, (lu_abs,))
-                ori0 = np.array([x.coordinates for x in self.orientations[i]])
-                ori1 = np.array([x.coordinates for x in self.orientations[i + 1]])
-                ori = lu_rel * ori1 + (1 - lu_rel) * ori0
-                if self.do_normalize:
-                    if self.normalize_local_kind == 0:  # skip
-                        pass
-                    elif self.normalize_local_kind == 1:  # self
-                        norm = np.linalg.norm(ori, axis=1, keepdims=True)
-                        ori /= norm
-                    elif self.normalize_local_kind == 2:  # first
-                        norm0 = np.linalg.norm(ori0, axis=1, keepdims=True)
-                        norm = np.linalg.norm(ori, axis=1, keepdims=True)
-                        ori = ori / norm * norm0
-                    elif self.normalize_local_kind == 3:  # last
-                        norm1 = np.linalg.norm(ori1, axis=1, keepdims=True)
-                        norm = np.linalg.norm(ori, axis=1, keepdims=True)
-                        ori = ori / norm * norm1
-                    elif self.normalize_local_kind == 4:  # first-last
-                        norm0 = np.linalg.norm(ori0, axis=1, keepdims=True)
-                        norm1 = np.linalg.norm(ori1, axis=1, keepdims=True)
-                        norm = np.linalg.norm(ori, axis=1, keepdims=True)
-                        ori = ori / norm * (lu_rel * norm1 + (1 - lu_rel) * norm0)
-                    else:
-                        raise NotImplementedError(self.normalize_local_kind)
-                break
-        return v, dv, ori, lu_rel
-
-    def get_local_coordinate_system(self, u):
-        if not self.is_registered:  # lazy init
-            self.transform()
-            self.register()
-            from gmsh_scripts.registry import FACTORY
-            if FACTORY == 'geo':
-                gmsh.model.geo.synchronize()
-            elif FACTORY == 'occ':
-                gmsh.model.occ.synchronize()
+                tag = self.curves[i].tag
+                vs[m] = np.reshape(gmsh.model.getValue(1, tag, lus_abs[m]), (-1, 3))
+                dvs[m] = np.reshape(gmsh.model.getDerivative(1, tag, lus_abs[m]), (-1, 3))
+        oris = np.array([[x.coordinates for x in o] for o in self.orientations])
+        ori0, ori1 = oris[curves], oris[curves + 1]
+        k = lus[:, None, None]
+        ori = k * ori1 + (1 - k) * ori0
+        if self.do_normalize:
+            norm = np.linalg.norm(ori, axis=2, keepdims=True)
+            if self.normalize_local_kind == 0:  # skip
+                pass
+            elif self.normalize_local_kind == 1:  # self
+                ori /= norm
+            elif self.normalize_local_kind == 2:  # first
+                norm0 = np.linalg.norm(ori0, axis=2, keepdims=True)
+                ori = ori / norm * norm0
+            elif self.normalize_local_kind == 3:  # last
+                norm1 = np.linalg.norm(ori1, axis=2, keepdims=True)
+                ori = ori / norm * norm1
+            elif self.normalize_local_kind == 4:  # first-last
+                norm0 = np.linalg.norm(ori0, axis=2, keepdims=True)
+                norm1 = np.linalg.norm(ori1, axis=2, keepdims=True)
+                ori = ori / norm * (k * norm1 + (1 - k) * norm0)
             else:
-                raise ValueError(FACTORY)
-            self.evaluate_bounds()
-            self.is_registered = True
-        v, dv, ori, lu_rel = self.get_value_derivative_orientation(u)
-        z = ori[2]
-        cos_a = np.dot(dv, z) / (np.linalg.norm(dv) * np.linalg.norm(z))
-        cos_a = np.clip(cos_a, -1, 1)  # Fix integration error
-        a = np.arccos(cos_a)
-        d = np.cross(z / np.linalg.norm(z), dv / np.linalg.norm(dv))
-        # d = np.cross(z, dv)
-        from gmsh_scripts.entity.point import Point
-        ps = [Point(coordinates=x) for x in ori]
-        if np.linalg.norm(d) > 0 and not np.isnan(a):
-            d = d / np.linalg.norm(d)
-            from gmsh_scripts.transform.transform import Rotate
+                raise NotImplementedError(self.normalize_local_kind)
+        return vs, dvs, ori, lus
+
+    def get_value_derivative_orientation(self, u):
+        vs, dvs, oris, lus = self.get_values_derivatives_orientations([u])
+        return vs[0], dvs[0], oris[0], lus[0]
+
+    def get_local_bases(self, us):
+        """Origins and basis vectors of local coordinate systems
+
+        Args:
+            us (np.ndarray): relative path coordinates [0, 1] of shape (N,)
+
+        Returns:
+            tuple: tuple of:
+                origins (np.ndarray): origins of shape (N, 3)
+                bases (np.ndarray): basis vectors of shape (N, 3, 3)
+        """
+        vs, dvs, oris, lus = self.get_values_derivatives_orientations(us)
+        zs = oris[:, 2]
+        dvs_norm = np.linalg.norm(dvs, axis=1, keepdims=True)
+        zs_norm = np.linalg.norm(zs, axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_a = np.sum(dvs * zs, axis=1) / (dvs_norm * zs_norm)[:, 0]
+            cos_a = np.clip(cos_a, -1, 1)  # Fix integration error
+            a = np.arccos(cos_a)
+            d = np.cross(zs / zs_norm, dvs / dvs_norm)
+            d_norm = np.linalg.norm(d, axis=1, keepdims=True)
+            is_rotated = (d_norm[:, 0] > 0) & ~np.isnan(a)
+            d = d / d_norm
+        if np.any(is_rotated):  # Rotate around d (Rodrigues' formula)
             # ori_part = 2*abs(lu_rel - 0.5)
             # der_part = 1 - ori_part
             der_part = 0
-            a = a * der_part
-            rot = Rotate(origin=[0, 0, 0], direction=d, angle=a)
-            ps = [rot(x) for x in ps]
-        vs = [x.coordinates for x in ps]
-        cs = Affine(origin=v, vs=vs)
-        return cs
+            a = a[is_rotated] * der_part
+            d = d[is_rotated][:, None, :]
+            o = oris[is_rotated]
+            cos_a, sin_a = np.cos(a)[:, None, None], np.sin(a)[:, None, None]
+            oris[is_rotated] = (o * cos_a + np.cross(d, o) * sin_a
+                                + d * np.sum(d * o, axis=2, keepdims=True) * (1 - cos_a))
+        return vs, oris
+
+    def get_local_coordinate_system(self, u):
+        vs, oris = self.get_local_bases([u])
+        return Affine(origin=vs[0], vs=oris[0])
+
+
+class LayerBoundaries:
+    """Sorted boundaries of layers by one direction
+
+    Args:
+        values (list of float): coordinates of boundaries of layers
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.order = np.argsort(values, kind='stable')  # Sorted -> layers
+        self.values = values[self.order]
+
+    def find(self, xs, start=0, atol=1e-8, rtol=1e-5):
+        """Indices of the first layers with boundaries close to coordinates
+
+        Boundary v is close to coordinate x as in np.isclose(x, v, rtol, atol).
+        Tolerance interval of the boundary grows with the boundary,
+        so candidates are found by binary search (np.searchsorted)
+        and then checked.
+
+        Args:
+            xs (np.ndarray): coordinates of shape (N,)
+            start (int): index of the first layer to search
+            atol (float): absolute tolerance
+            rtol (float): relative tolerance
+
+        Returns:
+            np.ndarray: indices of layers of shape (N,),
+                number of layers if boundary is not found
+        """
+        n = len(self.values)
+        tol = atol + rtol * np.abs(self.values)
+        lo = np.searchsorted(self.values + tol, xs, side='left') - 1
+        hi = np.searchsorted(self.values - tol, xs, side='right') + 1
+        lo, hi = np.maximum(lo, 0), np.minimum(hi, n)
+        found = np.full(np.shape(xs), n)
+        for k in range(np.max(hi - lo, initial=0)):  # Candidates
+            i = np.minimum(lo + k, n - 1)
+            j, v = self.order[i], self.values[i]
+            is_close = np.abs(xs - v) <= atol + rtol * np.abs(v)
+            is_close &= (lo + k < hi) & (j >= start)
+            found = np.where(is_close, np.minimum(found, j), found)
+        return found
 
 
 class Layer(CoordinateSystem):
@@ -401,6 +529,7 @@ class Layer(CoordinateSystem):
         self.layers[5] = [-x for x in self.layers[5]]  # NZ
         self.layers_curves = layers_curves
         self.layers_types = layers_types
+        self.boundaries = [LayerBoundaries(x) for x in self.layers[:4]]  # X, Y, NX, NY
 
 
 class QuarterLayer(CoordinateSystem):
@@ -437,6 +566,7 @@ class QuarterLayer(CoordinateSystem):
         self.layers[5] = [-x for x in self.layers[5]]  # NZ
         self.layers_curves = layers_curves
         self.layers_types = layers_types
+        self.boundaries = [LayerBoundaries(x) for x in self.layers[:4]]  # X, Y, NX, NY
 
 
 class HalfLayer(CoordinateSystem):
@@ -473,6 +603,28 @@ class HalfLayer(CoordinateSystem):
         self.layers[5] = [-x for x in self.layers[5]]  # NZ
         self.layers_curves = layers_curves
         self.layers_types = layers_types
+        self.boundaries = [LayerBoundaries(x) for x in self.layers[:4]]  # X, Y, NX, NY
+
+
+def get_coordinate_system_key(coordinate_system):
+    """Key of the coordinate system to compare points before transforms
+
+    Systems that are defined only by the origin (and basis vectors)
+    are compared by values, others by identity.
+
+    Args:
+        coordinate_system (CoordinateSystem): coordinate system
+
+    Returns:
+        tuple or int: key
+    """
+    cs = coordinate_system
+    if type(cs) in (CoordinateSystem, Cylindrical, Spherical, Toroidal, Tokamak):
+        return type(cs), cs.dim, cs.origin.tobytes()
+    elif type(cs) in (Affine, Cartesian):
+        return type(cs), cs.dim, cs.origin.tobytes(), cs.vs.tobytes()
+    else:
+        return id(cs)
 
 
 str2obj = {
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Curve:
     """Curve
 
@@ -10,6 +13,8 @@ class Curve:
         structure (Structure): curve structure
         kwargs (dict): other keyword arguments
     """
+    __slots__ = ('tag', 'name', 'zone', 'points', 'structure', 'kwargs')
+
     def __init__(self, tag=None, name='line', zone=None, points=None,
                  structure=None, **kwargs):
         self.tag = tag
@@ -20,6 +25,248 @@ class Curve:
         self.kwargs = kwargs
 
 
+class CurveEvaluator:
+    """Evaluator of the curve by NumPy without gmsh
+
+    Curve is parametrized as by gmsh for the factory, so values
+    and derivatives at the same parameters are equal to ones of
+    gmsh.model.getValue and gmsh.model.getDerivative.
+
+    * line - linear between the first and the last points
+    * polyline - linear between points, points at equal parameter steps
+    * circle_arc - by angle, points are start, center and end
+    * spline - Catmull-Rom spline through points (geo factory only,
+      occ spline is interpolated by GeomAPI_Interpolate)
+    * bspline - clamped uniform B-spline of degree min(3, number of points - 1)
+
+    Curves with non-default keyword arguments (e.g. degree, knots, weights
+    and multiplicities of occ bspline) are not supported.
+
+    Args:
+        name (str): type of the curve
+        ps (np.ndarray or list): coordinates of curve points of shape (N, 3)
+        factory (str): gmsh factory geo or occ
+        kwargs (dict): keyword arguments of the curve (see Curve.kwargs)
+    """
+    names = ('line', 'polyline', 'circle_arc', 'spline', 'bspline')
+
+    def __init__(self, name, ps, factory='geo', kwargs=None):
+        if not self.is_supported(name, ps, factory, kwargs):
+            raise NotImplementedError(f'{name} curve of {factory} factory')
+        self.name = name
+        self.factory = factory
+        self.ps = np.array(ps, dtype=float)
+        self.bounds = self.get_bounds()
+
+    @classmethod
+    def is_supported(cls, name, ps, factory='geo', kwargs=None):
+        """Can the curve be evaluated without gmsh
+
+        Args:
+            name (str): type of the curve
+            ps (np.ndarray or list): coordinates of curve points
+            factory (str): gmsh factory geo or occ
+            kwargs (dict): keyword arguments of the curve (see Curve.kwargs),
+                only default ones of the registry are supported
+
+        Returns:
+            bool: is supported
+        """
+        if name not in cls.names or factory not in ['geo', 'occ']:
+            return False
+        from gmsh_scripts.registry import CURVE_KWARGS
+        default_kwargs = CURVE_KWARGS[(factory, name)]
+        kwargs = {} if kwargs is None else kwargs
+        for k, v in kwargs.items():  # Non-default are not implemented
+            if k != 'tag' and k in default_kwargs \
+                    and not np.array_equal(v, default_kwargs[k]):
+                return False
+        ps = np.asarray(ps, dtype=float)
+        if len(ps) < 2:
+            return False
+        if name == 'circle_arc':
+            if len(ps) != 3:
+                return False
+            r0, r1 = np.linalg.norm(ps[0] - ps[1]), np.linalg.norm(ps[2] - ps[1])
+            return bool(np.isclose(r0, r1, rtol=1e-9, atol=0) and r0 > 0)
+        if name == 'spline':
+            return factory == 'geo' and not np.allclose(ps[0], ps[-1])
+        if name == 'bspline':
+            return not np.allclose(ps[0], ps[-1])
+        return True
+
+    def get_bounds(self):
+        """Parametrization bounds as by gmsh.model.getParametrizationBounds
+
+        Returns:
+            list of float: lower and upper bounds
+        """
+        if self.factory == 'geo':
+            return [0., 1.]
+        if self.name == 'line':
+            return [0., float(np.linalg.norm(self.ps[-1] - self.ps[0]))]
+        elif self.name == 'polyline':
+            return [0., float(len(self.ps) - 1)]
+        elif self.name == 'circle_arc':
+            return [0., self.get_circle_arc_frame()[4]]
+        elif self.name == 'bspline':
+            return [0., float(len(self.ps) - min(3, len(self.ps) - 1))]
+        else:
+            raise NotImplementedError(self.name)
+
+    def get_circle_arc_frame(self):
+        """Center, radius, axes and angle of the circle arc
+
+        Returns:
+            tuple: center, radius, axis to start,
+                axis orthogonal to it in the plane of the arc, angle
+        """
+        c = self.ps[1]
+        v0, v1 = self.ps[0] - c, self.ps[2] - c
+        r = np.linalg.norm(v0)
+        e0 = v0 / r
+        e1 = v1 - np.dot(v1, e0) * e0
+        e1 /= np.linalg.norm(e1)
+        a = float(np.arctan2(np.dot(v1, e1), np.dot(v1, e0)))
+        return c, r, e0, e1, a
+
+    def evaluate(self, us):
+        """Values and derivatives at relative parameters
+
+        Args:
+            us (np.ndarray): relative parameters [0, 1] of shape (M,)
+
+        Returns:
+            tuple: tuple of:
+                values (np.ndarray): coordinates of shape (M, 3)
+                derivatives (np.ndarray): derivatives by gmsh parameter
+                    of curve (see get_bounds) of shape (M, 3)
+        """
+        us = np.clip(np.asarray(us, dtype=float), 0, 1)
+        du = self.bounds[1] - self.bounds[0]
+        if self.name == 'line':
+            d = self.ps[-1] - self.ps[0]
+            vs = self.ps[0] + us[:, None] * d
+            dvs = np.tile(d / du, (len(us), 1))
+        elif self.name == 'circle_arc':
+            c, r, e0, e1, a = self.get_circle_arc_frame()
+            ts = a * us[:, None]
+            cos_t, sin_t = np.cos(ts), np.sin(ts)
+            vs = c + r * (cos_t * e0 + sin_t * e1)
+            dvs = r * a / du * (cos_t * e1 - sin_t * e0)
+        elif self.name == 'polyline':
+            n = len(self.ps) - 1
+            ts = us * n
+            i = np.minimum(ts.astype(int), n - 1)
+            d = self.ps[i + 1] - self.ps[i]
+            vs = self.ps[i] + (ts - i)[:, None] * d
+            dvs = d * n / du
+        elif self.name == 'spline':
+            vs, dvs = self.evaluate_catmull_rom(us)
+        elif self.name == 'bspline':
+            vs, dvs = self.evaluate_bspline(us)
+            dvs *= (len(self.ps) - min(3, len(self.ps) - 1)) / du
+        else:
+            raise NotImplementedError(self.name)
+        return vs, dvs
+
+    def evaluate_catmull_rom(self, us):
+        """Catmull-Rom spline with mirrored end points as gmsh geo Spline
+
+        Args:
+            us (np.ndarray): relative parameters [0, 1] of shape (M,)
+
+        Returns:
+            tuple: values and derivatives by relative parameter
+        """
+        ps = self.ps
+        n = len(ps) - 1
+        ps = np.concatenate([[2 * ps[0] - ps[1]], ps, [2 * ps[-1] - ps[-2]]])
+        ts = us * n
+        i = np.minimum(ts.astype(int), n - 1)
+        t = (ts - i)[:, None]
+        p0, p1, p2, p3 = ps[i], ps[i + 1], ps[i + 2], ps[i + 3]
+        a = -p0 + 3 * p1 - 3 * p2 + p3
+        b = 2 * p0 - 5 * p1 + 4 * p2 - p3
+        c = -p0 + p2
+        vs = 0.5 * (((a * t + b) * t + c) * t) + p1
+        dvs = 0.5 * ((3 * a * t + 2 * b) * t + c) * n
+        return vs, dvs
+
+    def evaluate_bspline(self, us):
+        """Clamped uniform B-spline by non-zero basis functions of each span
+
+        See Algorithm A2.2 in Piegl L., Tiller W. The NURBS Book. 1997.
+
+        Args:
+            us (np.ndarray): relative parameters [0, 1] of shape (M,)
+
+        Returns:
+            tuple: values and derivatives by knots parameter [0, number of spans]
+        """
+        n = len(self.ps)
+        p = min(3, n - 1)
+        m = n - p  # Number of spans
+        knots = np.concatenate([np.zeros(p), np.arange(m + 1),
+                                np.full(p, m)]).astype(float)
+        ts = us * m
+        span = np.minimum(ts.astype(int), m - 1) + p
+        left = ts - knots[span + 1 - np.arange(p + 1)[:, None]]  # (p + 1, M)
+        right = knots[span + np.arange(p + 1)[:, None]] - ts
+        bs = np.zeros((p + 1, len(ts)))
+        bs[0] = 1
+        for j in range(1, p + 1):
+            bs_prev = bs.copy()  # Basis of degree j - 1
+            saved = np.zeros(len(ts))
+            for r in range(j):
+                temp = bs_prev[r] / (right[r + 1] + left[j - r])
+                bs[r] = saved + right[r + 1] * temp
+                saved = left[j - r] * temp
+            bs[j] = saved
+        dbs = np.zeros_like(bs)  # Derivatives from basis of degree p - 1
+        for r in range(p + 1):
+            if r > 0:
+                dbs[r] += p * bs_prev[r - 1] / (knots[span + r] - knots[span + r - p])
+            if r < p:
+                dbs[r] -= p * bs_prev[r] / (knots[span + r + 1] - knots[span + r + 1 - p])
+        vs, dvs = np.zeros((len(ts), 3)), np.zeros((len(ts), 3))
+        for r in range(p + 1):
+            ps = self.ps[span - p + r]
+            vs += bs[r][:, None] * ps
+            dvs += dbs[r][:, None] * ps
+        return vs, dvs
+
+    def get_length(self, n=64):
+        """Arc length of the curve
+
+        Spline and B-spline are integrated by Gauss-Legendre quadrature
+        of n points on each span of the curve.
+
+        Args:
+            n (int): number of quadrature points by span
+
+        Returns:
+            float: length
+        """
+        if self.name == 'line':
+            return float(np.linalg.norm(self.ps[-1] - self.ps[0]))
+        elif self.name == 'polyline':
+            return float(np.sum(np.linalg.norm(np.diff(self.ps, axis=0), axis=1)))
+        elif self.name == 'circle_arc':
+            _, r, _, _, a = self.get_circle_arc_frame()
+            return float(r * a)
+        xs, ws = np.polynomial.legendre.leggauss(n)
+        if self.name == 'bspline':  # Number of spans between knots
+            m = len(self.ps) - min(3, len(self.ps) - 1)
+        else:
+            m = len(self.ps) - 1
+        us = (np.arange(m)[:, None] + 0.5 * (xs + 1)).ravel() / m
+        _, dvs = self.evaluate(us)
+        du = self.bounds[1] - self.bounds[0]
+        return float(np.sum(np.tile(ws, m) * np.linalg.norm(dvs, axis=1))
+                     * 0.5 / m * du)
+
+
 str2obj = {
     Curve.__name__: Curve,
     Curve.__name__.lower(): Curve
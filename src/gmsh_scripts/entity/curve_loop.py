@@ -1,4 +1,6 @@
 class CurveLoop:
+    __slots__ = ('tag', 'name', 'zone', 'curves', 'curves_signs', 'kwargs')
+
     def __init__(self, tag=None, name=None, zone=None, curves=None,
                  curves_signs=None, **kwargs):
         """Volume
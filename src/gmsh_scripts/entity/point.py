@@ -4,6 +4,9 @@ from gmsh_scripts.coordinate_system.coordinate_system import str2obj as cs_facto
 from gmsh_scripts.coordinate_system.coordinate_system import CoordinateSystem, Cartesian, Cylindrical, \
     Spherical, Toroidal, Tokamak
 
+CARTESIAN = Cartesian()
+"""Cartesian coordinate system shared by points (it's never modified)"""
+
 
 class Point:
     """Point
@@ -20,6 +23,7 @@ class Point:
         coordinates (np.ndarray): coordinates values
         kwargs (dict or None): other keyword arguments (e.g. meshSize)
     """
+    __slots__ = ('tag', 'zone', 'coordinate_system', 'coordinates', 'kwargs')
 
     def __init__(self, *args, tag=None, zone=None, coordinate_system=None,
                  coordinates=None, **kwargs):
@@ -32,12 +36,14 @@ class Point:
         self.kwargs = kwargs
 
     @staticmethod
-    def parse_coordinate_system(coordinate_system, default=Cartesian(),
+    def parse_coordinate_system(coordinate_system, default=CARTESIAN,
                                 name_key='name'):
         if coordinate_system is None:
             coordinate_system = default
         elif isinstance(coordinate_system, CoordinateSystem):
             pass
+        elif coordinate_system == Cartesian.__name__:  # Shared
+            coordinate_system = CARTESIAN
         elif isinstance(coordinate_system, str):
             coordinate_system = cs_factory[coordinate_system]()
         elif isinstance(coordinate_system, dict):
@@ -110,7 +116,7 @@ class Point:
             else:
                 raise ValueError(a)
             # Split nums into coordinates and meshSize
-            dim = coordinate_system.dim if coordinate_system is not None else Cartesian().dim
+            dim = coordinate_system.dim if coordinate_system is not None else CARTESIAN.dim
             if n_nums == dim:  # coordinates, ...
                 coordinates = nums
             elif n_nums - 1 == dim:  # coordinates, meshSize, ...
@@ -1,4 +1,7 @@
 class Surface:
+    __slots__ = ('tag', 'name', 'zone', 'curves_loops', 'structure', 'quadrate',
+                 'kwargs')
+
     def __init__(self, tag=None, name='line', zone=None, curves_loops=None,
                  structure=None, quadrate=None, **kwargs):
         """Surface
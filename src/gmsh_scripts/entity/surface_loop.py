@@ -1,4 +1,6 @@
 class SurfaceLoop:
+    __slots__ = ('tag', 'name', 'zone', 'surfaces', 'kwargs')
+
     def __init__(self, tag=None, name=None, zone=None, surfaces=None, **kwargs):
         """Volume
         Args:
@@ -1,4 +1,7 @@
 class Volume:
+    __slots__ = ('tag', 'name', 'zone', 'surfaces_loops', 'structure', 'quadrate',
+                 'kwargs')
+
     def __init__(self, tag=None, name=None, zone=None, surfaces_loops=None,
                  structure=None, quadrate=None, **kwargs):
         """Volume
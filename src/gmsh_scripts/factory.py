@@ -1,6 +1,7 @@
+import importlib
 from pathlib import Path
 
-from gmsh_scripts.load import load
+from gmsh_scripts.load import load_include
 
 
 class FactoryClassError(Exception):
@@ -30,67 +31,217 @@ class FactoryValueError(Exception):
         return str(self.value)
 
 
+MANIFEST = [
+    ('block', 'gmsh_scripts.block.block', ['Block']),
+    ('boolean', 'gmsh_scripts.boolean.boolean', [
+        'Boolean', 'NoBoolean', 'BooleanAllBlock']),
+    ('coordinate_system', 'gmsh_scripts.coordinate_system.coordinate_system', [
+        'CoordinateSystem', 'coo', 'Affine', 'aff', 'Cartesian', 'car',
+        'Cylindrical', 'cyl', 'Spherical', 'sph', 'Toroidal', 'tor',
+        'Tokamak', 'tok', 'Hexahedral', 'hex', 'Block', 'blo', 'Path', 'pth',
+        'Layer', 'QuarterLayer', 'HalfLayer']),
+    ('curve', 'gmsh_scripts.entity.curve', ['Curve', 'curve']),
+    ('curve_loop', 'gmsh_scripts.entity.curve_loop', ['CurveLoop', 'curveloop']),
+    ('block', 'gmsh_scripts.block.layer', ['Layer']),
+    ('block', 'gmsh_scripts.block.matrix', ['Matrix', 'matrix']),
+    ('block', 'gmsh_scripts.block.polyhedron', ['Polyhedron', 'polyhedron']),
+    ('block', 'gmsh_scripts.block.quarter_layer', ['QuarterLayer']),
+    ('block', 'gmsh_scripts.block.half_layer', ['HalfLayer']),
+    ('point', 'gmsh_scripts.entity.point', ['Point']),
+    ('quadrate', 'gmsh_scripts.quadrate.quadrate', [
+        'Quadrate', 'QuadrateBlock', 'NoQuadrate']),
+    ('size', 'gmsh_scripts.size.size', [
+        'Size', 'BooleanPoint', 'BooleanEdge', 'Bagging', 'NoSize']),
+    ('strategy', 'gmsh_scripts.strategy.strategy', [
+        'Base', 'Fast', 'NoBoolean', 'Geometry']),
+    ('structure', 'gmsh_scripts.structure.structure', [
+        'Structure', 'NoStructure', 'StructureAuto', 'StructureBlock',
+        'StructureByBlock']),
+    ('surface', 'gmsh_scripts.entity.surface', ['Surface', 'surface']),
+    ('surface_loop', 'gmsh_scripts.entity.surface_loop', [
+        'SurfaceLoop', 'surfaceloop']),
+    ('transform', 'gmsh_scripts.transform.transform', [
+        'Transform', 'Translate', 'translate', 'tra', 'Rotate', 'rotate', 'rot',
+        'CartesianToCartesian', 'Cartesian', 'car2car',
+        'CylindricalToCartesian', 'Cylindrical', 'cyl2car',
+        'SphericalToCartesian', 'Spherical', 'sph2car',
+        'ToroidalToCartesian', 'Toroidal', 'tor2car',
+        'TokamakToCartesian', 'Tokamak', 'tok2car',
+        'BlockToCartesian', 'Block', 'blo2car',
+        'AffineToCartesian', 'Affine', 'aff2car', 'AffineToAffine', 'aff2aff',
+        'PathToCartesian', 'Path', 'pat2car', 'LayerToCartesian', 'AnyAsSome',
+        'CartesianToCartesianByBlock', 'QuarterLayerToCartesian',
+        'TransformationMatrix', 'HalfLayerToCartesian']),
+    ('volume', 'gmsh_scripts.entity.volume', ['Volume', 'volume']),
+    ('zone', 'gmsh_scripts.zone.zone', [
+        'Zone', 'NoZone', 'Mesh', 'DirectionByNormal', 'Block']),
+    ('optimize', 'gmsh_scripts.optimize.optimize', [
+        'Optimize', 'OptimizeOne', 'OptimizeMany', 'NoOptimize']),
+    ('refine', 'gmsh_scripts.refine.refine', [
+        'Refine', 'NoRefine', 'RefineBySplit']),
+    ('smooth', 'gmsh_scripts.smooth.smooth', [
+        'Smooth', 'NoSmooth', 'SmoothByDim']),
+]
+"""Static manifest of factory keys: (prefix, module, module str2obj keys)
+
+Modules are imported only when one of their keys is resolved.
+Keep in sync with str2obj of the modules.
+"""
+
+ENTRY_POINTS_GROUP = 'gmsh_scripts'
+"""Entry points group of plugins: name is a prefix, value is a module with str2obj"""
+
+
 class Factory:
+    """Lazy registry of objects available in input files
+
+    Keys are "prefix.name" strings, e.g. "block.Matrix" or "transform.Translate".
+    Modules of the static MANIFEST are imported on the first resolve
+    of one of their keys. Plugins could add entries with register,
+    register_module or with entry points of the ENTRY_POINTS_GROUP group
+    that are loaded on the first miss.
+    """
+
     def __init__(self):
-        # Import str2objs
-        str2objs = []
-        from gmsh_scripts.block.block import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.boolean.boolean import str2obj
-        str2objs.append({f'boolean.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.coordinate_system.coordinate_system import str2obj
-        str2objs.append({f'coordinate_system.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.curve import str2obj
-        str2objs.append({f'curve.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.curve_loop import str2obj
-        str2objs.append({f'curve_loop.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.block.layer import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.block.matrix import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.block.polyhedron import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.block.quarter_layer import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.block.half_layer import str2obj
-        str2objs.append({f'block.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.point import str2obj
-        str2objs.append({f'point.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.quadrate.quadrate import str2obj
-        str2objs.append({f'quadrate.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.size.size import str2obj
-        str2objs.append({f'size.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.strategy.strategy import str2obj
-        str2objs.append({f'strategy.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.structure.structure import str2obj
-        str2objs.append({f'structure.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.surface import str2obj
-        str2objs.append({f'surface.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.surface_loop import str2obj
-        str2objs.append({f'surface_loop.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.transform.transform import str2obj
-        str2objs.append({f'transform.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.entity.volume import str2obj
-        str2objs.append({f'volume.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.zone.zone import str2obj
-        str2objs.append({f'zone.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.optimize.optimize import str2obj
-        str2objs.append({f'optimize.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.refine.refine import str2obj
-        str2objs.append({f'refine.{k}': v for k, v in str2obj.items()})
-        from gmsh_scripts.smooth.smooth import str2obj
-        str2objs.append({f'smooth.{k}': v for k, v in str2obj.items()})
-        # Make global str2obj and obj2str(s)
-        str2obj, obj2str = {}, {}
-        for s2o in str2objs:
-            for k, v in s2o.items():
-                if k not in str2obj:
-                    str2obj[k] = v
-                    obj2str.setdefault(v, []).append(k)
-                else:
-                    raise ValueError(f'Duplicate keys: {k}')
-        self.str2obj = str2obj
-        self.obj2str = obj2str
+        self.key2obj = {}  # Resolved keys
+        self.key2module = {}  # Not yet resolved keys
+        self.prefix2modules = {}  # Modules without manifest
+        self.is_entry_points_loaded = False
+        for prefix, module, names in MANIFEST:
+            self.register_module(prefix, module, names)
+
+    def register(self, key, obj):
+        """Register object
+
+        Args:
+            key (str): "prefix.name" key
+            obj (object): class or function that returns an object
+        """
+        if key in self.key2obj or key in self.key2module:
+            raise ValueError(f'Duplicate keys: {key}')
+        self.key2obj[key] = obj
+
+    def register_module(self, prefix, module, names=None):
+        """Register module with str2obj dict
+
+        Args:
+            prefix (str): prefix of keys
+            module (str): name of the module
+            names (list of str or None): keys of the module str2obj,
+                if None, the module is imported on the first miss with the prefix
+        """
+        if names is None:
+            self.prefix2modules.setdefault(prefix, []).append(module)
+            return
+        for name in names:
+            key = f'{prefix}.{name}'
+            if key in self.key2obj or key in self.key2module:
+                raise ValueError(f'Duplicate keys: {key}')
+            self.key2module[key] = (module, name)
+
+    def load_entry_points(self):
+        """Register plugins modules from entry points"""
+        self.is_entry_points_loaded = True
+        try:  # Lazy import, it is slow
+            from importlib.metadata import entry_points
+        except ImportError:  # Python < 3.8
+            return
+        eps = entry_points()
+        if hasattr(eps, 'select'):  # Python >= 3.10
+            eps = eps.select(group=ENTRY_POINTS_GROUP)
+        else:
+            eps = eps.get(ENTRY_POINTS_GROUP, [])
+        for ep in eps:
+            self.register_module(ep.name, ep.value)
+
+    def import_modules(self, prefix=None):
+        """Import modules registered without manifest
+
+        Args:
+            prefix (str or None): prefix of modules, if None import all
+        """
+        prefixes = list(self.prefix2modules) if prefix is None else [prefix]
+        for p in prefixes:
+            for module in self.prefix2modules.pop(p, []):
+                str2obj = importlib.import_module(module).str2obj
+                for name, obj in str2obj.items():
+                    self.register(f'{p}.{name}', obj)
+
+    def resolve(self, key):
+        """Get object by key
+
+        Args:
+            key (str): "prefix.name" key
+
+        Returns:
+            object or None: object or None if there is no such key
+        """
+        obj = self.key2obj.get(key)
+        if obj is not None:
+            return obj
+        if key in self.key2module:
+            module, name = self.key2module.pop(key)
+            obj = importlib.import_module(module).str2obj[name]
+            self.key2obj[key] = obj
+            return obj
+        if not self.is_entry_points_loaded:
+            self.load_entry_points()
+        prefix = key.split('.')[0]
+        if prefix in self.prefix2modules:
+            self.import_modules(prefix)
+            return self.key2obj.get(key)
+        return None
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.resolve(key) is not None
+
+    def keys(self, prefix=None):
+        """Get all keys without importing manifest modules
+
+        Args:
+            prefix (str or None): filter keys by prefix
+
+        Returns:
+            list of str: keys
+        """
+        if not self.is_entry_points_loaded:
+            self.load_entry_points()
+        self.import_modules()
+        keys = list(self.key2obj) + list(self.key2module)
+        if prefix is not None:
+            keys = [x for x in keys if x.split('.')[0] == prefix]
+        return keys
+
+    def is_constructible(self, obj):
+        """Check that the object could be constructed by the factory
+
+        Args:
+            obj (dict or list or str): dict with a key at "class",
+                list with a key as the first item and arguments or a key
+
+        Returns:
+            bool: True if the object has a known key
+        """
+        if isinstance(obj, dict):
+            key = obj.get('class')
+        elif isinstance(obj, list):
+            key = obj[0] if len(obj) > 1 else None
+        else:
+            key = obj
+        return key in self
+
+    @property
+    def str2obj(self):
+        """All keys to objects (imports all modules)"""
+        return {k: self.resolve(k) for k in self.keys()}
+
+    @property
+    def obj2str(self):
+        """All objects to keys (imports all modules)"""
+        obj2str = {}
+        for k, v in self.str2obj.items():
+            obj2str.setdefault(v, []).append(k)
+        return obj2str
 
     def __call__(self, obj):
         if isinstance(obj, dict):
@@ -103,7 +254,7 @@ class Factory:
         elif isinstance(obj, str):
             if obj.startswith('/'):
                 p = Path(obj)
-                data = load(p)
+                data = load_include(p)
                 if 'class' in data:
                     key, args, kwargs = data.pop('class'), [], data
                 else:
@@ -112,8 +263,9 @@ class Factory:
                 key, args, kwargs = obj, [], {}
         else:
             raise FactoryValueError(obj)
-        if isinstance(key, str) and key in self.str2obj:
-            return self.str2obj[key](*args, **kwargs)
+        cls = self.resolve(key) if isinstance(key, str) else None
+        if cls is not None:
+            return cls(*args, **kwargs)
         else:
             raise FactoryKeyError(key)
 
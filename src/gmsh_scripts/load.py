@@ -1,5 +1,13 @@
-import yaml
+import os
 import json
+from pathlib import Path
+
+import yaml
+
+try:  # LibYAML bindings are much faster than the pure Python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 
 def load(path):
@@ -7,7 +15,75 @@ def load(path):
         if path.suffix == '.json':
             data = json.load(f)
         elif path.suffix in ['.yml', '.yaml']:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=SafeLoader)
         else:
             raise ValueError(f"Wrong file format {path.suffix}!")
     return data
+
+
+INCLUDES = {}
+"""Cache of parsed include files: resolved path -> ((mtime, size), data)"""
+INCLUDES_STATISTICS = {'hits': 0, 'misses': 0}
+
+
+def copy_data(obj):
+    """Copy parsed JSON/YAML data
+
+    Only dicts and lists are copied, other values are immutable scalars.
+    This is much cheaper than copy.deepcopy.
+
+    Args:
+        obj (dict or list or str or int or float or bool or None): data
+
+    Returns:
+        dict or list or str or int or float or bool or None: copy of data
+    """
+    if isinstance(obj, dict):
+        return {k: copy_data(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [copy_data(x) for x in obj]
+    else:
+        return obj
+
+
+def load_include(path):
+    """Load include file with process-wide cache
+
+    Files are parsed once per process and reparsed only if their modification
+    time or size changed. Callers get a copy of the cached data,
+    so they can mutate it freely.
+
+    Args:
+        path (str or Path): path to the file
+
+    Returns:
+        dict or list: copy of file data
+    """
+    path = Path(path).resolve()
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = INCLUDES.get(path)
+    if cached is not None and cached[0] == version:
+        INCLUDES_STATISTICS['hits'] += 1
+        data = cached[1]
+    else:
+        INCLUDES_STATISTICS['misses'] += 1
+        data = load(path)
+        INCLUDES[path] = (version, data)
+    return copy_data(data)
+
+
+def get_includes_statistics():
+    """Get include cache statistics
+
+    Returns:
+        dict: number of cache hits, misses and cached files
+    """
+    return {**INCLUDES_STATISTICS, 'files': len(INCLUDES)}
+
+
+def reset_includes():
+    """Clear include cache and its statistics"""
+    INCLUDES.clear()
+    INCLUDES_STATISTICS['hits'] = 0
+    INCLUDES_STATISTICS['misses'] = 0
@@ -189,13 +189,11 @@ def parse_row_item_mesh_size(m, pm, cs, pc, sep):
         pm = m if pm is None else pm
         dm = m - pm
         dc = cs[-1] - pc
-        for c in cs:
-            rel_c = (c - pc) / dc if dc != 0 else 0
-            k = beta_pdf(rel_c, a, b)
-            k *= w
-            k = k + 1 if k >= 0 else 1 / -k
-            new_m = k * (rel_c * dm + pm)
-            ms.append(new_m)
+        rel_cs = (np.asarray(cs) - pc) / dc if dc != 0 else np.zeros(len(cs))
+        ks = beta_pdf(rel_cs, a, b) * w
+        with np.errstate(divide='ignore'):
+            ks = np.where(ks >= 0, ks + 1, 1 / -ks)
+        ms = (ks * (rel_cs * dm + pm)).tolist()
     else:
         raise ValueError(vs)
     return ms
@@ -0,0 +1,236 @@
+"""Preflight estimation of the model size without gmsh
+
+Block tree is constructed, transformed and registered with the "dry" factory
+of the registry, that deduplicates entities as usual but doesn't call gmsh.
+Numbers of points, curves, surfaces and volumes are before boolean operations.
+
+Mesh estimation:
+    Structured blocks - registered blocks with structure and without registered
+        children (children are cut from the block by boolean, so the block
+        loses its structure). Nodes are a product of numbers of nodes
+        by X, Y and Z, cells are hexahedra, that are split into 6 tetrahedra
+        if the block is not quadrated. Nodes on faces shared by blocks
+        are counted twice.
+    Unstructured blocks - other registered blocks. Volume of the block without
+        volumes of its registered children is filled with regular tetrahedra
+        of volume h^3 / (6 sqrt(2)), where h is an average meshSize of the block
+        points (or Mesh.MeshSizeMax if Mesh.MeshSizeFromPoints is 0)
+        multiplied by Mesh.MeshSizeFactor. Number of nodes is about
+        number of tetrahedra / 5.5. Volume is evaluated by block corners,
+        so curved faces are ignored.
+
+Limitations:
+    Path coordinate system evaluates curves without gmsh (see CurveEvaluator),
+        but falls back to gmsh for curves that CurveEvaluator doesn't support
+        (e.g. with non-default kwargs), and this fallback isn't supported.
+
+Usage:
+    python -m gmsh_scripts input.yml --preflight --max_elements 1000000
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from gmsh_scripts.run import parse_arguments as parse_run_arguments
+from gmsh_scripts.run import init_walk, set_parent
+from gmsh_scripts.registry import reset as reset_registry
+from gmsh_scripts.registry import get_counts, DRY_FACTORY
+from gmsh_scripts.support.support import LoggingDecorator, GmshOptionsDecorator
+from gmsh_scripts.support.support import timeit
+from gmsh_scripts.factory import FACTORY
+
+HEXAHEDRON_TETRAHEDRA = [[0, 6, 1, 2], [0, 6, 2, 3], [0, 6, 3, 7],
+                         [0, 6, 7, 4], [0, 6, 4, 5], [0, 6, 5, 1]]
+"""Split of the block into tetrahedra around 0-6 diagonal (see Block)"""
+
+TETRAHEDRA_PER_NODE = 5.5
+"""Approximate ratio of tetrahedra to nodes in unstructured meshes"""
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Preflight estimation')
+    parser.add_argument('--preflight', action='store_true',
+                        help='preflight mode')
+    parser.add_argument('--max_elements', type=int, default=None,
+                        help='fail if estimated number of elements is greater')
+    parser.add_argument('--report_path', default=None,
+                        help='report JSON path (default: <output_path>-preflight.json)')
+    args = vars(parser.parse_known_args(argv)[0])
+    run_args = parse_run_arguments(argv)
+    run_args.update(args)
+    if run_args['report_path'] is None:
+        run_args['report_path'] = f'{run_args["output_path"]}-preflight.json'
+    return run_args
+
+
+def get_volume(block):
+    """Volume of the block by its corners
+
+    Args:
+        block (Block): transformed block
+
+    Returns:
+        float: volume
+    """
+    ps = np.array([x.coordinates for x in block.points])
+    if len(ps) != 8:
+        return 0.
+    v = 0.
+    for a, b, c, d in HEXAHEDRON_TETRAHEDRA:
+        v += np.dot(ps[b] - ps[a], np.cross(ps[c] - ps[a], ps[d] - ps[a])) / 6
+    return abs(v)
+
+
+def get_registered_children(block):
+    """Children that are registered, or grandchildren if a child is not
+
+    See Block.register_surfaces_loops
+    """
+    children = []
+    for c in block.children:
+        if c.do_register:
+            children.append(c)
+        else:
+            children.extend(x for x in c.children if x.do_register)
+    return children
+
+
+def get_nodes_by_directions(block):
+    """Numbers of nodes by X, Y and Z of the structured block
+
+    Returns:
+        list of int or None: numbers of nodes or None if block is not structured
+    """
+    if block.volumes_structures[0] is None:
+        return None
+    ss = block.curves_structures
+    ss = [ss[0], ss[4], ss[8]] if len(ss) == 12 else [ss[0], ss[0], ss[0]]
+    if any(x is None for x in ss):
+        return None
+    return [int(x.kwargs['nPoints']) for x in ss]
+
+
+def get_mesh_size(block, options):
+    """Mesh size of the block
+
+    Args:
+        block (Block): block
+        options (dict): gmsh options
+
+    Returns:
+        float or None: mesh size or None if it's not set
+    """
+    h = None
+    if options.get('Mesh.MeshSizeFromPoints', 1):
+        sizes = [x.kwargs.get('meshSize', 0.) for x in block.points]
+        sizes = [x for x in sizes if x is not None and x > 0]
+        if len(sizes) > 0:
+            h = sum(sizes) / len(sizes)
+    h_min = options.get('Mesh.MeshSizeMin', 0)
+    h_max = options.get('Mesh.MeshSizeMax', 1e22)
+    if h is None:
+        if h_max >= 1e22:
+            return None
+        h = h_max
+    h = min(max(h, h_min), h_max)
+    return h * options.get('Mesh.MeshSizeFactor', 1)
+
+
+def estimate(block, options):
+    """Estimate mesh of the transformed and registered Block tree
+
+    Args:
+        block (Block): top block
+        options (dict): gmsh options
+
+    Returns:
+        dict: structured and unstructured estimations
+    """
+    structured = {'blocks': 0, 'nodes': 0, 'cells': 0, 'elements': 0}
+    unstructured = {'blocks': 0, 'blocks_without_size': 0, 'volume': 0.,
+                    'nodes': 0, 'elements': 0}
+    n_blocks = 0
+    for b in block:
+        n_blocks += 1
+        if not b.do_register:
+            continue
+        children = get_registered_children(b)
+        ns = get_nodes_by_directions(b) if len(children) == 0 else None
+        if ns is not None:
+            nx, ny, nz = ns
+            cells = (nx - 1) * (ny - 1) * (nz - 1)
+            is_quadrated = b.surfaces_quadrates[0] is not None
+            structured['blocks'] += 1
+            structured['nodes'] += nx * ny * nz
+            structured['cells'] += cells
+            structured['elements'] += cells if is_quadrated else 6 * cells
+            continue
+        unstructured['blocks'] += 1
+        volume = get_volume(b) - sum(get_volume(x) for x in children)
+        volume = max(volume, 0.)
+        unstructured['volume'] += volume
+        h = get_mesh_size(b, options)
+        if h is None:
+            unstructured['blocks_without_size'] += 1
+            continue
+        elements = int(np.ceil(volume / (h ** 3 / (6 * np.sqrt(2)))))
+        unstructured['elements'] += elements
+        unstructured['nodes'] += int(np.ceil(elements / TETRAHEDRA_PER_NODE))
+    return {'blocks': n_blocks, 'structured': structured,
+            'unstructured': unstructured,
+            'nodes': structured['nodes'] + unstructured['nodes'],
+            'elements': structured['elements'] + unstructured['elements']}
+
+
+def preflight(args):
+    """Build Block tree and estimate model size without gmsh
+
+    Args:
+        args (dict): arguments (see parse_arguments)
+
+    Returns:
+        dict: report
+    """
+    t0 = time.perf_counter()
+    top_kwargs = args['data']
+    init_walk(top_kwargs)
+    top_kwargs['path'] = args['input_path']
+    top_block = FACTORY(top_kwargs)
+    set_parent(top_block)
+    reset_registry(factory=DRY_FACTORY)
+    timeit(top_block.transform)()
+    timeit(top_block.register)()
+    options = GmshOptionsDecorator(options=args['options']).options
+    report = {'input_path': str(Path(args['input_path']).resolve()),
+              'entities': get_counts(),
+              **estimate(top_block, options)}
+    report['time'] = time.perf_counter() - t0
+    return report
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+
+    @LoggingDecorator(filename=args['log_path'], level=args['log_level'])
+    def pipeline(args):
+        report = preflight(args)
+        logging.info(f'preflight: {report}')
+        return report
+
+    report = pipeline(args)
+    with open(args['report_path'], 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if args['max_elements'] is not None and report['elements'] > args['max_elements']:
+        print(f'Estimated number of elements {report["elements"]} '
+              f'is greater than {args["max_elements"]}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
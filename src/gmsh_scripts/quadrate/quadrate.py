@@ -1,9 +1,43 @@
 class Quadrate:
+    """Quadrate (recombination) of the surface or volume
+
+    Args:
+        name (str): type: surface or volume
+        kwargs (dict): arguments of the quadrate (e.g. angle)
+    """
+    __slots__ = ('name', 'kwargs')
+
     def __init__(self, name=None, **kwargs):
         self.name = name
         self.kwargs = kwargs
 
 
+QUADRATES = {}
+"""Interned quadrates by name and kwargs (see intern_quadrate)"""
+
+
+def intern_quadrate(name=None, **kwargs):
+    """Get shared Quadrate with the same name and kwargs
+
+    Interned quadrates are shared by many blocks and shouldn't be modified.
+
+    Args:
+        name (str): type: surface or volume
+        kwargs (dict): arguments of the quadrate with hashable values
+
+    Returns:
+        Quadrate: quadrate
+    """
+    key = (name, tuple(sorted(kwargs.items())))
+    try:
+        quadrate = QUADRATES.get(key, None)
+    except TypeError:  # Unhashable kwargs
+        return Quadrate(name=name, **kwargs)
+    if quadrate is None:
+        quadrate = QUADRATES.setdefault(key, Quadrate(name=name, **kwargs))
+    return quadrate
+
+
 class NoQuadrate:
     def __init__(self):
         pass
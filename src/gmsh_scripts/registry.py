@@ -1,12 +1,20 @@
-from collections import deque
-from itertools import permutations
+from itertools import product
+from functools import partial
 import copy
+import math
+import time
 
 import gmsh
+import numpy as np
 
 FACTORY = 'geo'
 POINT_TOL = 12
-POINTS = {}
+POINTS = {}  # Rounded coordinates bytes -> index of the point
+POINTS_COORDINATES = np.empty((0, 3))
+POINTS_TAGS = np.empty(0, dtype=int)
+POINTS_CELLS = {}
+POINT_CELL_FACTOR = 16
+MERGED_POINTS = 0
 CURVES = {}
 CURVES_LOOPS = {}
 SURFACES = {}
@@ -31,6 +39,7 @@ BOOLEAN_OLD2NEWS = {}
 VOLUME2BLOCK = {}
 USE_REGISTRY_TAG = True
 UNREGISTERED_VOLUMES = set()
+STATISTICS = None  # Entity kind -> counters and times, None if disabled
 
 POINT_KWARGS = {
     'geo': {'tag': -1, 'meshSize': 0.},
@@ -116,8 +125,18 @@ name2kwargs = {
 }
 
 
-def reset(factory='geo', point_tol=8):
+def reset(factory='geo', point_tol=8, statistics=False):
+    """Reset registry
+
+    Args:
+        factory (str): factory: geo, occ or dry
+        point_tol (int): number of digits of rounded coordinates of points
+        statistics (bool): collect registration statistics
+            (see get_statistics)
+    """
     global POINTS
+    global POINTS_COORDINATES
+    global POINTS_TAGS
     global CURVES
     global CURVES_LOOPS
     global SURFACES
@@ -138,13 +157,19 @@ def reset(factory='geo', point_tol=8):
     global SURFACE_QUADRATE
     global VOLUME_STRUCTURE
     global FACTORY
+    global KWARGS_BUILDERS
     global POINT_TOL
+    global POINTS_CELLS
+    global MERGED_POINTS
     global BOOLEAN_NEW2OLDS
     global BOOLEAN_OLD2NEWS
     global VOLUME2BLOCK
     global USE_REGISTRY_TAG
     global UNREGISTERED_VOLUMES
+    global STATISTICS
     POINTS = {}
+    POINTS_COORDINATES = np.empty((0, 3))
+    POINTS_TAGS = np.empty(0, dtype=int)
     CURVES = {}
     CURVES_LOOPS = {}
     SURFACES = {}
@@ -165,23 +190,40 @@ def reset(factory='geo', point_tol=8):
     SURFACE_QUADRATE = {}
     VOLUME_STRUCTURE = {}
     FACTORY = factory
+    KWARGS_BUILDERS = compile_kwargs_builders(factory)
     POINT_TOL = point_tol
+    POINTS_CELLS = {}
+    MERGED_POINTS = 0
     BOOLEAN_NEW2OLDS = {}
     BOOLEAN_OLD2NEWS = {}
     VOLUME2BLOCK = {}
     USE_REGISTRY_TAG = True
     UNREGISTERED_VOLUMES = set()
+    STATISTICS = {} if statistics else None
 
 
 def correct_kwargs(entity, name):
-    kwargs = {k: v for k, v in entity.__dict__.items() if not k.startswith('__')}
+    """Correct kwargs of the entity for the factory
+
+    Registration uses compiled builders (see compile_kwargs_builder).
+    This is their reference implementation for tests and benchmarks.
+
+    Args:
+        entity (object): entity with __slots__ and kwargs
+        name (str): kind of the entity, e.g. "curve" or "structure_curve"
+
+    Returns:
+        dict: slots of the entity with corrected kwargs
+    """
+    kwargs = {k: getattr(entity, k) for k in entity.__slots__}
     if name in ['curve', 'surface']:
         default_kwargs = name2kwargs[name][(FACTORY, entity.name)]
     else:
         default_kwargs = name2kwargs[name][FACTORY]
-    if 'kwargs' not in kwargs:
+    if kwargs.get('kwargs', None) is None:
         kwargs['kwargs'] = copy.deepcopy(default_kwargs)
     if name in ['structure_curve']:
+        kwargs['kwargs'] = dict(kwargs['kwargs'])  # Structures are shared
         if 'nPoints' in kwargs['kwargs'] and FACTORY == 'occ':
             kwargs['kwargs']['numNodes'] = kwargs['kwargs'].pop('nPoints')
         if isinstance(kwargs['kwargs']['meshType'], int):
@@ -343,41 +385,463 @@ add_structure_volume = {
 }
 
 
+DRY_FACTORY = 'dry'
+"""Factory without gmsh calls, entities get registry tags (see preflight)"""
+POINT_KWARGS[DRY_FACTORY] = POINT_KWARGS['geo']
+CURVE_LOOP_KWARGS[DRY_FACTORY] = CURVE_LOOP_KWARGS['geo']
+SURFACE_LOOP_KWARGS[DRY_FACTORY] = SURFACE_LOOP_KWARGS['geo']
+VOLUME_KWARGS[DRY_FACTORY] = VOLUME_KWARGS['geo']
+RECOMBINE_KWARGS[DRY_FACTORY] = RECOMBINE_KWARGS['geo']
+TRANSFINITE_CURVE_KWARGS[DRY_FACTORY] = TRANSFINITE_CURVE_KWARGS['geo']
+TRANSFINITE_SURFACE_KWARGS[DRY_FACTORY] = TRANSFINITE_SURFACE_KWARGS['geo']
+TRANSFINITE_VOLUME_KWARGS[DRY_FACTORY] = TRANSFINITE_VOLUME_KWARGS['geo']
+add_point[DRY_FACTORY] = lambda point: point['kwargs']['tag']
+add_curve_loop[DRY_FACTORY] = lambda curve_loop: curve_loop['kwargs']['tag']
+add_surface_loop[DRY_FACTORY] = lambda surface_loop: surface_loop['kwargs']['tag']
+add_volume[DRY_FACTORY] = lambda volume: volume['kwargs']['tag']
+add_quadrate[DRY_FACTORY] = lambda x: None
+add_structure_curve[DRY_FACTORY] = lambda x: None
+add_structure_surface[DRY_FACTORY] = lambda x: None
+add_structure_volume[DRY_FACTORY] = lambda x: None
+for (factory, name) in list(CURVE_KWARGS):
+    if factory == 'geo':
+        CURVE_KWARGS[(DRY_FACTORY, name)] = CURVE_KWARGS[(factory, name)]
+        add_curve[(DRY_FACTORY, name)] = lambda curve: curve['kwargs']['tag']
+for (factory, name) in list(SURFACE_KWARGS):
+    if factory == 'geo':
+        SURFACE_KWARGS[(DRY_FACTORY, name)] = SURFACE_KWARGS[(factory, name)]
+        add_surface[(DRY_FACTORY, name)] = lambda surface: surface['kwargs']['tag']
+
+SCRIPT_FACTORY = 'script'
+"""Factory without gmsh calls, entities are written to the .geo_unrolled
+script in the geo syntax (see start_script)"""
+SCRIPT = None  # Text stream of the script factory
+SCRIPT_CURVES = {
+    'line': ('Line', lambda ps: [ps[0], ps[-1]]),
+    'circle_arc': ('Circle', lambda ps: [ps[0], ps[1], ps[-1]]),
+    'ellipse_arc': ('Ellipse', lambda ps: [ps[0], ps[1], ps[2], ps[-1]]),
+    'spline': ('Spline', lambda ps: ps),
+    'bspline': ('BSpline', lambda ps: ps),
+    'bezier': ('Bezier', lambda ps: ps),
+    'polyline': ('Line', lambda ps: ps),  # Line with many points is polyline
+}
+"""Type of the curve -> geo keyword and points used by the curve"""
+
+
+def start_script(path):
+    """Open the script of the script factory
+
+    Args:
+        path (str): path of the .geo_unrolled file
+    """
+    global SCRIPT
+    SCRIPT = open(path, 'w')
+
+
+def stop_script():
+    """Close the script of the script factory"""
+    global SCRIPT
+    if SCRIPT is not None:
+        SCRIPT.close()
+    SCRIPT = None
+
+
+def format_numbers(xs):
+    """Format numbers of the script, floats are written exactly"""
+    return ', '.join(repr(x) if isinstance(x, int) else repr(float(x)) for x in xs)
+
+
+def write_point(point):
+    kwargs = point['kwargs']
+    xs = list(point['coordinates'])
+    if kwargs.get('meshSize', 0.) > 0:
+        xs.append(kwargs['meshSize'])
+    SCRIPT.write(f'Point({kwargs["tag"]}) = {{{format_numbers(xs)}}};\n')
+    return kwargs['tag']
+
+
+def write_curve(curve, name):
+    kwargs = curve['kwargs']
+    keyword, get_points = SCRIPT_CURVES[name]
+    ps = [x.tag for x in get_points(curve['points'])]
+    line = f'{keyword}({kwargs["tag"]}) = {{{format_numbers(ps)}}}'
+    normal = [kwargs.get(x, 0.) for x in ('nx', 'ny', 'nz')]
+    if any(x != 0 for x in normal):
+        line += f' Plane{{{format_numbers(normal)}}}'
+    SCRIPT.write(f'{line};\n')
+    return kwargs['tag']
+
+
+def write_curve_loop(curve_loop):
+    kwargs = curve_loop['kwargs']
+    SCRIPT.write(f'Curve Loop({kwargs["tag"]}) = '
+                 f'{{{format_numbers(curve_loop["curves_tags"])}}};\n')
+    return kwargs['tag']
+
+
+def write_surface(surface, name):
+    kwargs = surface['kwargs']
+    keyword = 'Plane Surface' if name == 'plane' else 'Surface'
+    loops = [x.tag for x in surface['curves_loops']]
+    line = f'{keyword}({kwargs["tag"]}) = {{{format_numbers(loops)}}}'
+    if kwargs.get('sphereCenterTag', -1) >= 0:
+        line += f' In Sphere {{{kwargs["sphereCenterTag"]}}}'
+    SCRIPT.write(f'{line};\n')
+    return kwargs['tag']
+
+
+def write_surface_loop(surface_loop):
+    kwargs = surface_loop['kwargs']
+    SCRIPT.write(f'Surface Loop({kwargs["tag"]}) = '
+                 f'{{{format_numbers(surface_loop["surfaces_tags"])}}};\n')
+    return kwargs['tag']
+
+
+def write_volume(volume):
+    kwargs = volume['kwargs']
+    loops = [x.tag for x in volume['surfaces_loops']]
+    SCRIPT.write(f'Volume({kwargs["tag"]}) = {{{format_numbers(loops)}}};\n')
+    return kwargs['tag']
+
+
+def write_quadrate(quadrate):
+    kwargs = quadrate['kwargs']
+    line = f'Recombine Surface {{{kwargs["tag"]}}}'
+    if kwargs.get('angle', 45.) != 45.:
+        line += f' = {format_numbers([kwargs["angle"]])}'
+    SCRIPT.write(f'{line};\n')
+
+
+def write_structure_curve(structure):
+    kwargs = structure['kwargs']
+    SCRIPT.write(f'Transfinite Curve {{{kwargs["tag"]}}} = '
+                 f'{kwargs.get("nPoints", 2)} Using '
+                 f'{kwargs.get("meshType", "Progression")} '
+                 f'{format_numbers([kwargs.get("coef", 1.)])};\n')
+
+
+def write_structure_surface(structure):
+    kwargs = structure['kwargs']
+    line = f'Transfinite Surface {{{kwargs["tag"]}}}'
+    if kwargs.get('cornerTags', None):
+        line += f' = {{{format_numbers(kwargs["cornerTags"])}}}'
+    if kwargs.get('arrangement', 'Left') != 'Left':
+        line += f' {kwargs["arrangement"]}'
+    SCRIPT.write(f'{line};\n')
+
+
+def write_structure_volume(structure):
+    kwargs = structure['kwargs']
+    line = f'Transfinite Volume {{{kwargs["tag"]}}}'
+    if kwargs.get('cornerTags', None):
+        line += f' = {{{format_numbers(kwargs["cornerTags"])}}}'
+    SCRIPT.write(f'{line};\n')
+
+
+POINT_KWARGS[SCRIPT_FACTORY] = POINT_KWARGS['geo']
+CURVE_LOOP_KWARGS[SCRIPT_FACTORY] = CURVE_LOOP_KWARGS['geo']
+SURFACE_LOOP_KWARGS[SCRIPT_FACTORY] = SURFACE_LOOP_KWARGS['geo']
+VOLUME_KWARGS[SCRIPT_FACTORY] = VOLUME_KWARGS['geo']
+RECOMBINE_KWARGS[SCRIPT_FACTORY] = RECOMBINE_KWARGS['geo']
+TRANSFINITE_CURVE_KWARGS[SCRIPT_FACTORY] = TRANSFINITE_CURVE_KWARGS['geo']
+TRANSFINITE_SURFACE_KWARGS[SCRIPT_FACTORY] = TRANSFINITE_SURFACE_KWARGS['geo']
+TRANSFINITE_VOLUME_KWARGS[SCRIPT_FACTORY] = TRANSFINITE_VOLUME_KWARGS['geo']
+add_point[SCRIPT_FACTORY] = write_point
+add_curve_loop[SCRIPT_FACTORY] = write_curve_loop
+add_surface_loop[SCRIPT_FACTORY] = write_surface_loop
+add_volume[SCRIPT_FACTORY] = write_volume
+add_quadrate[SCRIPT_FACTORY] = write_quadrate
+add_structure_curve[SCRIPT_FACTORY] = write_structure_curve
+add_structure_surface[SCRIPT_FACTORY] = write_structure_surface
+add_structure_volume[SCRIPT_FACTORY] = write_structure_volume
+for (factory, name) in list(CURVE_KWARGS):
+    if factory == 'geo':
+        CURVE_KWARGS[(SCRIPT_FACTORY, name)] = CURVE_KWARGS[(factory, name)]
+        add_curve[(SCRIPT_FACTORY, name)] = partial(write_curve, name=name)
+for (factory, name) in list(SURFACE_KWARGS):
+    if factory == 'geo':
+        SURFACE_KWARGS[(SCRIPT_FACTORY, name)] = SURFACE_KWARGS[(factory, name)]
+        add_surface[(SCRIPT_FACTORY, name)] = partial(write_surface, name=name)
+
+KWARGS_FIELDS = {
+    'point': ('coordinates',),
+    'curve': ('points',),
+    'surface': ('curves_loops',),
+    'volume': ('surfaces_loops',),
+}
+"""Fields of entities used by add_* functions besides kwargs"""
+
+
+def compile_kwargs_builder(name, factory, entity_name=None):
+    """Compile builder of arguments of the add_* function
+
+    Builder is an equivalent of correct_kwargs for the factory,
+    but it reads only fields used by the add_* function and filters kwargs
+    of the entity by precomputed keys, without copies of the entity dict
+    and default kwargs. Kwargs of the entity are not modified.
+
+    Args:
+        name (str): entity kind, key of name2kwargs
+        factory (str): factory
+        entity_name (str): type of the curve or surface
+
+    Returns:
+        callable: entity -> dict with fields and new "kwargs" dict
+    """
+    key = factory if entity_name is None else (factory, entity_name)
+    default_kwargs = name2kwargs[name][key]
+    keys = frozenset(default_kwargs)
+    fields = KWARGS_FIELDS.get(name, ())
+
+    def get_kwargs(entity):
+        kwargs = getattr(entity, 'kwargs', None)
+        if kwargs is None:
+            return dict(default_kwargs)
+        return {k: v for k, v in kwargs.items() if k in keys}
+
+    if name == 'structure_curve':
+        is_occ = factory == 'occ'
+
+        def build(entity):
+            kwargs = get_kwargs(entity)
+            if is_occ and 'nPoints' in entity.kwargs:
+                kwargs['numNodes'] = entity.kwargs['nPoints']
+            mesh_type = kwargs.get('meshType', None)
+            if isinstance(mesh_type, int):
+                kwargs['meshType'] = TRANSFINITE_CURVE_TYPES[mesh_type]
+            return {'kwargs': kwargs}
+    elif len(fields) == 0:
+        def build(entity):
+            return {'kwargs': get_kwargs(entity)}
+    else:
+        field, = fields
+
+        def build(entity):
+            return {field: getattr(entity, field), 'kwargs': get_kwargs(entity)}
+    return build
+
+
+def compile_kwargs_builders(factory):
+    """Compile builders of arguments of add_* functions for the factory
+
+    Args:
+        factory (str): factory
+
+    Returns:
+        dict: entity kind or (entity kind, type of the curve or surface)
+            -> builder (see compile_kwargs_builder)
+    """
+    builders = {}
+    for name, kwargs in name2kwargs.items():
+        for key in kwargs:
+            if isinstance(key, tuple):
+                if key[0] == factory:
+                    builders[(name, key[1])] = compile_kwargs_builder(
+                        name, factory, key[1])
+            elif key == factory:
+                builders[name] = compile_kwargs_builder(name, factory)
+    return builders
+
+
+KWARGS_BUILDERS = compile_kwargs_builders(FACTORY)
+"""Builders of arguments of add_* functions for the current factory"""
+
+
+def get_kind_statistics(kind):
+    s = STATISTICS.get(kind, None)
+    if s is None:
+        s = {'attempts': 0, 'hits': 0, 'new': 0, 'key_time': 0., 'gmsh_time': 0.}
+        STATISTICS[kind] = s
+    return s
+
+
+def count_registrations(kind, key_time, attempts=1, new=0):
+    """Update statistics of the entity kind
+
+    Args:
+        kind (str): entity kind
+        key_time (float): time of key building and lookup
+        attempts (int): number of registration attempts
+        new (int): number of new entities
+    """
+    s = get_kind_statistics(kind)
+    s['attempts'] += attempts
+    s['hits'] += attempts - new
+    s['new'] += new
+    s['key_time'] += key_time
+
+
+def call_add(kind, add, kwargs):
+    """Call add_* function and update gmsh time of the entity kind"""
+    if STATISTICS is None:
+        return add(kwargs)
+    t0 = time.perf_counter()
+    result = add(kwargs)
+    get_kind_statistics(kind)['gmsh_time'] += time.perf_counter() - t0
+    return result
+
+
+def get_statistics():
+    """Get registration statistics
+
+    Statistics are collected if registry was reset with statistics=True.
+
+    Returns:
+        dict or None: entity kind (and "total") -> numbers of registration
+            attempts, hits of registered entities, new entities and
+            cumulative times (seconds) of key building with lookup
+            and of gmsh calls, None if statistics are disabled
+    """
+    if STATISTICS is None:
+        return None
+    statistics = {k: dict(v) for k, v in STATISTICS.items()}
+    total = {'attempts': 0, 'hits': 0, 'new': 0, 'key_time': 0., 'gmsh_time': 0.}
+    for v in STATISTICS.values():
+        for k in total:
+            total[k] += v[k]
+    statistics['total'] = total
+    return statistics
+
+
+def find_point(coordinates):
+    """Find registered point within tolerance 10^-POINT_TOL by coordinates
+
+    Points are hashed into cubic cells of POINT_CELL_FACTOR tolerances,
+    neighbor cells are checked only if the point is near a cell face.
+
+    Args:
+        coordinates (tuple of float): not rounded coordinates
+
+    Returns:
+        int or None: index of the registered point
+    """
+    tol = 10 ** -POINT_TOL
+    size = POINT_CELL_FACTOR * tol
+    cell, offsets = [], []
+    for c in coordinates:
+        i = math.floor(c / size)
+        cell.append(i)
+        r = c - i * size
+        offsets.append([0] + ([-1] if r < tol else []) + ([1] if size - r < tol else []))
+    for delta in product(*offsets):
+        key = tuple(i + d for i, d in zip(cell, delta))
+        for other, index in POINTS_CELLS.get(key, []):
+            if all(abs(a - b) <= tol for a, b in zip(coordinates, other)):
+                return index
+    return None
+
+
+def add_point_to_cells(coordinates, index):
+    size = POINT_CELL_FACTOR * 10 ** -POINT_TOL
+    key = tuple(math.floor(c / size) for c in coordinates)
+    POINTS_CELLS.setdefault(key, []).append((coordinates, index))
+
+
+def register_points(points):
+    """Register points in batch
+
+    Coordinates are rounded to POINT_TOL digits and deduplicated
+    with NumPy, new points get tags in order of their first occurrence.
+    Near-duplicates are merged (see find_point). Coordinates of points
+    are replaced by coordinates of registered points.
+
+    Args:
+        points (list of Point): points
+
+    Returns:
+        list of Point: points with tags
+    """
+    global POINTS_COORDINATES
+    global POINTS_TAGS
+    global POINT_TAG
+    global MERGED_POINTS
+    if len(points) == 0:
+        return points
+    if STATISTICS is not None:
+        t0 = time.perf_counter()
+        gmsh_time = get_kind_statistics('point')['gmsh_time']
+    raw = np.array([x.coordinates for x in points], dtype=float)
+    rounded = np.round(raw, POINT_TOL) + 0.  # Without negative zeros
+    _, first, inverse = np.unique(rounded, axis=0, return_index=True,
+                                  return_inverse=True)
+    indices = np.empty(len(first), dtype=int)  # Unique -> registered
+    new_coordinates, new_tags = [], []
+    n_registered = len(POINTS_TAGS)
+    default_kwargs = POINT_KWARGS[FACTORY]
+    add = add_point[FACTORY]
+    for u in np.argsort(first).tolist():  # In order of first occurrence
+        i = first[u]
+        key = rounded[i].tobytes()
+        index = POINTS.get(key, None)
+        if index is None:
+            coordinates = tuple(raw[i].tolist())
+            index = find_point(coordinates)
+            if index is not None:  # Near-duplicate, e.g. rounded to the other side
+                MERGED_POINTS += 1
+                POINTS[key] = index  # Repeats are found by the key
+            else:
+                index = n_registered + len(new_tags)
+                kwargs = {k: v for k, v in points[i].kwargs.items()
+                          if k in default_kwargs}
+                if USE_REGISTRY_TAG:
+                    kwargs['tag'] = POINT_TAG
+                    POINT_TAG += 1
+                else:
+                    kwargs['tag'] = -1
+                c = rounded[i].tolist()
+                new_tags.append(call_add('point', add, {'coordinates': c, 'kwargs': kwargs}))
+                new_coordinates.append(c)
+                POINTS[key] = index
+                add_point_to_cells(coordinates, index)
+        indices[u] = index
+    if len(new_tags) > 0:
+        POINTS_COORDINATES = np.concatenate([POINTS_COORDINATES, new_coordinates])
+        POINTS_TAGS = np.concatenate([POINTS_TAGS, new_tags])
+    indices = indices[inverse.reshape(-1)]
+    coordinates = POINTS_COORDINATES[indices]
+    for p, c, t in zip(points, coordinates, POINTS_TAGS[indices].tolist()):
+        # Not in place: pooled points share coordinates, see transform_leaves
+        p.coordinates = c
+        p.tag = t
+    if STATISTICS is not None:
+        gmsh_time = get_kind_statistics('point')['gmsh_time'] - gmsh_time
+        count_registrations('point', time.perf_counter() - t0 - gmsh_time,
+                            len(points), len(new_tags))
+    return points
+
+
 def register_point(point):
-    for i, c in enumerate(point.coordinates):
-        point.coordinates[i] = round(c, POINT_TOL)
-    key = tuple(point.coordinates)
-    tag = POINTS.get(key, None)
-    if tag is None:
-        point_kwargs = correct_kwargs(point, 'point')
-        if USE_REGISTRY_TAG:
-            global POINT_TAG
-            point_kwargs['kwargs']['tag'] = POINT_TAG
-            tag = add_point[FACTORY](point_kwargs)
-            POINT_TAG += 1
-        else:
-            point_kwargs['kwargs']['tag'] = -1
-            tag = add_point[FACTORY](point_kwargs)
-        POINTS[key] = tag
-    point.tag = tag
-    return point
+    return register_points([point])[0]
+
+
+def get_points():
+    """Get registered points
+
+    Returns:
+        tuple: coordinates (np.ndarray of shape (N, 3))
+            and tags (np.ndarray of shape (N,)), don't modify them
+    """
+    return POINTS_COORDINATES, POINTS_TAGS
 
 
 def register_curve(curve):
+    t0 = time.perf_counter() if STATISTICS is not None else None
     name = curve.name
     ps = [x.tag for x in curve.points]
     key = tuple([name] + ps)
     tag = CURVES.get(key, None)
+    if t0 is not None:
+        count_registrations('curve', time.perf_counter() - t0, new=int(tag is None))
     if tag is None:
-        curve_kwargs = correct_kwargs(curve, 'curve')
+        curve_kwargs = KWARGS_BUILDERS[('curve', name)](curve)
         if USE_REGISTRY_TAG:
             global CURVE_TAG
             curve_kwargs['kwargs']['tag'] = CURVE_TAG
-            tag = add_curve[(FACTORY, name)](curve_kwargs)
+            tag = call_add('curve', add_curve[(FACTORY, name)], curve_kwargs)
             CURVE_TAG += 1
         else:
             curve_kwargs['kwargs']['tag'] = -1
-            tag = add_curve[(FACTORY, name)](curve_kwargs)
+            tag = call_add('curve', add_curve[(FACTORY, name)], curve_kwargs)
         CURVES[key] = tag
         rev_key = tuple([name] + list(reversed(ps)))
         CURVES[rev_key] = -tag
@@ -385,51 +849,71 @@ def register_curve(curve):
     return curve
 
 
+def get_curve_loop_key(curves):
+    """Canonical key of the curve loop
+
+    Loops that differ by rotation or orientation get the same key:
+    the rotation that starts with the minimum absolute curve tag
+    with positive sign.
+
+    Args:
+        curves (list of int): signed tags of curves
+
+    Returns:
+        tuple: key (tuple of int) and orientation of the loop relative to
+            the key (1 or -1)
+    """
+    m = min(abs(x) for x in curves)
+    reverse = [-x for x in reversed(curves)]
+    candidates = []
+    for sign, cs in ((1, curves), (-1, reverse)):
+        for i, c in enumerate(cs):
+            if c == m:
+                candidates.append((tuple(cs[i:] + cs[:i]), sign))
+    return min(candidates)
+
+
 def register_curve_loop(curve_loop):
+    t0 = time.perf_counter() if STATISTICS is not None else None
     curves = [x.tag * y for (x, y) in zip(curve_loop.curves,
                                           curve_loop.curves_signs)]
-    deq = deque(curves)
-    keys = []
-    for _ in range(len(deq)):
-        deq.rotate(1)
-        keys.append(tuple(deq))
-    deq = deque([-1 * x for x in reversed(curves)])
-    for _ in range(len(deq)):
-        deq.rotate(1)
-        keys.append(tuple(deq))
-    tag = None
-    for k in keys:
-        tag = CURVES_LOOPS.get(k, None)
-        if tag is not None:
-            break
+    # Loop of any orientation gets the tag of the first registered loop
+    key, _ = get_curve_loop_key(curves)
+    tag = CURVES_LOOPS.get(key, None)
+    if t0 is not None:
+        count_registrations('curve_loop', time.perf_counter() - t0,
+                            new=int(tag is None))
     if tag is None:
-        curve_loop_kwargs = correct_kwargs(curve_loop, 'curve_loop')
+        curve_loop_kwargs = KWARGS_BUILDERS['curve_loop'](curve_loop)
         curve_loop_kwargs['curves_tags'] = curves
         if USE_REGISTRY_TAG:
             global CURVE_LOOP_TAG
             curve_loop_kwargs['kwargs']['tag'] = CURVE_LOOP_TAG
-            tag = add_curve_loop[FACTORY](curve_loop_kwargs)
+            tag = call_add('curve_loop', add_curve_loop[FACTORY], curve_loop_kwargs)
             CURVE_LOOP_TAG += 1
         else:
             curve_loop_kwargs['kwargs']['tag'] = -1
-            tag = add_curve_loop[FACTORY](curve_loop_kwargs)
-        for k in keys:
-            CURVES_LOOPS[k] = tag
+            tag = call_add('curve_loop', add_curve_loop[FACTORY], curve_loop_kwargs)
+        CURVES_LOOPS[key] = tag
     curve_loop.tag = tag
     return curve_loop
 
 
 def register_surface(surface):
+    t0 = time.perf_counter() if STATISTICS is not None else None
     name = surface.name
     key = tuple(x.tag for x in surface.curves_loops)
     tag = SURFACES.get(key, None)
+    if t0 is not None:
+        count_registrations('surface', time.perf_counter() - t0,
+                            new=int(tag is None))
     if tag is None:
-        surface_kwargs = correct_kwargs(surface, 'surface')
+        surface_kwargs = KWARGS_BUILDERS[('surface', name)](surface)
         if USE_REGISTRY_TAG:
             global SURFACE_TAG
             surface_kwargs['kwargs']['tag'] = SURFACE_TAG
             # t0 = time.perf_counter()  # FIXME Too long in occ factory!
-            tag = add_surface[(FACTORY, name)](surface_kwargs)
+            tag = call_add('surface', add_surface[(FACTORY, name)], surface_kwargs)
             # print(time.perf_counter() - t0)
             SURFACE_TAG += 1
             # FIXME Workaround occ auto increment curve loop and surface tags
@@ -439,46 +923,69 @@ def register_surface(surface):
         else:
             surface_kwargs['kwargs']['tag'] = -1
             # t0 = time.perf_counter()  # FIXME Too long in occ factory!
-            tag = add_surface[(FACTORY, name)](surface_kwargs)
+            tag = call_add('surface', add_surface[(FACTORY, name)], surface_kwargs)
             # print(time.perf_counter() - t0)
         SURFACES[key] = tag
     surface.tag = tag
     return surface
 
 
+def get_surface_loop_key(surfaces):
+    """Canonical key of the surface loop: sorted tags of surfaces
+
+    Args:
+        surfaces (list of int): tags of surfaces
+
+    Returns:
+        tuple of int: key
+    """
+    return tuple(sorted(surfaces))
+
+
 def register_surface_loop(surface_loop):
-    key = tuple(x.tag for x in surface_loop.surfaces)  # TODO use deque? 12x more keys
+    t0 = time.perf_counter() if STATISTICS is not None else None
+    surfaces = [x.tag for x in surface_loop.surfaces]
+    key = get_surface_loop_key(surfaces)
     tag = SURFACES_LOOPS.get(key, None)
+    if t0 is not None:
+        count_registrations('surface_loop', time.perf_counter() - t0,
+                            new=int(tag is None))
     if tag is None:
-        surface_loop_kwargs = correct_kwargs(surface_loop, 'surface_loop')
-        surface_loop_kwargs['surfaces_tags'] = key
+        surface_loop_kwargs = KWARGS_BUILDERS['surface_loop'](surface_loop)
+        surface_loop_kwargs['surfaces_tags'] = surfaces  # Original order
         # FIXME Workaround of occ returns only -1 tag
         if USE_REGISTRY_TAG or FACTORY == 'occ':
             global SURFACE_LOOP_TAG
             surface_loop_kwargs['kwargs']['tag'] = SURFACE_LOOP_TAG
-            tag = add_surface_loop[FACTORY](surface_loop_kwargs)
+            tag = call_add('surface_loop', add_surface_loop[FACTORY],
+                           surface_loop_kwargs)
             SURFACE_LOOP_TAG += 1
         else:
             surface_loop_kwargs['kwargs']['tag'] = -1
-            tag = add_surface_loop[FACTORY](surface_loop_kwargs)
+            tag = call_add('surface_loop', add_surface_loop[FACTORY],
+                           surface_loop_kwargs)
         SURFACES_LOOPS[key] = tag
     surface_loop.tag = tag
     return surface_loop
 
 
 def register_volume(volume):
+    t0 = time.perf_counter() if STATISTICS is not None else None
     key = tuple(x.tag for x in volume.surfaces_loops)
     tag = VOLUMES.get(key, None)
+    if t0 is not None:
+        count_registrations('volume', time.perf_counter() - t0,
+                            new=int(tag is None))
     if tag is None:
-        volume_kwargs = correct_kwargs(volume, 'volume')
+        volume_kwargs = KWARGS_BUILDERS['volume'](volume)
         if USE_REGISTRY_TAG:
             global VOLUME_TAG
             volume_kwargs['kwargs']['tag'] = VOLUME_TAG
-            tag = add_volume[FACTORY](volume_kwargs)
+            tag = call_add('volume', add_volume[FACTORY], volume_kwargs)
             VOLUME_TAG += 1
         else:
             volume_kwargs['kwargs']['tag'] = -1
-            tag = add_volume[FACTORY](volume_kwargs)
+            tag = call_add('volume', add_volume[FACTORY], volume_kwargs)
         VOLUMES[key] = tag
     volume.tag = tag
     return volume
@@ -487,12 +994,16 @@ def register_volume(volume):
 def register_quadrate_surface(surface):
     if surface.quadrate is None:
         return surface
+    t0 = time.perf_counter() if STATISTICS is not None else None
     tag = surface.tag
-    if tag not in QUADRATED_SURFACES:
-        rec = correct_kwargs(surface.quadrate, 'quadrate')
+    is_new = tag not in QUADRATED_SURFACES
+    if t0 is not None:
+        count_registrations('quadrate', time.perf_counter() - t0, new=int(is_new))
+    if is_new:
+        rec = KWARGS_BUILDERS['quadrate'](surface.quadrate)
         rec['kwargs']['dim'] = 2
         rec['kwargs']['tag'] = tag
-        add_quadrate[FACTORY](rec)
+        call_add('quadrate', add_quadrate[FACTORY], rec)
         QUADRATED_SURFACES.add(tag)
     return surface
 
@@ -500,11 +1011,15 @@ def register_quadrate_surface(surface):
 def register_structure_curve(curve):
     if curve.structure is None:
         return curve
+    t0 = time.perf_counter() if STATISTICS is not None else None
     tag = curve.tag
-    if tag not in STRUCTURED_CURVES:
-        tr = correct_kwargs(curve.structure, 'structure_curve')
+    is_new = tag not in STRUCTURED_CURVES
+    if t0 is not None:
+        count_registrations('structure_curve', time.perf_counter() - t0, new=int(is_new))
+    if is_new:
+        tr = KWARGS_BUILDERS['structure_curve'](curve.structure)
         tr['kwargs']['tag'] = tag
-        add_structure_curve[FACTORY](tr)
+        call_add('structure_curve', add_structure_curve[FACTORY], tr)
         STRUCTURED_CURVES.add(tag)
     return curve
 
@@ -512,11 +1027,15 @@ def register_structure_curve(curve):
 def register_structure_surface(surface):
     if surface.structure is None:
         return surface
+    t0 = time.perf_counter() if STATISTICS is not None else None
     tag = surface.tag
-    if tag not in STRUCTURED_SURFACES:
-        tr = correct_kwargs(surface.structure, 'structure_surface')
+    is_new = tag not in STRUCTURED_SURFACES
+    if t0 is not None:
+        count_registrations('structure_surface', time.perf_counter() - t0, new=int(is_new))
+    if is_new:
+        tr = KWARGS_BUILDERS['structure_surface'](surface.structure)
         tr['kwargs']['tag'] = tag
-        add_structure_surface[FACTORY](tr)
+        call_add('structure_surface', add_structure_surface[FACTORY], tr)
         STRUCTURED_SURFACES.add(tag)
     return surface
 
@@ -524,11 +1043,15 @@ def register_structure_surface(surface):
 def register_structure_volume(volume):
     if volume.structure is None:
         return volume
+    t0 = time.perf_counter() if STATISTICS is not None else None
     tag = volume.tag
-    if tag not in STRUCTURED_VOLUMES:
-        tr = correct_kwargs(volume.structure, 'structure_volume')
+    is_new = tag not in STRUCTURED_VOLUMES
+    if t0 is not None:
+        count_registrations('structure_volume', time.perf_counter() - t0, new=int(is_new))
+    if is_new:
+        tr = KWARGS_BUILDERS['structure_volume'](volume.structure)
         tr['kwargs']['tag'] = tag
-        add_structure_volume[FACTORY](tr)
+        call_add('structure_volume', add_structure_volume[FACTORY], tr)
         STRUCTURED_VOLUMES.add(tag)
     return volume
 
@@ -541,6 +1064,13 @@ def pre_unregister_volume(volume):
 
 
 def unregister_volumes():
+    if FACTORY == DRY_FACTORY:
+        return
+    elif FACTORY == SCRIPT_FACTORY:
+        if len(UNREGISTERED_VOLUMES) > 0:
+            tags = format_numbers(sorted(UNREGISTERED_VOLUMES))
+            SCRIPT.write(f'Recursive Delete {{\n  Volume{{{tags}}};\n}}\n')
+        return
     gmsh.model.removeEntities([(3, x) for x in UNREGISTERED_VOLUMES],
                               recursive=True)
 
@@ -549,26 +1079,36 @@ def get_unregistered_volumes():
     return UNREGISTERED_VOLUMES
 
 
+def get_points_key(points):
+    """Order independent key of points by rounded coordinates
+
+    Args:
+        points (list of Point or list of list of float): points or coordinates
+
+    Returns:
+        tuple of tuple of float: sorted rounded coordinates
+    """
+    cs = np.array([getattr(x, 'coordinates', x) for x in points], dtype=float)
+    cs = np.round(cs, POINT_TOL) + 0.  # Without negative zeros
+    return tuple(sorted(map(tuple, cs.tolist())))
+
+
 def register_curve_structure(points, structure):
-    # TODO Using only first and last points
-    # key = tuple(y for x in points for y in x.coordinates)
-    key = tuple(y for x in [points[0], points[-1]] for y in x.coordinates)
-    # CURVE_STRUCTURE.setdefault(key, structure)
+    """Register structure of the curve by its start and end points
+
+    Args:
+        points (list of Point or list of list of float): points of the curve
+        structure (Structure): structure
+    """
+    key = get_points_key([points[0], points[-1]])
     CURVE_STRUCTURE.setdefault(key, structure)
 
 
 def register_surface_structure(points, structure):
+    """Register structure of the surface by its 4 corner points"""
     if len(points) != 4:
         return
-    key = tuple(y for x in points for y in x.coordinates)
-    SURFACE_STRUCTURE.setdefault(key, structure)
-
-
-# def register_volume_structure(points, structure):
-#     if len(points) != 8:
-#         return
-#     key = tuple(y for x in points for y in x.coordinates)
-#     VOLUME_STRUCTURE.setdefault(key, structure)
+    SURFACE_STRUCTURE.setdefault(get_points_key(points), structure)
 
 
 def register_volume_structure(tag, structure):
@@ -576,45 +1116,29 @@ def register_volume_structure(tag, structure):
 
 
 def register_surface_quadrate(points, quadrate):
+    """Register quadrate of the surface by its 4 corner points"""
     if len(points) != 4:
         return
-    key = tuple(y for x in points for y in x.coordinates)
-    SURFACE_QUADRATE.setdefault(key, quadrate)
+    SURFACE_QUADRATE.setdefault(get_points_key(points), quadrate)
 
 
 def get_curve_structure(points):
-    # TODO Using only first and last points
-    # p = deque(points)
-    p = deque([points[0], points[1]])
-    for _ in range(len(p)):
-        key = tuple(y for x in p for y in x.coordinates)
-        structure = CURVE_STRUCTURE.get(key, None)
-        if structure is not None:
-            return structure
-        p.rotate(1)
-    return None
+    """Get structure of the curve by its start and end points in any order
+
+    Args:
+        points (list of Point or list of list of float): points of the curve
+
+    Returns:
+        Structure or None: structure
+    """
+    return CURVE_STRUCTURE.get(get_points_key([points[0], points[-1]]), None)
 
 
 def get_surface_structure(points):
+    """Get structure of the surface by its 4 corner points in any order"""
     if len(points) != 4:
         return None
-    for p in permutations(points):
-        key = tuple(y for x in p for y in x.coordinates)
-        structure = SURFACE_STRUCTURE.get(key, None)
-        if structure is not None:
-            return structure
-    return None
-
-
-# def get_volume_structure(points):
-#     if len(points) != 8:
-#         return None
-#     for p in permutations(points):
-#         key = tuple(y for x in p for y in x.coordinates)
-#         structure = VOLUME_STRUCTURE.get(key, None)
-#         if structure is not None:
-#             return structure
-#     return None
+    return SURFACE_STRUCTURE.get(get_points_key(points), None)
 
 
 def get_volume_structure(tag):
@@ -622,14 +1146,10 @@ def get_volume_structure(tag):
 
 
 def get_surface_quadrate(points):
+    """Get quadrate of the surface by its 4 corner points in any order"""
     if len(points) != 4:
         return None
-    for p in permutations(points):
-        key = tuple(y for x in p for y in x.coordinates)
-        structure = SURFACE_QUADRATE.get(key, None)
-        if structure is not None:
-            return structure
-    return None
+    return SURFACE_QUADRATE.get(get_points_key(points), None)
 
 
 def register_boolean_new2olds(m):
@@ -663,5 +1183,110 @@ def synchronize():
         gmsh.model.geo.synchronize()
     elif FACTORY == 'occ':
         gmsh.model.occ.synchronize()
+    elif FACTORY in [DRY_FACTORY, SCRIPT_FACTORY]:
+        pass
     else:
         raise ValueError(FACTORY)
+
+
+STATE_NAMES = [
+    'FACTORY', 'POINT_TOL', 'POINTS', 'POINTS_COORDINATES', 'POINTS_TAGS',
+    'POINTS_CELLS', 'MERGED_POINTS', 'CURVES', 'CURVES_LOOPS', 'SURFACES',
+    'SURFACES_LOOPS', 'VOLUMES', 'POINT_TAG', 'CURVE_TAG', 'CURVE_LOOP_TAG',
+    'SURFACE_TAG', 'SURFACE_LOOP_TAG', 'VOLUME_TAG', 'QUADRATED_SURFACES',
+    'STRUCTURED_CURVES', 'STRUCTURED_SURFACES', 'STRUCTURED_VOLUMES',
+    'CURVE_STRUCTURE', 'SURFACE_STRUCTURE', 'VOLUME_STRUCTURE',
+    'SURFACE_QUADRATE', 'BOOLEAN_NEW2OLDS', 'BOOLEAN_OLD2NEWS',
+    'VOLUME2BLOCK', 'USE_REGISTRY_TAG', 'UNREGISTERED_VOLUMES', 'STATISTICS']
+"""Module globals that are the state of the registry"""
+
+
+class Registry:
+    """State of the registry
+
+    Copy of the module globals (see STATE_NAMES), that could be pickled
+    and set back with set_state, e.g. in another process. Dicts of points
+    are not pickled, they are rebuilt from arrays of coordinates and tags
+    (keys of merged near-duplicates are kept).
+
+    Attributes:
+        state (dict): names of globals -> values
+    """
+    def __init__(self):
+        g = globals()
+        self.state = copy_state({k: g[k] for k in STATE_NAMES})
+
+    def __getstate__(self):
+        state = {k: v for k, v in self.state.items()
+                 if k not in ['POINTS', 'POINTS_CELLS']}
+        # Not rounded coordinates of the first occurrences of points
+        raw = np.empty_like(state['POINTS_COORDINATES'])
+        for cell in self.state['POINTS_CELLS'].values():
+            for coordinates, index in cell:
+                raw[index] = coordinates
+        state['POINTS_RAW'] = raw
+        # Keys of merged near-duplicates
+        coordinates = self.state['POINTS_COORDINATES']
+        state['POINTS_MERGED'] = {k: v for k, v in self.state['POINTS'].items()
+                                  if k != coordinates[v].tobytes()}
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        raw = state.pop('POINTS_RAW')
+        state['POINTS'] = {x.tobytes(): i for i, x in
+                           enumerate(state['POINTS_COORDINATES'])}
+        state['POINTS'].update(state.pop('POINTS_MERGED'))
+        size = POINT_CELL_FACTOR * 10 ** -state['POINT_TOL']
+        cells = {}
+        for i, coordinates in enumerate(raw.tolist()):
+            key = tuple(math.floor(c / size) for c in coordinates)
+            cells.setdefault(key, []).append((tuple(coordinates), i))
+        state['POINTS_CELLS'] = cells
+        self.state = state
+
+
+def copy_state(state):
+    """Copy containers of the state, but not entities, structures and blocks"""
+    state = {k: copy.copy(v) for k, v in state.items()}
+    state['POINTS_CELLS'] = {k: list(v) for k, v in state['POINTS_CELLS'].items()}
+    if state['STATISTICS'] is not None:
+        state['STATISTICS'] = {k: dict(v) for k, v in state['STATISTICS'].items()}
+    return state
+
+
+def get_state():
+    """Get snapshot of the registry state
+
+    Returns:
+        Registry: state
+    """
+    return Registry()
+
+
+def set_state(registry):
+    """Set the registry state from the snapshot
+
+    Args:
+        registry (Registry): state
+    """
+    global KWARGS_BUILDERS
+    globals().update(copy_state(registry.state))
+    KWARGS_BUILDERS = compile_kwargs_builders(FACTORY)
+
+
+def get_factory():
+    return FACTORY
+
+
+def get_counts():
+    """Get numbers of registered entities
+
+    Returns:
+        dict: numbers of points, curves, curves loops, surfaces,
+            surfaces loops, volumes and merged near-duplicate points
+    """
+    return {'points': POINT_TAG - 1, 'curves': CURVE_TAG - 1,
+            'curves_loops': CURVE_LOOP_TAG - 1, 'surfaces': SURFACE_TAG - 1,
+            'surfaces_loops': SURFACE_LOOP_TAG - 1, 'volumes': VOLUME_TAG - 1,
+            'merged_points': MERGED_POINTS}
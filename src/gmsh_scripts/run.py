@@ -4,105 +4,118 @@ import argparse
 import logging
 from pathlib import Path
 
-from gmsh_scripts.load import load
+from gmsh_scripts.load import load, load_include, get_includes_statistics
 from gmsh_scripts.support.support import LoggingDecorator, GmshDecorator, GmshOptionsDecorator
+from gmsh_scripts.support.support import timeit
+from gmsh_scripts.registry import reset as reset_registry
+from gmsh_scripts.cache import make_key, load_block, dump_block
 from gmsh_scripts.factory import FACTORY as FACTORY
-from gmsh_scripts.factory import FactoryKeyError, FactoryValueError
-
-
-def init_walk(obj, prev_obj=None, prev_indices=None, prev_keys=None):
-    prev_indices = [[]] if prev_indices is None else prev_indices
-    prev_keys = [] if prev_keys is None else prev_keys
-    if isinstance(obj, dict):
-        # Update object from previous object children fields
-        if prev_obj is not None:
-            for k, v in prev_obj.items():
-                prev_index = prev_indices[-1]
-                if all([k.startswith('children_'),
-                        k != 'children_transforms',
-                        prev_keys[-1] == 'children']):
-                    obj_k = k[9:]
-                    obj_v = v[prev_index[0]]
-                    if obj_v is not None:
-                        obj[obj_k] = obj_v
-                elif all([k.startswith('items_children_'),
-                          k != 'items_children_map',
-                          k != 'items_children_transforms',
-                          k != 'items_children_transforms_map',
-                          prev_keys[-1] == 'items_children']):
-                    prev_index = prev_indices[-1]
-                    obj_k = k[15:]
-                    obj_v = v[prev_index[0]][prev_index[1]]
-                    if obj_v is not None:
-                        obj[obj_k] = obj_v
-        # Walk
-        for k, v in obj.items():
-            if k == 'class':
-                continue
-            if isinstance(v, dict):
-                prev_keys.append(k)
-                init_walk(v, obj, prev_indices, prev_keys)
-                prev_keys.append(k)
-            elif isinstance(v, list):
-                prev_keys.append(k)
-                init_walk(v, obj, prev_indices, prev_keys)
-                prev_keys.append(k)
-            elif isinstance(v, str) and v.startswith('/'):
+
+
+CHILDREN_FIELDS = {
+    'children': ('children_', 1, {'children_transforms'}),
+    'items_children': ('items_children_', 2, {
+        'items_children_map',
+        'items_children_transforms',
+        'items_children_transforms_map'}),
+}
+"""Children lists keys: (prefix of parent fields propagated to children,
+number of indices of children in the list, fields kept by parent)"""
+
+
+def pop_children_fields(obj):
+    """Pop parent fields that should be propagated to children
+
+    Args:
+        obj (dict): parent
+
+    Returns:
+        dict: children list key -> list of (child field name, values)
+    """
+    fields = {}
+    for k in list(obj):
+        for key, (prefix, _, kept) in CHILDREN_FIELDS.items():
+            if k.startswith(prefix) and k not in kept:
+                fields.setdefault(key, []).append((k[len(prefix):], obj.pop(k)))
+    return fields
+
+
+def set_children_fields(obj, fields, index):
+    """Set parent fields to the child
+
+    Args:
+        obj (dict): child
+        fields (tuple): parent key of the list with the child
+            and list of (child field name, values)
+        index (tuple of int): index of the child in the list
+    """
+    key, fields = fields
+    n = CHILDREN_FIELDS[key][1]
+    if len(index) < n:
+        return
+    for k, v in fields:
+        for i in index[:n]:
+            v = v[i]
+        if v is not None:
+            obj[k] = v
+
+
+def init_walk(obj):
+    """Construct objects from the input data in place
+
+    Objects are dicts with "class" key, lists with a key as the first item
+    and strings that are keys of the FACTORY. Strings that start with "/" are
+    paths to include files. Nested objects are constructed first.
+    Fields "children_*" and "items_children_*" are propagated from a parent to
+    its "children" and "items_children" respectively.
+
+    Traversal uses an explicit stack, so nesting depth is not limited
+    by the recursion limit.
+
+    Args:
+        obj (dict or list): input data
+    """
+    visit, build = True, False
+    # (action, node, container, key, children fields, index, include path)
+    stack = [(visit, obj, None, None, None, (), None)]
+    while stack:
+        action, node, container, key, fields, index, path = stack.pop()
+        if action is build:
+            if path is not None:
+                node['path'] = path
+            if container is not None and FACTORY.is_constructible(node):
+                container[key] = FACTORY(node)
+            continue
+        stack.append((build, node, container, key, None, None, path))
+        is_dict = isinstance(node, dict)
+        if is_dict:
+            if fields is not None:
+                set_children_fields(node, fields, index)
+            children_fields = pop_children_fields(node)
+            keys = [k for k in node if k != 'class']
+        else:  # list
+            keys = range(len(node))
+        for k in reversed(keys):
+            v = node[k]
+            if isinstance(v, str):
+                if not v.startswith('/'):
+                    if FACTORY.is_constructible(v):
+                        stack.append((build, v, node, k, None, None, None))
+                    continue
                 p = Path(v[1:]).resolve()
-                v = load(p)['data']
-                prev_keys.append(k)
-                init_walk(v, obj, prev_indices, prev_keys)
-                prev_keys.append(k)
-                v['path'] = str(p)
-            try:
-                obj[k] = FACTORY(v)
-            except FactoryValueError:
-                pass
-            except FactoryKeyError:
-                pass
-        # Remove children fields
-        if obj is not None:
-            for k in list(obj.keys()):
-                if k.startswith('children_') and k != 'children_transforms':
-                    obj.pop(k)
-                if all([k.startswith('items_children_'),
-                        k != 'items_children_map',
-                        k != 'items_children_transforms',
-                        k != 'items_children_transforms_map']):
-                    obj.pop(k)
-    elif isinstance(obj, list):
-        prev_index = prev_indices[-1]
-        for i, x in enumerate(obj):
-            cur_index = prev_index + [i]
-            if isinstance(x, dict):
-                prev_indices.append(cur_index)
-                prev_key = None if len(prev_keys) == 0 else prev_keys[-1]
-                init_walk(x, prev_obj, prev_indices, prev_keys)
-                if prev_key is not None:
-                    prev_keys.append(prev_key)
-                prev_indices.append(cur_index)
-            elif isinstance(x, list):
-                prev_indices.append(cur_index)
-                init_walk(x, prev_obj, prev_indices, prev_keys)
-                prev_indices.append(cur_index)
-            elif isinstance(x, str) and x.startswith('/'):
-                p = Path(x[1:]).resolve()
-                x = load(p)['data']
-                prev_indices.append(cur_index)
-                prev_key = None if len(prev_keys) == 0 else prev_keys[-1]
-                init_walk(x, prev_obj, prev_indices, prev_keys)
-                if prev_key is not None:
-                    prev_keys.append(prev_key)
-                prev_indices.append(cur_index)
-                x['path'] = str(p)
-            try:
-                obj[i] = FACTORY(x)
-            except FactoryValueError:
-                pass
-            except FactoryKeyError:
-                pass
-        if len(prev_index) == 0:  # End of the list
-            prev_indices.append([])
+                v = load_include(p)['data']
+                node[k] = v
+                path = str(p)
+            elif isinstance(v, (dict, list)):
+                path = None
+            else:  # Numbers, booleans and None
+                continue
+            if is_dict:
+                v_fields = children_fields.get(k)
+                v_fields = None if v_fields is None else (k, v_fields)
+                stack.append((visit, v, node, k, v_fields, (), path))
+            else:  # Children fields pass through lists
+                stack.append((visit, v, node, k, fields, index + (k,), path))
 
 
 def set_parent(parent):
@@ -112,7 +125,16 @@ def set_parent(parent):
         set_parent(child)  # now child is a new parent
 
 
-def parse_arguments():
+def parse_arguments(argv=None, data=None):
+    """Parse command line arguments and input file metadata
+
+    Args:
+        argv (list of str): command line arguments, if None use sys.argv
+        data (dict): data of the input file, if None load it from input path
+
+    Returns:
+        dict: arguments
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument('input_path', help='input path')
     parser.add_argument('-o', '--output_path',
@@ -134,14 +156,23 @@ def parse_arguments():
     parser.add_argument('-g', '--factory', help='gmsh factory',
                         default=argparse.SUPPRESS, choices=['geo', 'occ'])
     parser.add_argument('-s', '--strategy', default=argparse.SUPPRESS,
-                        choices=[x for x in FACTORY.str2obj
-                                 if isinstance(x, str)
-                                 and x.split('.')[0] == 'strategy'])
-    cmd_args = vars(parser.parse_known_args()[0])
+                        choices=FACTORY.keys('strategy'))
+    parser.add_argument('-c', '--cache', help='cache transformed blocks',
+                        action='store_true', default=argparse.SUPPRESS)
+    parser.add_argument('--cache_dir', help='cache directory',
+                        default=argparse.SUPPRESS)
+    parser.add_argument('--registry_statistics', action='store_true',
+                        help='write registry statistics to <output_path>-registry.json',
+                        default=argparse.SUPPRESS)
+    parser.add_argument('--snapshot_path', default=argparse.SUPPRESS,
+                        help='save snapshot after registration (path without extension)')
+    parser.add_argument('--resume_path', default=argparse.SUPPRESS,
+                        help='resume from snapshot (path without extension)')
+    cmd_args = vars(parser.parse_known_args(argv)[0])
     # Check input path
     p = Path(cmd_args['input_path'])
     # Update args from input file metadata
-    data = load(p)
+    data = load(p) if data is None else data
     args = data.get('metadata', {}).get('run', {})
     args['data'] = data.get('data', {})
     args.update(cmd_args)
@@ -158,27 +189,48 @@ def parse_arguments():
     args.setdefault('factory', 'geo')
     args.setdefault('strategy', 'strategy.Base')
     args.setdefault('options', {})
+    args.setdefault('cache', False)
+    args.setdefault('cache_dir', '.gmsh_scripts_cache')
+    args.setdefault('registry_statistics', False)
+    args.setdefault('snapshot_path', None)
+    args.setdefault('resume_path', None)
     if isinstance(args['strategy'], str):
         args['strategy'] = {'class': args['strategy']}
-    args['strategy'].setdefault("factory", args["factory"])
-    args['strategy'].setdefault("model_name", args["model_name"])
-    args['strategy'].setdefault("output_path", args["output_path"])
-    args['strategy'].setdefault("output_formats", args["output_formats"])
     return args
 
 
 def run(args):
     logging.info(f'args: {args}')
+    # Strategy arguments (paths are set after init_walk, they are not includes)
+    init_walk(args['strategy'])
+    args['strategy'].setdefault("factory", args["factory"])
+    args['strategy'].setdefault("model_name", args["model_name"])
+    args['strategy'].setdefault("output_path", args["output_path"])
+    args['strategy'].setdefault("output_formats", args["output_formats"])
+    args['strategy'].setdefault("registry_statistics", args["registry_statistics"])
+    args['strategy'].setdefault("snapshot_path", args["snapshot_path"])
+    args['strategy'].setdefault("resume_path", args["resume_path"])
     # Initialize
-    top_kwargs = args['data']
-    init_walk(top_kwargs)
-    top_kwargs['path'] = args['input_path']
-    top_block = FACTORY(top_kwargs)
-    set_parent(top_block)
+    top_block, key = None, None
+    is_resumed = args['strategy']['resume_path'] is not None
+    if args['cache'] and not is_resumed:
+        key = make_key(args['data'], args['input_path'])
+        top_block = load_block(key, args['cache_dir'])
+    if top_block is None and not is_resumed:  # Resumed by the strategy
+        top_kwargs = args['data']
+        init_walk(top_kwargs)
+        top_kwargs['path'] = args['input_path']
+        top_block = FACTORY(top_kwargs)
+        set_parent(top_block)
+        if args['cache']:
+            reset_registry(factory=args['strategy']['factory'])
+            timeit(top_block.transform)()
+            dump_block(top_block, key, args['cache_dir'])
     # Strategy
-    init_walk(args['strategy'])
     strategy = FACTORY(args['strategy'])
+    logging.info(f'includes: {get_includes_statistics()}')
     strategy(top_block)
+    return strategy
 
 
 def main():
@@ -0,0 +1,387 @@
+"""Resident mesh service
+
+Local HTTP daemon with a pool of warm worker processes: gmsh is initialized,
+modules of the factory are imported and include files are cached
+in each worker once, so small jobs don't pay the startup time.
+
+Usage:
+    python -m gmsh_scripts --serve -n 4 --port 8765
+    python -m gmsh_scripts input.yml --submit -a "-g occ"
+
+API (JSON):
+    POST /jobs - submit job {"input": path, "data": dict, "args": list,
+        "name": str, "output_dir": str}, "input" or "data" is required,
+        relative paths are resolved in the directory of the service
+    GET /jobs - list jobs
+    GET /jobs/<id> - status and result of the job
+    GET /jobs/<id>/log - log of the job, streamed until the job is finished
+    POST /shutdown - stop the service
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import logging
+import argparse
+import threading
+import traceback
+import urllib.request
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures.process import BrokenProcessPool
+
+from gmsh_scripts.batch import init_worker, run_job, make_executor
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Mesh service')
+    parser.add_argument('input', nargs='?', help='input path to submit')
+    parser.add_argument('--serve', action='store_true', help='start service')
+    parser.add_argument('--submit', action='store_true', help='submit job')
+    parser.add_argument('--host', default='127.0.0.1', help='service host')
+    parser.add_argument('--port', type=int, default=8765, help='service port')
+    parser.add_argument('-n', '--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--max_queue', type=int, default=1000,
+                        help='maximum number of unfinished jobs')
+    parser.add_argument('-o', '--output_dir', default=None,
+                        help='output directory (default: service directory)')
+    parser.add_argument('--name', default=None, help='model name of the job')
+    parser.add_argument('-a', '--args', default='',
+                        help='arguments of the job, e.g. "-g occ -f msh2"')
+    parser.add_argument('--no_follow', action='store_true',
+                        help='do not stream log of the submitted job')
+    args = vars(parser.parse_args(argv))
+    args['args'] = shlex.split(args['args'])
+    return args
+
+
+def init_service_worker():
+    """Initialize gmsh and import all modules of the factory"""
+    init_worker()
+    from gmsh_scripts.factory import FACTORY
+    import gmsh_scripts.run  # noqa: F401
+    FACTORY.str2obj  # Import all modules
+
+
+class Service:
+    """Queue of jobs executed in the pool of warm workers
+
+    Args:
+        workers (int): number of worker processes
+        max_queue (int): maximum number of unfinished jobs
+        output_dir (str): default output directory of jobs
+    """
+
+    def __init__(self, workers=None, max_queue=1000, output_dir=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.output_dir = Path('.' if output_dir is None else output_dir).resolve()
+        self.jobs = {}  # id -> job
+        self.futures = {}  # id -> future
+        self.results = {}  # id -> result
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.executor = self.make_executor()
+
+    def make_executor(self):
+        return make_executor(self.workers, initializer=init_service_worker)
+
+    def submit(self, request):
+        """Submit job
+
+        Args:
+            request (dict): job with "input" path and/or "data",
+                optional "args", "name" and "output_dir"
+
+        Returns:
+            str: job id
+        """
+        if 'input' not in request and 'data' not in request:
+            raise ValueError('Job requires "input" or "data"')
+        args = request.get('args', [])
+        if isinstance(args, str):
+            args = shlex.split(args)
+        with self.lock:
+            n_unfinished = sum(1 for x in self.futures.values() if not x.done())
+            if n_unfinished >= self.max_queue:
+                raise OverflowError(f'Queue is full: {n_unfinished} jobs')
+            self.counter += 1
+            job_id = str(self.counter)
+            if 'input' in request:
+                input_path = Path(request['input']).resolve()
+            else:  # Only data, input path sets working directory and name
+                input_path = Path('job.json').resolve()
+            name = request.get('name', f'{input_path.stem}_{job_id}')
+            output_dir = Path(request.get('output_dir', self.output_dir)).resolve()
+            job = {'id': job_id, 'input': str(input_path), 'name': name,
+                   'args': list(args), 'output_dir': str(output_dir),
+                   'log_path': str(output_dir / f'{name}.log'),
+                   'submitted': time.time()}
+            if 'data' in request:
+                job['data'] = request['data']
+            # Log file is appended by logging, remove the previous one
+            try:
+                os.remove(job['log_path'])
+            except FileNotFoundError:
+                pass
+            self.jobs[job_id] = job
+            self.futures[job_id] = self.run(job)
+        logging.info(f'job {job_id} submitted: {input_path}')
+        return job_id
+
+    def run(self, job):
+        try:
+            future = self.executor.submit(run_job, job, job['output_dir'])
+        except BrokenProcessPool:  # Worker crashed, restart pool
+            logging.error('worker crashed, restarting pool')
+            self.executor = self.make_executor()
+            future = self.executor.submit(run_job, job, job['output_dir'])
+        future.add_done_callback(lambda x: self.on_done(job['id'], x))
+        return future
+
+    def on_done(self, job_id, future):
+        job = self.jobs[job_id]
+        try:
+            result = future.result()
+        except Exception as e:  # e.g. BrokenProcessPool
+            result = {'returncode': -1, 'error': f'{type(e).__name__}: {e}',
+                      'duration': 0}
+        output_dir = Path(job['output_dir'])
+        result['output_paths'] = sorted(
+            str(x) for x in output_dir.glob(f'{job["name"]}.*')
+            if x.suffix != '.log')
+        self.results[job_id] = result
+        logging.info(f'job {job_id} finished: {result["returncode"]}')
+
+    def status(self, job_id):
+        """Get status and result of the job
+
+        Args:
+            job_id (str): job id
+
+        Returns:
+            dict or None: job without data or None if there is no such job
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        future = self.futures[job_id]
+        if job_id in self.results:
+            result = self.results[job_id]
+            status = 'done' if result['returncode'] == 0 else 'failed'
+        else:
+            result = {}
+            status = 'running' if future.running() or future.done() else 'queued'
+        job = {k: v for k, v in job.items() if k != 'data'}
+        return {**job, 'status': status,
+                **{k: v for k, v in result.items()
+                   if k in ['returncode', 'error', 'duration', 'nodes',
+                            'elements', 'output_paths']}}
+
+    def is_done(self, job_id):
+        return job_id in self.results
+
+    def shutdown(self):
+        with self.lock:  # Cancel queued jobs, Python < 3.9 has no cancel_futures
+            for future in self.futures.values():
+                future.cancel()
+        self.executor.shutdown(wait=True)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server with a thread per request (http.server of Python >= 3.7)"""
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    """HTTP handler of the service (server.service)"""
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+    def send_json(self, obj, code=200):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [x for x in self.path.split('?')[0].split('/') if x]
+        if parts == []:
+            self.send_json({'jobs': len(service.jobs),
+                            'workers': service.workers, 'pid': os.getpid()})
+        elif parts == ['jobs']:
+            self.send_json([service.status(x) for x in list(service.jobs)])
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            status = service.status(parts[1])
+            if status is None:
+                self.send_json({'error': f'No job {parts[1]}'}, 404)
+            else:
+                self.send_json(status)
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'log':
+            status = service.status(parts[1])
+            if status is None:
+                self.send_json({'error': f'No job {parts[1]}'}, 404)
+            else:
+                self.stream_log(parts[1], status['log_path'])
+        else:
+            self.send_json({'error': f'Wrong path {self.path}'}, 404)
+
+    def stream_log(self, job_id, log_path, interval=0.1):
+        """Send log until the job is finished, response ends on close"""
+        service = self.server.service
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.end_headers()
+        offset = 0
+        while True:
+            is_done = service.is_done(job_id)  # Check before the last read
+            if os.path.isfile(log_path):
+                with open(log_path, 'rb') as f:
+                    f.seek(offset)
+                    chunk = f.read()
+                if chunk:
+                    offset += len(chunk)
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+            if is_done:
+                break
+            time.sleep(interval)
+
+    def do_POST(self):
+        service = self.server.service
+        parts = [x for x in self.path.split('?')[0].split('/') if x]
+        if parts == ['jobs']:
+            try:
+                n = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(n))
+                job_id = service.submit(request)
+            except OverflowError as e:
+                self.send_json({'error': str(e)}, 503)
+            except Exception as e:
+                self.send_json({'error': f'{type(e).__name__}: {e}'}, 400)
+            else:
+                self.send_json({'id': job_id}, 201)
+        elif parts == ['shutdown']:
+            self.send_json({'status': 'shutdown'})
+            threading.Thread(target=self.server.shutdown).start()
+        else:
+            self.send_json({'error': f'Wrong path {self.path}'}, 404)
+
+
+def serve(host='127.0.0.1', port=8765, workers=None, max_queue=1000,
+          output_dir=None):
+    """Start service and wait for shutdown
+
+    Args:
+        host (str): host, localhost by default, the service has no auth
+        port (int): port
+        workers (int): number of worker processes
+        max_queue (int): maximum number of unfinished jobs
+        output_dir (str): default output directory of jobs
+    """
+    service = Service(workers, max_queue, output_dir)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.service = service
+    # Stop workers on termination too
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(
+        target=server.shutdown).start())
+    logging.info(f'serving at http://{host}:{port}')
+    print(f'serving at http://{host}:{port}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def request(url, data=None):
+    """Send request to the service
+
+    Args:
+        url (str): URL
+        data (dict): JSON body of POST request, if None send GET request
+
+    Returns:
+        dict or list: JSON response
+    """
+    body = None if data is None else json.dumps(data).encode()
+    r = urllib.request.Request(url, data=body, method='GET' if body is None else 'POST',
+                               headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(r) as f:
+        return json.loads(f.read())
+
+
+def submit(url, input_path=None, data=None, args=None, name=None,
+           output_dir=None, follow=True, stream=sys.stdout):
+    """Submit job to the service
+
+    Args:
+        url (str): URL of the service, e.g. http://127.0.0.1:8765
+        input_path (str): input path, resolved in the current directory
+        data (dict): data of the input file instead of the file
+        args (list of str): arguments of the job
+        name (str): model name
+        output_dir (str): output directory, resolved in the current directory
+        follow (bool): stream log of the job until it is finished
+        stream: output stream of the log
+
+    Returns:
+        dict: status of the job
+    """
+    job = {'args': [] if args is None else args}
+    if input_path is not None:
+        job['input'] = str(Path(input_path).resolve())
+    if data is not None:
+        job['data'] = data
+    if name is not None:
+        job['name'] = name
+    if output_dir is not None:
+        job['output_dir'] = str(Path(output_dir).resolve())
+    job_id = request(f'{url}/jobs', job)['id']
+    if follow:
+        with urllib.request.urlopen(f'{url}/jobs/{job_id}/log') as f:
+            for line in f:
+                stream.write(line.decode(errors='replace'))
+            stream.flush()
+    status = request(f'{url}/jobs/{job_id}')
+    while follow and status['status'] in ['queued', 'running']:
+        time.sleep(0.1)
+        status = request(f'{url}/jobs/{job_id}')
+    return status
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    if args['serve']:
+        logging.basicConfig(level=logging.INFO)
+        serve(args['host'], args['port'], args['workers'], args['max_queue'],
+              args['output_dir'])
+        return
+    url = f'http://{args["host"]}:{args["port"]}'
+    if args['input'] is None:
+        print(json.dumps(request(f'{url}/jobs'), indent=2))
+        return
+    try:
+        status = submit(url, args['input'], args=args['args'],
+                        name=args['name'], output_dir=args['output_dir'],
+                        follow=not args['no_follow'])
+    except Exception:
+        print(traceback.format_exc(), file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(status, indent=2))
+    if not args['no_follow']:
+        sys.exit(0 if status['returncode'] == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
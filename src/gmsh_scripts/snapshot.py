@@ -0,0 +1,85 @@
+"""Snapshots of the registered Block tree
+
+Snapshot is written after the registration phase: the Block tree and
+the state of the registry are pickled to <path>.pickle and the gmsh model
+is written to <path>.geo_unrolled (geo factory), that keeps tags of entities.
+A run restored from the snapshot skips transformation and registration
+and runs only the later stages (structure, zone, mesh).
+
+Factories:
+    geo - the model is written and merged back.
+    dry - only the Block tree and the registry.
+    occ - not supported, tags of entities are not kept in BREP files.
+
+Usage:
+    python -m gmsh_scripts input.yml --snapshot_path base
+    python -m gmsh_scripts input.yml --resume_path base -o variant
+    python -m gmsh_scripts "inputs/*.yml" --batch -a "--resume_path /abs/base"
+"""
+import os
+import uuid
+import pickle
+import logging
+from pathlib import Path
+
+import gmsh
+
+from gmsh_scripts import registry
+from gmsh_scripts.cache import get_version
+
+SNAPSHOT_FACTORIES = ['geo', registry.DRY_FACTORY]
+"""Factories with snapshots"""
+
+
+def dump_snapshot(block, path):
+    """Save the registered Block tree, the registry and the gmsh model
+
+    Pickle is written under a temporary name and then renamed,
+    so concurrent runs never read a partial file.
+
+    Args:
+        block (block.Block): registered top Block
+        path (str): path without extension
+    """
+    factory = registry.FACTORY
+    if factory not in SNAPSHOT_FACTORIES:
+        raise ValueError(f'Snapshot of {factory} factory is not supported, '
+                         f'use one of {SNAPSHOT_FACTORIES}')
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if factory == 'geo':
+        registry.synchronize()
+        gmsh.write(f'{path}.geo_unrolled')
+    pickle_path = Path(f'{path}.pickle')
+    tmp_path = Path(f'{path}.{uuid.uuid4().hex}.tmp')
+    snapshot = {'version': get_version(), 'registry': registry.get_state(),
+                'block': block}
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, pickle_path)
+    logging.info(f'snapshot dump: {pickle_path}')
+
+
+def load_snapshot(path):
+    """Restore the registry and the gmsh model from the snapshot
+
+    The gmsh model is merged into the current model.
+
+    Args:
+        path (str): path without extension
+
+    Returns:
+        block.Block: registered top Block
+    """
+    pickle_path = Path(f'{path}.pickle')
+    with open(pickle_path, 'rb') as f:
+        snapshot = pickle.load(f)
+    version = get_version()
+    if snapshot['version'] != version:
+        logging.warning(f'snapshot version {snapshot["version"]} '
+                        f'is not {version}')
+    registry.set_state(snapshot['registry'])
+    if registry.FACTORY == 'geo':
+        gmsh.merge(f'{path}.geo_unrolled')
+    logging.info(f'snapshot load: {pickle_path}')
+    return snapshot['block']
@@ -1,3 +1,4 @@
+import json
 import logging
 import uuid
 
@@ -5,12 +6,17 @@ import gmsh
 
 from gmsh_scripts.registry import reset as reset_registry
 from gmsh_scripts.registry import synchronize as synchronize_registry
+from gmsh_scripts.registry import get_counts as get_registry_counts
+from gmsh_scripts.registry import get_statistics as get_registry_statistics
+from gmsh_scripts.registry import get_factory as get_registry_factory
+from gmsh_scripts.registry import start_script, stop_script, SCRIPT_FACTORY
 from gmsh_scripts.support.support import timeit, plot_statistics, plot_quality
+from gmsh_scripts.snapshot import dump_snapshot, load_snapshot
 from gmsh_scripts.boolean.boolean import BooleanAllBlock
 from gmsh_scripts.zone.zone import DirectionByNormal
 from gmsh_scripts.zone.zone import Block as BlockZone
 from gmsh_scripts.size.size import NoSize
-from gmsh_scripts.structure.structure import StructureBlock
+from gmsh_scripts.structure.structure import StructureBlock, StructureByBlock
 from gmsh_scripts.quadrate.quadrate import  NoQuadrate
 from gmsh_scripts.optimize.optimize import OptimizeOne
 from gmsh_scripts.smooth.smooth import NoSmooth
@@ -18,9 +24,23 @@ from gmsh_scripts.refine.refine import NoRefine
 
 
 class Strategy:
-    """Abstract strategy"""
+    """Abstract strategy
+
+    Args:
+        factory (str): gmsh factory: geo or occ
+        model_name (str): model name
+        output_path (str): output path without extension
+        output_formats (list of str): output formats
+        registry_statistics (bool): collect registry statistics and write
+            them to <output_path>-registry.json
+        snapshot_path (str): save snapshot after registration to the path
+            (see snapshot)
+        resume_path (str): restore the registered Block tree from the
+            snapshot at the path instead of transformation and registration
+    """
     def __init__(self, factory=None, model_name=None, output_path=None,
-                 output_formats=None):
+                 output_formats=None, registry_statistics=False,
+                 snapshot_path=None, resume_path=None):
         factory = 'geo' if factory is None else factory
         model_name = str(uuid.uuid1()) if model_name is None else model_name
         output_path = model_name if output_path is None else output_path
@@ -29,14 +49,54 @@ class Strategy:
         self.model_name = model_name
         self.output_path = output_path
         self.output_formats = output_formats
+        self.registry_statistics = registry_statistics
+        self.snapshot_path = snapshot_path
+        self.resume_path = resume_path
+        self.statistics = {}  # Mesh statistics, set after meshing
         logging.info(f'factory: {factory}')
         logging.info(f'model_name: {model_name}')
         logging.info(f'output_path: {output_path}')
         logging.info(f'output_formats: {output_formats}')
 
     def __call__(self, block):
-        reset_registry(factory=self.factory)
-        logging.info(f'number of blocks: {len(block)}')
+        reset_registry(factory=self.factory, statistics=self.registry_statistics)
+        if block is not None:  # None if resumed from snapshot
+            logging.info(f'number of blocks: {len(block)}')
+
+    def register(self, block):
+        """Transform and register the Block tree or restore it from snapshot
+
+        Args:
+            block (Block or None): top block, None if resumed from snapshot
+
+        Returns:
+            Block: registered top block
+        """
+        if self.resume_path is not None:
+            block = timeit(load_snapshot)(self.resume_path)
+            factory = get_registry_factory()
+            if factory != self.factory:
+                raise ValueError(f'Snapshot factory {factory} '
+                                 f'is not {self.factory}')
+            logging.info(f'number of blocks: {len(block)}')
+        else:
+            timeit(block.transform)()
+            timeit(block.register)()
+            if self.snapshot_path is not None:
+                timeit(dump_snapshot)(block, self.snapshot_path)
+        logging.info(f'registry: {get_registry_counts()}')
+        return block
+
+    def write_registry_statistics(self):
+        """Log registry statistics and write them to JSON file"""
+        statistics = get_registry_statistics()
+        if statistics is None:
+            return
+        logging.info(f'registry statistics: {statistics}')
+        path = f'{self.output_path}-registry.json'
+        logging.info(f'Writing {path}')
+        with open(path, 'w') as f:
+            json.dump(statistics, f, indent=2)
 
 
 class Base(Strategy):
@@ -55,8 +115,12 @@ class Base(Strategy):
             optimize_function=OptimizeOne(),
             refine_function=NoRefine(),
             smooth_function=NoSmooth(),
+            registry_statistics=False,
+            snapshot_path=None,
+            resume_path=None,
     ):
-        super().__init__(factory, model_name, output_path, output_formats)
+        super().__init__(factory, model_name, output_path, output_formats,
+                         registry_statistics, snapshot_path, resume_path)
         self.boolean_function = boolean_function
         self.zone_function = zone_function
         self.size_function = size_function
@@ -70,8 +134,7 @@ class Base(Strategy):
         super().__call__(block)
         gmsh.logger.start()
         gmsh.model.add(self.model_name)
-        timeit(block.transform)()
-        timeit(block.register)()
+        block = self.register(block)
         if self.factory == 'geo':
             timeit(synchronize_registry)()
             timeit(self.structure_function)(block)  # Must be after synchronize!
@@ -81,7 +144,9 @@ class Base(Strategy):
             timeit(self.zone_function)(block)  # Must be after unregister!
             timeit(block.unregister)()  # Must be after synchronize!
             if 'geo_unrolled' in self.output_formats:
-                timeit(gmsh.write)(f'{self.model_name}.geo_unrolled')
+                path = f'{self.output_path}.geo_unrolled'
+                logging.info(f'Writing {path}')
+                timeit(gmsh.write)(path)
         elif self.factory == 'occ':
             timeit(self.boolean_function)(block)
             timeit(synchronize_registry)()
@@ -99,7 +164,7 @@ class Base(Strategy):
             timeit(gmsh.model.mesh.generate)(3)
             timeit(self.refine_function)()
             timeit(self.optimize_function)()
-            plot_statistics()
+            self.statistics = plot_statistics()
             plot_quality()
             for f in self.output_formats:
                 if f != 'geo_unrolled':
@@ -109,21 +174,23 @@ class Base(Strategy):
             gmsh.logger.stop()
         else:
             raise ValueError(self.factory)
+        self.write_registry_statistics()
         gmsh.model.remove()
 
 
 class Fast(Strategy):
-    """Generates geometry only (.geo_unrolled file)"""
+    """Meshes without structure, quadrate, zone and boolean functions"""
     def __init__(self, factory=None, model_name=None, output_path=None,
-                 output_formats=None):
-        super().__init__(factory, model_name, output_path, output_formats)
+                 output_formats=None, registry_statistics=False,
+                 snapshot_path=None, resume_path=None):
+        super().__init__(factory, model_name, output_path, output_formats,
+                         registry_statistics, snapshot_path, resume_path)
 
     def __call__(self, block):
         super().__call__(block)
         gmsh.logger.start()
         gmsh.model.add(self.model_name)
-        timeit(block.transform)()
-        timeit(block.register)()
+        block = self.register(block)
         if self.factory == 'geo':
             timeit(synchronize_registry)()
             timeit(block.unregister)()
@@ -138,7 +205,7 @@ class Fast(Strategy):
             logging.info(f'Writing {path}')
             timeit(gmsh.write)(path)
         timeit(gmsh.model.mesh.generate)(3)
-        plot_statistics()
+        self.statistics = plot_statistics()
         plot_quality()
         for f in self.output_formats:
             if f != 'geo_unrolled':
@@ -149,6 +216,7 @@ class Fast(Strategy):
         for x in log:
             logging.info(x)
         gmsh.logger.stop()
+        self.write_registry_statistics()
         gmsh.model.remove()
 
 
@@ -167,8 +235,12 @@ class NoBoolean(Strategy):
             optimize_function=OptimizeOne(),
             refine_function=NoRefine(),
             smooth_function=NoSmooth(),
+            registry_statistics=False,
+            snapshot_path=None,
+            resume_path=None,
     ):
-        super().__init__(factory, model_name, output_path, output_formats)
+        super().__init__(factory, model_name, output_path, output_formats,
+                         registry_statistics, snapshot_path, resume_path)
         self.zone_function = zone_function
         self.size_function = size_function
         self.structure_function = structure_function
@@ -181,8 +253,7 @@ class NoBoolean(Strategy):
         super().__call__(block)
         gmsh.logger.start()
         gmsh.model.add(self.model_name)
-        timeit(block.transform)()
-        timeit(block.register)()
+        block = self.register(block)
         timeit(synchronize_registry)()
         timeit(self.structure_function)(block)  # Must be after synchronize!
         timeit(self.quadrate_function)(block)
@@ -193,11 +264,13 @@ class NoBoolean(Strategy):
         timeit(self.zone_function)(block)  # Must be after unregister!
         timeit(block.unregister)()  # Must be after synchronize!
         if 'geo_unrolled' in self.output_formats:
-            timeit(gmsh.write)(f'{self.model_name}.geo_unrolled')
+            path = f'{self.output_path}.geo_unrolled'
+            logging.info(f'Writing {path}')
+            timeit(gmsh.write)(path)
         timeit(gmsh.model.mesh.generate)(3)
         timeit(self.refine_function)()
         timeit(self.optimize_function)()
-        plot_statistics()
+        self.statistics = plot_statistics()
         plot_quality()
         for f in self.output_formats:
             if f != 'geo_unrolled':
@@ -205,11 +278,97 @@ class NoBoolean(Strategy):
                 logging.info(f'Writing {path}')
                 timeit(gmsh.write)(path)
         gmsh.logger.stop()
+        self.write_registry_statistics()
+        gmsh.model.remove()
+
+
+class Geometry(Strategy):
+    """Generates geometry only (.geo_unrolled file) without meshing
+
+    Args:
+        script (bool): geo factory only, write entities directly to the
+            .geo_unrolled file with the script factory of the registry
+            instead of gmsh calls, zones are not written
+        merge (bool): merge the written script into the new gmsh model,
+            that is kept after the call
+        structure_function: structure function, if None StructureByBlock
+            for script and StructureBlock otherwise
+    """
+    def __init__(
+            self,
+            factory=None,
+            model_name=None,
+            output_path=None,
+            output_formats=None,
+            boolean_function=BooleanAllBlock(),
+            zone_function=DirectionByNormal(),
+            structure_function=None,
+            quadrate_function=NoQuadrate(),
+            script=False,
+            merge=False,
+            registry_statistics=False,
+            snapshot_path=None,
+            resume_path=None,
+    ):
+        super().__init__(factory, model_name, output_path, output_formats,
+                         registry_statistics, snapshot_path, resume_path)
+        if script and self.factory != 'geo':
+            raise ValueError(f'Script requires geo factory, not {self.factory}')
+        if script and (snapshot_path is not None or resume_path is not None):
+            raise ValueError('Script does not support snapshots')
+        if structure_function is None:
+            structure_function = StructureByBlock() if script else StructureBlock()
+        self.boolean_function = boolean_function
+        self.zone_function = zone_function
+        self.structure_function = structure_function
+        self.quadrate_function = quadrate_function
+        self.script = script
+        self.merge = merge
+
+    def __call__(self, block):
+        path = f'{self.output_path}.geo_unrolled'
+        if self.script:
+            reset_registry(factory=SCRIPT_FACTORY,
+                           statistics=self.registry_statistics)
+            logging.info(f'number of blocks: {len(block)}')
+            start_script(path)
+            try:
+                timeit(block.transform)()
+                timeit(block.register)()
+                logging.info(f'registry: {get_registry_counts()}')
+                timeit(self.structure_function)(block)
+                timeit(self.quadrate_function)(block)
+                timeit(block.pre_unregister)()
+                timeit(block.unregister)()
+            finally:
+                stop_script()
+            logging.info(f'Written {path}')
+            self.write_registry_statistics()
+            if self.merge:  # Model is kept
+                gmsh.model.add(self.model_name)
+                timeit(gmsh.merge)(path)
+            return
+        super().__call__(block)
+        gmsh.model.add(self.model_name)
+        block = self.register(block)
+        if self.factory == 'occ':
+            timeit(self.boolean_function)(block)
+        timeit(synchronize_registry)()
+        timeit(self.structure_function)(block)  # Must be after synchronize!
+        timeit(self.quadrate_function)(block)
+        timeit(synchronize_registry)()  # Must be after structure!
+        timeit(block.pre_unregister)()  # Must be after synchronize!
+        timeit(self.zone_function)(block)  # Must be after unregister!
+        timeit(block.unregister)()  # Must be after synchronize!
+        logging.info(f'Writing {path}')
+        timeit(gmsh.write)(path)
+        self.write_registry_statistics()
         gmsh.model.remove()
 
 
 str2obj = {
     Base.__name__: Base,
     Fast.__name__: Fast,
-    NoBoolean.__name__: NoBoolean
+    NoBoolean.__name__: NoBoolean,
+    Geometry.__name__: Geometry
 }
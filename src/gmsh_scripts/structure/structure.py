@@ -45,18 +45,52 @@ from gmsh_scripts.registry import get_curve_structure, register_structure_curve,
     get_volume_structure, register_structure_volume, \
     get_surface_quadrate, register_quadrate_surface, get_boolean_new2olds
 from gmsh_scripts.support.support import DataTree, flatten
-from gmsh_scripts.entity.point import Point
 from gmsh_scripts.entity.curve import Curve
 from gmsh_scripts.entity.surface import Surface
 from gmsh_scripts.entity.volume import Volume
 
 
 class Structure:
+    """Structure of the curve, surface or volume
+
+    Args:
+        name (str): type: curve, surface or volume
+        kwargs (dict): arguments of the structure (e.g. nPoints, meshType,
+            coef of the curve or cornerTags of the surface)
+    """
+    __slots__ = ('name', 'kwargs')
+
     def __init__(self, name=None, **kwargs):
         self.name = name
         self.kwargs = kwargs
 
 
+STRUCTURES = {}
+"""Interned structures by name and kwargs (see intern_structure)"""
+
+
+def intern_structure(name=None, **kwargs):
+    """Get shared Structure with the same name and kwargs
+
+    Interned structures are shared by many blocks and shouldn't be modified.
+
+    Args:
+        name (str): type: curve, surface or volume
+        kwargs (dict): arguments of the structure with hashable values
+
+    Returns:
+        Structure: structure
+    """
+    key = (name, tuple(sorted(kwargs.items())))
+    try:
+        structure = STRUCTURES.get(key, None)
+    except TypeError:  # Unhashable kwargs
+        return Structure(name=name, **kwargs)
+    if structure is None:
+        structure = STRUCTURES.setdefault(key, Structure(name=name, **kwargs))
+    return structure
+
+
 class NoStructure:
     def __init__(self):
         pass
@@ -121,8 +155,7 @@ class StructureBlock:
                         ps_cs = [dt.ps_dt_to_cs[x] for x in ps_dt]
                     else:
                         ps_cs = [dt.ps_dt_to_cs[x] for x in ps_dt[::-1]]
-                    c_ps = [Point(list(x)) for x in ps_cs]  # Curves points
-                    c_st = get_curve_structure(c_ps)
+                    c_st = get_curve_structure(ps_cs)  # Curves points
                     if c_st is None:
                         do_structure = False
                         break
@@ -132,8 +165,8 @@ class StructureBlock:
                 # vs_ps_dt.update(ss_ps_dt)
                 ss_cs_st.append(cs_st)
                 ss_ps_cs = [dt.ps_dt_to_cs[x] for x in ss_ps_dt]
-                s_ps = [Point(list(x)) for x in ss_ps_cs]
-                s_st = get_surface_structure(s_ps)  # Surfaces points
+                s_ps = ss_ps_cs  # Surfaces points coordinates
+                s_st = get_surface_structure(s_ps)
                 ss_st.append(s_st)
                 if s_st is None:
                     do_structure = False
@@ -177,9 +210,59 @@ class StructureBlock:
                         register_structure_curve(c)
 
 
+class StructureByBlock:
+    """Structure of blocks by their entities without queries of gmsh model
+
+    Same as StructureBlock for the geo factory without booleans, where
+    a volume of the block with one surface loop (without registered children)
+    has 6 surfaces and 12 curves of the block. Structures are taken from
+    the registry by points of entities, so the first registered wins as in
+    StructureBlock. Could be used with the script factory of the registry.
+
+    Args:
+        do_quadrate (bool): Quadrate surfaces
+        do_structure (bool): Structure volumes
+    """
+    def __init__(self, do_quadrate=True, do_structure=True):
+        self.do_quadrate = do_quadrate
+        self.do_structure = do_structure
+
+    def __call__(self, block):
+        if not self.do_structure:
+            return
+        for b in block:
+            if not b.do_register or len(b.volumes) != 1:
+                continue
+            v = b.volumes[0]
+            if v.tag is None or len(v.surfaces_loops) != 1:
+                continue
+            if len(b.curves) != 12 or len(b.surfaces) != 6:
+                continue
+            cs_st = [get_curve_structure([x.points[0], x.points[-1]])
+                     for x in b.curves]
+            if any(x is None for x in cs_st):
+                continue
+            ss_ps = [[b.points[x] for x in y] for y in b.surfaces_points]
+            ss_st = [get_surface_structure(x) for x in ss_ps]
+            if any(x is None for x in ss_st):
+                continue
+            v_st = get_volume_structure(v.tag)
+            if v_st is None:
+                continue
+            register_structure_volume(Volume(tag=v.tag, structure=v_st))
+            for s, s_st, s_ps in zip(b.surfaces, ss_st, ss_ps):
+                register_structure_surface(Surface(tag=s.tag, structure=s_st))
+                if self.do_quadrate:
+                    s_qu = get_surface_quadrate(s_ps)
+                    register_quadrate_surface(Surface(tag=s.tag, quadrate=s_qu))
+            for c, c_st in zip(b.curves, cs_st):
+                register_structure_curve(Curve(tag=abs(c.tag), structure=c_st))
+
+
 str2obj = {
     Structure.__name__: Structure,
     NoStructure.__name__: NoStructure,
     StructureAuto.__name__: StructureAuto,
-    StructureBlock.__name__: StructureBlock
+    StructureBlock.__name__: StructureBlock,
+    StructureByBlock.__name__: StructureByBlock
 }
@@ -1,9 +1,11 @@
 import logging
+import math
 import time
 import os
 import socket
 import sys
 import getpass
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
@@ -551,6 +553,11 @@ def plot_quality():
 
 
 def plot_statistics():
+    """Log number of mesh elements by type
+
+    Returns:
+        dict: total number of "nodes" and "elements"
+    """
     logging.info('Mesh statistics')
     types_names = {
         1: '2-node line',
@@ -580,6 +587,7 @@ def plot_statistics():
         n_elements += len(ets)
         nodes.update(nts)
     logging.info(f'Total: {len(nodes)} nodes and {n_elements} elements')
+    return {'nodes': len(nodes), 'elements': n_elements}
 
 
 def timeit(f):
@@ -597,8 +605,100 @@ def timeit(f):
     return wrapper
 
 
-def beta_function(xs, a, b, n=10000):
-    """Beta function
+@lru_cache(maxsize=None)
+def beta_complete(a, b):
+    """Complete beta function B(a, b) by logarithms of gamma functions
+
+    https://en.wikipedia.org/wiki/Beta_function#Relationship_to_the_gamma_function
+
+    Args:
+        a (float): alpha
+        b (float): beta
+
+    Returns:
+        float: value
+    """
+    return math.exp(beta_complete_log(a, b))
+
+
+def beta_complete_log(a, b):
+    """Logarithm of complete beta function B(a, b) without underflow
+
+    Args:
+        a (float): alpha
+        b (float): beta
+
+    Returns:
+        float: value
+    """
+    return math.lgamma(a) + math.lgamma(b) - math.lgamma(a + b)
+
+
+def beta_continued_fraction(xs, a, b, max_iter=300, eps=1e-15):
+    """Continued fraction of the regularized incomplete beta function
+
+    Continued fraction is evaluated by Lentz's method for all xs at once,
+    see section 6.4 in Press W.H. et al. Numerical Recipes. 2007.
+    It converges rapidly and its denominators are positive
+    for x < (a + 1) / (a + b + 2).
+
+    Args:
+        xs (np.ndarray): arguments (0, 1) of shape (N,)
+        a (float): alpha
+        b (float): beta
+        max_iter (int): maximum number of iterations
+        eps (float): relative tolerance
+
+    Returns:
+        np.ndarray: values of shape (N,)
+    """
+    c = np.ones_like(xs)
+    d = 1 / (1 - (a + b) / (a + 1) * xs)
+    f = d.copy()
+    for m in range(1, max_iter + 1):
+        for k in [m * (b - m) / ((a + 2 * m - 1) * (a + 2 * m)),
+                  -(a + m) * (a + b + m) / ((a + 2 * m) * (a + 2 * m + 1))]:
+            kx = k * xs
+            d = 1 / (1 + kx * d)
+            c = 1 + kx / c
+            delta = c * d
+            f *= delta
+        if abs(delta - 1).max() < eps:
+            break
+    log_b = beta_complete_log(a, b)
+    return np.exp(a * np.log(xs) + b * np.log1p(-xs) - log_b) / a * f
+
+
+def beta_regularized(xs, a, b):
+    """Regularized incomplete beta function I_x(a, b)
+
+    https://en.wikipedia.org/wiki/Beta_function#Incomplete_beta_function
+
+    Args:
+        xs (float, np.ndarray): argument(s) [0, 1]
+        a (float): alpha
+        b (float): beta
+
+    Returns:
+        float, np.ndarray: value [0, 1]
+    """
+    xs = np.asarray(xs, dtype=float)
+    x = np.clip(xs, 0, 1).ravel()
+    vs = np.where(x > 0, 1., 0.)
+    is_inner = (x > 0) & (x < 1)
+    is_swap = x > (a + 1) / (a + b + 2)  # By symmetry I_x(a, b) = 1 - I_1-x(b, a)
+    m = is_inner & ~is_swap
+    if np.any(m):
+        vs[m] = beta_continued_fraction(x[m], a, b)
+    m = is_inner & is_swap
+    if np.any(m):
+        vs[m] = 1 - beta_continued_fraction(1 - x[m], b, a)
+    vs = vs.reshape(xs.shape)
+    return float(vs) if vs.ndim == 0 else vs
+
+
+def beta_function(xs, a, b, n=None):
+    """Incomplete beta function B(x; a, b)
 
     https://en.wikipedia.org/wiki/Beta_function#Incomplete_beta_function
 
@@ -606,17 +706,12 @@ def beta_function(xs, a, b, n=10000):
         xs (float, np.ndarray): argument(s)
         a (float): alpha
         b (float): beta
-        n (int): number of integration steps
+        n (int): not used, kept for compatibility
 
     Returns:
         float, np.ndarray: value
     """
-    ts, dt = np.linspace(0, xs, n, retstep=True)
-    ts = np.ma.masked_values(ts, 0)  # leads to inf
-    ts = np.ma.masked_values(ts, 1)  # leads to inf
-    vs = ts ** (a - 1) * (1 - ts) ** (b - 1) * dt
-    vs = vs.filled(0)
-    return np.sum(vs, axis=0)
+    return beta_regularized(xs, a, b) * beta_complete(a, b)
 
 
 def beta_pdf(xs, a, b, n=10000):
@@ -628,24 +723,25 @@ def beta_pdf(xs, a, b, n=10000):
         xs (float, np.ndarray): argument(s)
         a (float): alpha
         b (float): beta
-        n (int): number of integration steps
+        n (int): number of steps of [0, 1] to correct density at 0 and 1
+            if alpha < 1 or beta < 1
 
     Returns:
         float, np.ndarray: value
     """
-    t = beta_function(1, a, b, n)
+    xs = np.asarray(xs, dtype=float)
     if a < 1 or b < 1:  # Correct 0 and 1
         _, dt = np.linspace(0, 1, n, retstep=True)
-        if isinstance(xs, np.ndarray):
-            xs[np.isclose(xs, 0)] = dt
-            xs[np.isclose(xs, 1)] = 1 - dt
-        else:
-            xs = dt if np.isclose(xs, 0) else xs
-            xs = 1 - dt if np.isclose(xs, 1) else xs
-    return xs ** (a - 1) * (1 - xs) ** (b - 1) / t
+        xs = np.where(np.isclose(xs, 0), dt, xs)
+        xs = np.where(np.isclose(xs, 1), 1 - dt, xs)
+    with np.errstate(divide='ignore'):  # Logarithms of 0 and 1
+        log_x = (a - 1) * np.log(xs) if a != 1 else np.zeros_like(xs)
+        log_1x = (b - 1) * np.log1p(-xs) if b != 1 else np.zeros_like(xs)
+    vs = np.exp(log_x + log_1x - beta_complete_log(a, b))  # No underflow
+    return float(vs) if vs.ndim == 0 else vs
 
 
-def beta_cdf(xs, a, b, n=10000):
+def beta_cdf(xs, a, b, n=None):
     """Beta cumulative distribution function
 
     https://en.wikipedia.org/wiki/Beta_distribution#Cumulative_distribution_function
@@ -655,19 +751,12 @@ def beta_cdf(xs, a, b, n=10000):
         xs (float, np.ndarray): argument(s)
         a (float): alpha
         b (float): beta
-        n (int): number of integration steps
+        n (int): not used, kept for compatibility
 
     Returns:
         float, np.ndarray: value [0, 1]
     """
-    t = beta_function(1, a, b, n)
-    # Different integrations steps by x value
-    if isinstance(xs, np.ndarray):
-        tx = np.array([beta_function(x, a, b, int(np.ceil(n * x))) for x in xs])
-    else:
-        nx = int(np.ceil(n * xs))
-        tx = beta_function(xs, a, b, nx)  # Incomplete beta function
-    return tx / t
+    return beta_regularized(xs, a, b)
 
 
 def check_on_file(path):
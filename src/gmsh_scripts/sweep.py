@@ -0,0 +1,299 @@
+"""Parametric sweep of an input file
+
+Input file declares parameters and overrides at metadata.sweep.
+Every variant of parameters is expanded in memory from the input data
+and meshed in the process pool of the batch mode,
+so no intermediate input files are written.
+
+Input:
+    metadata:
+      sweep:
+        parameters:  # Cartesian product of values
+          length: [ 1, 2 ]
+          quality: [ 0.1, 0.2 ]
+        variants:  # Listed values, combined with each product of parameters
+          - { width: 1, height: 2 }
+          - { width: 2, height: 3 }
+        expressions:  # Derived parameters, evaluated in order
+          half_length: length / 2
+        overrides:  # Path into the input file -> value
+          data/matrix/0/1: "{length};{quality}"
+          data/children_transforms/0/0/2: "{half_length}"
+          metadata/run/options/Mesh.MeshSizeFactor: "{quality}"
+
+Paths are "/" separated keys of dicts and indices of lists,
+"~1" and "~0" in keys are unescaped to "/" and "~" respectively.
+Include files (strings that start with "/") met on a path are inlined
+into the variant, so paths could go into them.
+String value "{name}" is replaced by the value of the parameter as is,
+other strings are formatted with parameters, other values are set as is.
+
+Usage:
+    python -m gmsh_scripts input.yml --sweep -n 4 -o output
+
+Results are written to the output directory: mesh and log of each variant
+and index.csv with parameters, exit codes, durations and mesh sizes.
+"""
+import ast
+import csv
+import sys
+import math
+import time
+import shlex
+import operator
+import argparse
+import itertools
+from pathlib import Path
+
+from gmsh_scripts.load import load, load_include, copy_data
+from gmsh_scripts.batch import run_jobs, print_summary
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Parametric sweep')
+    parser.add_argument('input', help='input path')
+    parser.add_argument('--sweep', action='store_true', help='sweep mode')
+    parser.add_argument('-n', '--workers', type=int, default=None,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('-o', '--output_dir', default=None,
+                        help='output directory (default: <input name>_sweep)')
+    parser.add_argument('--index_path', default=None,
+                        help='index CSV path (default: index.csv in output directory)')
+    parser.add_argument('--fail_fast', action='store_true',
+                        help='cancel remaining variants after the first failure')
+    parser.add_argument('-a', '--args', default='',
+                        help='arguments of each variant, e.g. "-g occ -f msh2"')
+    args = vars(parser.parse_args(argv))
+    args['args'] = shlex.split(args['args'])
+    return args
+
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+"""Arithmetic operators allowed in expressions"""
+
+FUNCTIONS = {
+    'abs': abs, 'min': min, 'max': max, 'round': round, 'int': int,
+    'float': float, 'sqrt': math.sqrt, 'sin': math.sin, 'cos': math.cos,
+    'tan': math.tan, 'radians': math.radians, 'degrees': math.degrees,
+    'pi': math.pi,
+}
+"""Functions and constants allowed in expressions"""
+
+
+def evaluate(expression, parameters):
+    """Evaluate arithmetic expression with parameters
+
+    Only numbers, names of parameters, arithmetic operators and FUNCTIONS
+    are allowed.
+
+    Args:
+        expression (str or int or float): expression, e.g. "1.42 + 2 * width"
+        parameters (dict): names -> values
+
+    Returns:
+        int or float: value
+    """
+    if not isinstance(expression, str):
+        return expression
+
+    def walk(node):
+        if isinstance(node, ast.Expression):
+            return walk(node.body)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        elif isinstance(node, ast.Name):
+            if node.id in parameters:
+                return parameters[node.id]
+            elif node.id in FUNCTIONS:
+                return FUNCTIONS[node.id]
+            raise ValueError(f'Unknown name {node.id} in expression {expression}')
+        elif isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](walk(node.left), walk(node.right))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](walk(node.operand))
+        elif isinstance(node, ast.Call) and not node.keywords:
+            f = walk(node.func)
+            if f not in FUNCTIONS.values() or not callable(f):
+                raise ValueError(f'Wrong function in expression {expression}')
+            return f(*[walk(x) for x in node.args])
+        raise ValueError(f'Wrong expression {expression}')
+
+    return walk(ast.parse(expression, mode='eval'))
+
+
+def get_variants(sweep):
+    """Expand parameters space
+
+    Args:
+        sweep (dict): sweep metadata with "parameters" and/or "variants"
+            and optional "expressions"
+
+    Returns:
+        list of dict: parameters of each variant
+    """
+    listed = sweep.get('variants', [{}])
+    parameters = sweep.get('parameters', {})
+    expressions = sweep.get('expressions', {})
+    names = list(parameters)
+    variants = []
+    for v in listed:
+        for values in itertools.product(*[parameters[x] for x in names]):
+            variant = {**v, **dict(zip(names, values))}
+            for name, expression in expressions.items():
+                variant[name] = evaluate(expression, variant)
+            variants.append(variant)
+    return variants
+
+
+def split_path(path):
+    """Split override path into keys
+
+    Args:
+        path (str): "/" separated path, e.g. "data/matrix/0/1"
+
+    Returns:
+        list of str: keys
+    """
+    return [x.replace('~1', '/').replace('~0', '~')
+            for x in path.strip('/').split('/')]
+
+
+def render(value, parameters):
+    """Render override value with parameters
+
+    Args:
+        value: template string or any other value
+        parameters (dict): names -> values
+
+    Returns:
+        value with parameters
+    """
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in parameters:
+            return parameters[value[1:-1]]
+        return value.format(**parameters)
+    return copy_data(value)
+
+
+def set_value(data, path, value, root=None):
+    """Set value in data by path
+
+    Include files on the path are loaded relative to the root directory
+    and inlined.
+
+    Args:
+        data (dict): data of the input file
+        path (str): "/" separated path
+        value: new value
+        root (str or Path): directory of the input file
+    """
+    root = Path('.') if root is None else Path(root)
+    keys = split_path(path)
+    node = data
+    for i, k in enumerate(keys):
+        if isinstance(node, list):
+            try:
+                k = int(k)
+                node[k]
+            except (ValueError, IndexError):
+                raise ValueError(f'Wrong index {k} of override path {path}')
+        elif isinstance(node, dict):
+            if k not in node and i + 1 < len(keys):
+                raise ValueError(f'Wrong key {k} of override path {path}')
+        else:
+            raise ValueError(f'Wrong override path {path} at {k}')
+        if i + 1 == len(keys):
+            node[k] = value
+            break
+        child = node[k]
+        if isinstance(child, str) and child.startswith('/'):  # Include
+            p = (root / child[1:]).resolve()
+            child = load_include(p)['data']
+            if isinstance(child, dict):
+                child['path'] = str(p)
+            node[k] = child
+        node = child
+
+
+def get_jobs(input_path, args=None):
+    """Make jobs of all variants of the input file
+
+    Args:
+        input_path (str): input path
+        args (list of str): arguments for all jobs
+
+    Returns:
+        list of dict: jobs with "input" path, unique "name", "args",
+            "data" of the variant and its "parameters"
+    """
+    args = [] if args is None else args
+    input_path = Path(input_path).resolve()
+    data = load(input_path)
+    sweep = data.get('metadata', {}).pop('sweep', None)
+    if sweep is None:
+        raise ValueError(f'No metadata.sweep in {input_path}')
+    overrides = sweep.get('overrides', {})
+    variants = get_variants(sweep)
+    width = len(str(len(variants) - 1))
+    jobs = []
+    for i, parameters in enumerate(variants):
+        variant = copy_data(data)
+        for path, value in overrides.items():
+            set_value(variant, path, render(value, parameters),
+                      input_path.parent)
+        jobs.append({'input': str(input_path),
+                     'name': f'{input_path.stem}_{i:0{width}d}',
+                     'args': args, 'data': variant,
+                     'parameters': parameters})
+    return jobs
+
+
+def write_index(results, path):
+    """Write results with parameters of variants to CSV file"""
+    names = []
+    for r in results:
+        names.extend(x for x in r['parameters'] if x not in names)
+    fields = ['name'] + names + ['returncode', 'duration', 'nodes',
+                                 'elements', 'log_path', 'error']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for r in results:
+            writer.writerow({**r, **r['parameters']})
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    jobs = get_jobs(args['input'], args['args'])
+    if len(jobs) == 0:
+        print('No variants')
+        sys.exit(1)
+    output_dir = args['output_dir']
+    if output_dir is None:
+        output_dir = f'{Path(args["input"]).stem}_sweep'
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    results = run_jobs(jobs, args['workers'], output_dir, args['fail_fast'])
+    results = [{k: v for k, v in r.items() if k != 'data'} for r in results]
+    print_summary(results)
+    print(f'wall time: {time.perf_counter() - t0:.2f}s')
+    index_path = args['index_path']
+    if index_path is None:
+        index_path = output_dir / 'index.csv'
+    write_index(results, index_path)
+    sys.exit(0 if all(x['returncode'] == 0 for x in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
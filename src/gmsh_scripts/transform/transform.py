@@ -3,7 +3,6 @@ import logging
 
 import numpy as np
 
-from gmsh_scripts.entity.point import Point
 from gmsh_scripts.coordinate_system.coordinate_system import CoordinateSystem, Cartesian, Cylindrical, \
     Spherical, Toroidal, Tokamak, Block, Path, Affine, Layer, QuarterLayer, HalfLayer
 
@@ -24,6 +23,68 @@ def reduce_transforms(transforms, point):
     return reduce(lambda x, y: y(x), transforms, point)
 
 
+def compile_transforms(transforms):
+    """Fuse runs of affine transforms into homogeneous matrices
+
+    Consecutive transforms with matrices (see Transform.get_matrix)
+    are replaced by one AffineMatrix, other transforms (e.g. conversions
+    of coordinate systems) are barriers and are kept as is.
+
+    Args:
+        transforms (list of Transform): transforms
+
+    Returns:
+        list of Transform: compiled transforms
+    """
+    compiled, matrix = [], None
+    for t in transforms:
+        m = t.get_matrix()
+        if m is None:
+            if matrix is not None:
+                compiled.append(AffineMatrix(matrix))
+                matrix = None
+            compiled.append(t)
+        else:
+            matrix = m if matrix is None else m.dot(matrix)
+    if matrix is not None:
+        compiled.append(AffineMatrix(matrix))
+    return compiled
+
+
+def transform_points(transforms, points):
+    """Apply compiled transforms to points
+
+    Transforms are applied to all points at once (see Transform.apply).
+
+    Args:
+        transforms (list of Transform): compiled transforms
+            (see compile_transforms)
+        points (list of Point): points
+
+    Returns:
+        list of Point: transformed points
+    """
+    points = list(points)
+    if len(points) == 0:
+        return points
+    for t in transforms:
+        points = t.apply(points)
+    return points
+
+
+def get_block_shape_functions(coordinates, order):
+    """Trilinear shape functions of the Block coordinate system
+
+    Args:
+        coordinates (np.ndarray): xi, eta, zeta of shape (3,) or (N, 3)
+        order (np.ndarray): order of block points of shape (8, 3)
+
+    Returns:
+        np.ndarray: weights of block points of shape (8,) or (N, 8)
+    """
+    return 0.125 * np.prod(1 + coordinates[..., None, :] * order, axis=-1)
+
+
 class Transform:
     """General transformation of Point coordinates.
 
@@ -49,6 +110,89 @@ class Transform:
         """
         return p
 
+    def apply(self, points):
+        """Transform points, by default point by point
+
+        Args:
+            points (list of Point): points to transform
+
+        Returns:
+            list of Point: transformed points
+        """
+        return [self(p) for p in points]
+
+    def get_matrix(self):
+        """Homogeneous matrix of the affine transform of 3D coordinates
+
+        Returns:
+            np.ndarray or None: 4x4 matrix or None if the transform
+                is not affine (see compile_transforms)
+        """
+        return None
+
+
+class Conversion(Transform):
+    """Conversion of coordinates of the Point to other coordinate system
+
+    Subclasses implement transform_coordinates for coordinates
+    of one point (dim,) or many points (N, dim).
+    Points are converted one by one (__call__) or by groups of points
+    with the same coordinate system (apply).
+    """
+
+    is_grouped_by_coordinate_system = False
+    """Group points by coordinate system objects, otherwise by dimension"""
+
+    def __call__(self, p):
+        p = super().__call__(p)
+        cs = p.coordinate_system
+        if self.is_skipped(cs):
+            return p
+        p.coordinates = self.transform_coordinates(p.coordinates, cs)
+        p.coordinate_system = self.cs_to
+        return p
+
+    def apply(self, points):
+        groups = {}
+        for p in points:
+            cs = p.coordinate_system
+            if self.is_skipped(cs):
+                continue
+            k = id(cs) if self.is_grouped_by_coordinate_system else len(p.coordinates)
+            groups.setdefault(k, []).append(p)
+        for ps in groups.values():
+            cs = self.transform_coordinates(
+                np.array([p.coordinates for p in ps], dtype=float),
+                ps[0].coordinate_system)
+            for p, c in zip(ps, cs):
+                p.coordinates = c
+                p.coordinate_system = self.cs_to
+        return points
+
+    def is_skipped(self, coordinate_system):
+        """Don't convert the point with the coordinate system
+
+        Args:
+            coordinate_system (CoordinateSystem): coordinate system of the point
+
+        Returns:
+            bool: skip the point
+        """
+        # FIXME workaround for double any_to_cartesian
+        return isinstance(coordinate_system, Cartesian)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        """Convert coordinates
+
+        Args:
+            coordinates (np.ndarray): coordinates of shape (dim,) or (N, dim)
+            coordinate_system (CoordinateSystem): coordinate system of points
+
+        Returns:
+            np.ndarray: new coordinates of shape (3,) or (N, 3)
+        """
+        raise NotImplementedError
+
 
 class Translate(Transform):
     """Translate coordinates of the Point by the displacement
@@ -63,9 +207,17 @@ class Translate(Transform):
 
     def __call__(self, p):
         p = super().__call__(p)
-        p.coordinates += self.delta
+        # Not in place: pooled points share coordinates, see transform_leaves
+        p.coordinates = p.coordinates + self.delta
         return p
 
+    def get_matrix(self):
+        if self.delta.shape != (3,):
+            return None
+        m = np.eye(4)
+        m[:3, 3] = self.delta
+        return m
+
 
 class Rotate(Transform):
     """
@@ -98,6 +250,14 @@ class Rotate(Transform):
         p.coordinates = cs + self.origin
         return p
 
+    def get_matrix(self):
+        if self.origin.shape != (3,):
+            return None
+        m = np.eye(4)
+        m[:3, :3] = self.rotation_matrix
+        m[:3, 3] = self.origin - self.rotation_matrix.dot(self.origin)
+        return m
+
 
 class CartesianToCartesian(Transform):
     """Convert coordinates of the Point from Cartesian to Cartesian system.
@@ -115,7 +275,7 @@ class CartesianToCartesian(Transform):
         return p
 
 
-class CylindricalToCartesian(Transform):
+class CylindricalToCartesian(Conversion):
     """Convert coordinates of the Point from Cylindrical to Cartesian system.
 
     [r, phi, z] -> [x, y, z]
@@ -127,17 +287,12 @@ class CylindricalToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_from=Cylindrical(), cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, Cartesian):  # FIXME workaround for double any_to_cartesian
-            return p
-        r, phi, z = p.coordinates
-        p.coordinates = np.array([r * np.cos(phi), r * np.sin(phi), z])
-        p.coordinate_system = self.cs_to
-        return p
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        r, phi, z = coordinates.T
+        return np.array([r * np.cos(phi), r * np.sin(phi), z]).T
 
 
-class SphericalToCartesian(Transform):
+class SphericalToCartesian(Conversion):
     """Convert coordinates of the Point from Spherical to Cartesian system.
 
     [r, phi, theta] -> [x, y, z]
@@ -150,19 +305,14 @@ class SphericalToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_from=Spherical(), cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, Cartesian):
-            return p
-        r, phi, theta = p.coordinates
-        p.coordinates = np.array([r * np.cos(phi) * np.sin(theta),
-                                  r * np.sin(phi) * np.sin(theta),
-                                  r * np.cos(theta)])
-        p.coordinate_system = self.cs_to
-        return p
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        r, phi, theta = coordinates.T
+        return np.array([r * np.cos(phi) * np.sin(theta),
+                         r * np.sin(phi) * np.sin(theta),
+                         r * np.cos(theta)]).T
 
 
-class ToroidalToCartesian(Transform):
+class ToroidalToCartesian(Conversion):
     """Convert coordinates of the Point from Toroidal to Cartesian system.
 
     [r, phi, theta, r2] -> [x, y, z]
@@ -179,19 +329,14 @@ class ToroidalToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_from=Toroidal(), cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, Cartesian):
-            return p
-        r, phi, theta, r2 = p.coordinates
-        p.coordinates = np.array([r2 * np.cos(theta) + r * np.cos(phi) * np.cos(theta),
-                                  r2 * np.sin(theta) + r * np.cos(phi) * np.sin(theta),
-                                  r * np.sin(phi)])
-        p.coordinate_system = self.cs_to
-        return p
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        r, phi, theta, r2 = coordinates.T
+        return np.array([r2 * np.cos(theta) + r * np.cos(phi) * np.cos(theta),
+                         r2 * np.sin(theta) + r * np.cos(phi) * np.sin(theta),
+                         r * np.sin(phi)]).T
 
 
-class TokamakToCartesian(Transform):
+class TokamakToCartesian(Conversion):
     """Convert coordinates of the Point from Tokamak to Cartesian system.
 
     [r, phi, theta, r2, kxy, kz] -> [x, y, z]
@@ -212,26 +357,18 @@ class TokamakToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_from=Tokamak(), cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, Cartesian):
-            return p
-        r, phi, theta, r2, kxy, kz = p.coordinates
-        if 0 <= phi <= 0.5 * np.pi or 1.5 * np.pi <= phi <= 2 * np.pi:
-            p.coordinates = np.array([
-                r2 * np.cos(theta) + kxy * r * np.cos(phi) * np.cos(theta),
-                r2 * np.sin(theta) + kxy * r * np.cos(phi) * np.sin(theta),
-                kz * r * np.sin(phi)])
-        else:
-            p.coordinates = np.array([
-                r2 * np.cos(theta) + r * np.cos(phi) * np.cos(theta),
-                r2 * np.sin(theta) + r * np.cos(phi) * np.sin(theta),
-                kz * r * np.sin(phi)])
-        p.coordinate_system = self.cs_to
-        return p
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        r, phi, theta, r2, kxy, kz = coordinates.T
+        # kxy only in positive outer radius direction
+        is_outer = ((0 <= phi) & (phi <= 0.5 * np.pi)) | \
+                   ((1.5 * np.pi <= phi) & (phi <= 2 * np.pi))
+        kr = np.where(is_outer, kxy * r, r)
+        return np.array([r2 * np.cos(theta) + kr * np.cos(phi) * np.cos(theta),
+                         r2 * np.sin(theta) + kr * np.cos(phi) * np.sin(theta),
+                         kz * r * np.sin(phi)]).T
 
 
-class BlockToCartesian(Transform):
+class BlockToCartesian(Conversion):
     """Convert coordinates of the Point from Block to Cartesian system.
 
     [xi, eta, zeta] -> [x, y, z]
@@ -245,18 +382,13 @@ class BlockToCartesian(Transform):
     def __init__(self, cs_from=None, **kwargs):
         super().__init__(cs_from=cs_from, cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        # if isinstance(self.cs_from, Cartesian):
-        #     return p
-        xi, eta, zeta = p.coordinates  # Point coordinates
+    def is_skipped(self, coordinate_system):
+        return False
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
         ps = self.cs_from.ps  # Block points coordinates
         order = self.cs_from.order  # Block points order
-        n = np.array([0.125 * (1 + x * xi) * (1 + y * eta) * (1 + z * zeta)
-                      for x, y, z in order])
-        p.coordinates = n.dot(ps)
-        p.coordinate_system = self.cs_to
-        return p
+        return get_block_shape_functions(coordinates, order).dot(ps)
 
 
 class CartesianToCartesianByBlock(Transform):
@@ -266,6 +398,9 @@ class CartesianToCartesianByBlock(Transform):
 
     [dx, dy, dz] = [xi, eta, zeta] - block_coordinates in Cartesian system
 
+    Displacement is cached with coordinates of block points
+    and is evaluated again only if they are changed.
+
     Args:
         block (block.Block): Block object
         block_coordinates (list or np.ndarray):
@@ -280,20 +415,37 @@ class CartesianToCartesianByBlock(Transform):
         if not isinstance(block_coordinates, np.ndarray):
             block_coordinates = np.array(block_coordinates)
         self.block_coordinates = block_coordinates
+        self.ps = None  # Cached block points coordinates
+        self.delta = None  # Cached displacement
 
     def __call__(self, p):
         p = super().__call__(p)
-        ps = [x.coordinates for x in self.block.points]  # Block points
-        b_cs = Block(ps=ps)  # Block coordinate system
-        b2car = BlockToCartesian(cs_from=b_cs)  # Block to Cartesian map
-        pb = Point(coordinates=self.block_coordinates,
-                   coordinate_system=b_cs)  # Point in Block
-        pc = b2car(pb)  # Point in Block with Cartesian coordinates
-        p.coordinates = p.coordinates + pc.coordinates  # Translate
+        p.coordinates = p.coordinates + self.get_delta()  # Translate
         return p
 
+    def get_matrix(self):
+        delta = self.get_delta()
+        if delta.shape != (3,):
+            return None
+        m = np.eye(4)
+        m[:3, 3] = delta
+        return m
+
+    def get_delta(self):
+        """Displacement by block coordinates in Cartesian system
 
-class AffineToAffine(Transform):
+        Returns:
+            np.ndarray: displacement
+        """
+        ps = np.array([x.coordinates for x in self.block.points])  # Block points
+        if self.ps is None or not np.array_equal(ps, self.ps):
+            b2car = BlockToCartesian(cs_from=Block(ps=ps))  # Block to Cartesian map
+            self.delta = b2car.transform_coordinates(self.block_coordinates)
+            self.ps = ps
+        return self.delta
+
+
+class AffineToAffine(Conversion):
     """Convert coordinates of the Point from Affine to Affine system.
 
    [x0, y0, z0] -> [x1, y1, z1]
@@ -302,53 +454,45 @@ class AffineToAffine(Transform):
        cs_to (Affine): Affine coordinate system
    """
 
+    is_grouped_by_coordinate_system = True
+
     def __init__(self, cs_to, **kwargs):
         super().__init__(cs_to=cs_to, **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        cs0, cs1 = p.coordinate_system, self.cs_to  # Coordinate systems
-        if not isinstance(cs0, Affine):
-            return p
-        vs0, vs1 = p.coordinate_system.vs, self.cs_to.vs  # Basis vectors
-        o0, o1 = p.coordinate_system.origin, self.cs_to.origin  # Origins
-        cds0 = p.coordinates  # Coordinates at old coordinate system
-        cds01 = np.dot(vs0.T, cds0)  # Cartesian coordinate system
+    def is_skipped(self, coordinate_system):
+        return not isinstance(coordinate_system, Affine)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        vs0, vs1 = coordinate_system.vs, self.cs_to.vs  # Basis vectors
+        o0, o1 = coordinate_system.origin, self.cs_to.origin  # Origins
+        cds01 = coordinates.dot(vs0)  # Cartesian coordinate system
         cds01 += o0  # Without origin of old coordinate system
         cds01 -= o1  # With origin of new coordinate system
-        cds1 = np.linalg.solve(vs1.T, cds01)  # New coordinate system
-        p.coordinates = cds1
-        p.coordinate_system = cs1
-        return p
+        return np.linalg.solve(vs1.T, cds01.T).T  # New coordinate system
 
 
-class AffineToCartesian(Transform):
+class AffineToCartesian(Conversion):
     """Convert coordinates of the Point from Affine to Cartesian system.
 
    [x0, y0, z0] -> [x, y, z]
    """
 
+    is_grouped_by_coordinate_system = True
+
     def __init__(self, **kwargs):
         super().__init__(cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        cs0, cs1 = p.coordinate_system, self.cs_to  # Coordinate systems
-        if isinstance(cs0, type(cs1)):
-            return p
-        if not isinstance(cs0, Affine):
-            return p
-        vs0 = p.coordinate_system.vs  # Affine basis vectors
-        o0 = p.coordinate_system.origin  # Affine origin
-        cds0 = p.coordinates  # Coordinates at Affine coordinate system
-        cds01 = np.dot(vs0.T, cds0)  # Cartesian coordinate system
-        cds01 += o0  # Without origin of Affine coordinate system
-        p.coordinates = cds01
-        p.coordinate_system = cs1
-        return p
+    def is_skipped(self, coordinate_system):
+        return isinstance(coordinate_system, type(self.cs_to)) or \
+            not isinstance(coordinate_system, Affine)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        vs0 = coordinate_system.vs  # Affine basis vectors
+        o0 = coordinate_system.origin  # Affine origin
+        return coordinates.dot(vs0) + o0  # Cartesian coordinate system
 
 
-class PathToCartesian(Transform):
+class PathToCartesian(Conversion):
     """Convert coordinates of the Point from Path to Cartesian system.
 
     [x, y, u] -> [x, y, z]
@@ -357,311 +501,207 @@ class PathToCartesian(Transform):
 
     x, y - Cartesian coordinates [-inf, inf] on the normal plane to direction
     of the path derivative at the point with relative path coordinate u.
+
+    Points with the same path are evaluated at once by apply
+    (see coordinate_system.Path.get_local_bases).
     """
 
+    is_grouped_by_coordinate_system = True
+
     def __init__(self, **kwargs):
         super().__init__(cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, type(self.cs_to)):
-            return p
-        if not isinstance(p.coordinate_system, Path):
-            return p
-        u = p.coordinates[2]  # Curve local coordinate
-        p.coordinates[2] = 0
-        lcs = p.coordinate_system.get_local_coordinate_system(u)
-        any2car = str2obj[lcs.__class__.__name__]()
-        p.coordinate_system = lcs
-        p = any2car(p)
-        return p
+    def is_skipped(self, coordinate_system):
+        return not isinstance(coordinate_system, Path)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        cds = np.array(coordinates, dtype=float, ndmin=2)
+        origins, bases = coordinate_system.get_local_bases(cds[:, 2])
+        cds[:, 2] = 0  # Curve local coordinate
+        cds = np.einsum('ni,nij->nj', cds, bases) + origins
+        return cds.reshape(np.shape(coordinates))
+
+
+LAYER_SECTORS = [(1, 0), (0, 1), (2, 1), (1, 2), (3, 2), (2, 3), (0, 3), (3, 0)]
+"""Sectors of Layer in the order of search: I X, I Y, II Y, II X, III X, III Y,
+IV Y and IV X. Sector (k0, kn) is a boundary of the layer by kn direction
+that starts at the boundary of the first layer by k0 direction
+(0 - X, 1 - Y, 2 - NX, 3 - NY)"""
+
+
+def find_layers_sectors(coordinate_system, xs, ys, start=0):
+    """Layers and sectors of boundaries of layers where points are
 
+    Point is on the sector (k0, kn) of the layer j if its coordinate
+    by k0 direction is close to the boundary of the first layer and
+    its coordinate by kn direction is close to the boundary of the layer j
+    (see coordinate_system.LayerBoundaries). The first layer and then
+    the first sector (see LAYER_SECTORS) are taken.
+
+    Args:
+        coordinate_system (Layer or QuarterLayer or HalfLayer): coordinate system
+        xs (np.ndarray): X coordinates of points of shape (N,)
+        ys (np.ndarray): Y coordinates of points of shape (N,)
+        start (int): index of the first layer to search
+
+    Returns:
+        tuple: tuple of:
+            layers (np.ndarray): indices of layers of shape (N,),
+                number of layers if point is not on boundaries
+            sectors (np.ndarray): indices of sectors (see LAYER_SECTORS)
+                of shape (N,), -1 if point is not on boundaries
+    """
+    cs = coordinate_system
+    n_layers = len(cs.layers[0])
+    layers = np.full(len(xs), n_layers)
+    sectors = np.full(len(xs), -1)
+    if n_layers == 0:
+        return layers, sectors
+    atol = 10 ** -POINT_TOL
+    cds = (xs, ys, xs, ys)  # Coordinates by X, Y, NX and NY directions
+    for s, (k0, kn) in enumerate(LAYER_SECTORS):
+        is_on_first = np.isclose(cds[k0], cs.layers[k0][0], atol=atol)
+        js = cs.boundaries[kn].find(cds[kn], start=start, atol=atol)
+        js = np.where(is_on_first, js, n_layers)
+        is_found = js < layers  # Previous sectors of the same layer first
+        layers = np.where(is_found, js, layers)
+        sectors = np.where(is_found, s, sectors)
+    return layers, sectors
+
+
+def get_layers_arcs(coordinate_system, k0, kn):
+    """Layers with inscribed circle arcs by k0 and kn directions
+
+    Args:
+        coordinate_system (Layer or QuarterLayer or HalfLayer): coordinate system
+        k0 (int): direction of the first curve (0 - X, 1 - Y, 2 - NX, 3 - NY)
+        kn (int): direction of the second curve and the type
+
+    Returns:
+        np.ndarray: is layer with arcs of shape (number of layers,)
+    """
+    cs = coordinate_system
+    return np.array([cs.layers_curves[k0][j][0] == 'circle_arc'
+                     and cs.layers_curves[kn][j][0] == 'circle_arc'
+                     and cs.layers_types[kn][j] == 'in'
+                     for j in range(len(cs.layers[0]))], dtype=bool)
+
+
+class LayerToCartesian(Conversion):
+    """Convert coordinates of the Point from Layer to Cartesian system.
+
+    Points on boundaries of layers are moved to curves of layers
+    (lines or inscribed circle arcs). Points of all grid of the layer
+    are converted at once by apply.
+    """
+
+    is_grouped_by_coordinate_system = True
 
-class LayerToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, type(self.cs_to)):
-            return p
-        if not isinstance(p.coordinate_system, Layer):
-            return p
-        cs = p.coordinate_system
-        px, py, pz = p.coordinates
-        n_layers = len(cs.layers[0])
-        lx0, ly0, lnx0, lny0 = (cs.layers[i][0] for i in range(4))
-        # lz0, lnz0 = 0, 0
-        # zs = context.layers[5][::-1] + context.layers[4]
-        # n_zs = len(zs)
-        # zs_curves = context.layers_curves[5][::-1] + context.layers_curves[4]
-        # zs_types = context.layers_types[5][::-1] + context.layers_types[4]
-        atol = 10 ** -POINT_TOL
-        for j in range(n_layers):
-            lx, ly, lnx, lny = (cs.layers[i][j] for i in range(4))
-            n_x, n_y, n_nx, n_ny = (cs.layers_curves[i][j][0] for i in range(4))
-            lt_x, lt_y, lt_nx, lt_ny = (cs.layers_types[i][j] for i in range(4))
-            # print(lt_x, lt_y, lt_nx, lt_ny)
-            if np.isclose(py, ly0, atol=atol) and np.isclose(px, lx, atol=atol):  # I sector X
-                # logging.debug('I sector X')
-                py, px = self.update_coordinate(p0=py, pn=px,
-                                                n0=n_y, nn=n_x,
-                                                l00=ly0, l0n=ly,
-                                                ln0=lx0, lnn=lx,
-                                                lt=lt_x)
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, ly, atol=atol):  # I sector Y
-                # logging.debug('I sector Y')
-                px, py = self.update_coordinate(p0=px, pn=py,
-                                                n0=n_x, nn=n_y,
-                                                l00=lx0, l0n=lx,
-                                                ln0=ly0, lnn=ly,
-                                                lt=lt_y)
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, ly, atol=atol):  # II sector Y
-                # logging.debug('II sector Y')
-                px, py = self.update_coordinate(p0=px, pn=py,
-                                                n0=n_nx, nn=n_y,
-                                                l00=lnx0, l0n=lnx,
-                                                ln0=ly0, lnn=ly,
-                                                lt=lt_y)
-                break
-            elif np.isclose(py, ly0, atol=atol) and np.isclose(px, lnx, atol=atol):  # II sector X
-                # logging.debug('II sector NX')
-                py, px = self.update_coordinate(p0=py, pn=px,
-                                                n0=n_y, nn=n_nx,
-                                                l00=ly0, l0n=ly,
-                                                ln0=lnx0, lnn=lnx,
-                                                lt=lt_nx)
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lnx, atol=atol):  # III sector X
-                # logging.debug('III sector NX')
-                py, px = self.update_coordinate(p0=py, pn=px,
-                                                n0=n_ny, nn=n_nx,
-                                                l00=lny0, l0n=lny,
-                                                ln0=lnx0, lnn=lnx,
-                                                lt=lt_nx)
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, lny, atol=atol):  # III sector Y
-                # logging.debug('III sector NY')
-                px, py = self.update_coordinate(p0=px, pn=py,
-                                                n0=n_nx, nn=n_ny,
-                                                l00=lnx0, l0n=lnx,
-                                                ln0=lny0, lnn=lny,
-                                                lt=lt_ny)
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, lny, atol=atol):  # IV sector Y
-                # logging.debug('IV sector NY')
-                px, py = self.update_coordinate(p0=px, pn=py,
-                                                n0=n_x, nn=n_ny,
-                                                l00=lx0, l0n=lx,
-                                                ln0=lny0, lnn=lny,
-                                                lt=lt_ny)
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lx, atol=atol):  # IV sector X
-                py, px = self.update_coordinate(p0=py, pn=px,
-                                                n0=n_ny, nn=n_x,
-                                                l00=lny0, l0n=lny,
-                                                ln0=lx0, lnn=lx,
-                                                lt=lt_x)
-                break
-            else:
+    def is_skipped(self, coordinate_system):
+        return not isinstance(coordinate_system, Layer)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        cs = coordinate_system
+        xs, ys, zs = np.array(coordinates, dtype=float, ndmin=2).T
+        js, ss = find_layers_sectors(cs, xs, ys)
+        for s, (k0, kn) in enumerate(LAYER_SECTORS):
+            m = ss == s
+            if not np.any(m):
                 continue
-        p.coordinates = np.array([px, py, pz]) + cs.origin
-        p.coordinate_system = self.cs_to
-        return p
+            j = js[m]
+            is_arc = get_layers_arcs(cs, k0, kn)[j]
+            p0, pn = (xs, ys) if k0 in (0, 2) else (ys, xs)
+            r = np.abs(pn[m])  # radius
+            p0[m] = np.where(is_arc, np.sign(p0[m]) * r / 2 ** 0.5,
+                             np.asarray(cs.layers[k0], dtype=float)[j])
+            pn[m] = np.where(is_arc, np.sign(pn[m]) * r / 2 ** 0.5, pn[m])
+        cds = np.array([xs, ys, zs]).T + cs.origin
+        return cds.reshape(np.shape(coordinates))
 
-    @staticmethod
-    def update_coordinate(p0, pn, n0, nn, l00, l0n, ln0, lnn, lt):
-        if n0 == 'circle_arc' and nn == 'circle_arc' and lt == 'in':
-            r = abs(pn)  # radius
-            p0 = np.sign(p0) * r / 2 ** 0.5
-            pn = np.sign(pn) * r / 2 ** 0.5
-        else:
-            p0 = l0n
-        return p0, pn
 
+class QuarterLayerToCartesian(Conversion):
+    """Convert coordinates of the Point from QuarterLayer to Cartesian system.
+
+    Points of all grid of the layer are converted at once by apply.
+    """
+
+    is_grouped_by_coordinate_system = True
 
-class QuarterLayerToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, type(self.cs_to)):
-            return p
-        if not isinstance(p.coordinate_system, QuarterLayer):
-            return p
-        cs = p.coordinate_system
-        px, py, pz = p.coordinates
-        n_layers = len(cs.layers[0])
-        lx0, ly0, lnx0, lny0 = (cs.layers[i][0] for i in range(4))
-        # lz0, lnz0 = 0, 0
-        # zs = context.layers[5][::-1] + context.layers[4]
-        # n_zs = len(zs)
-        # zs_curves = context.layers_curves[5][::-1] + context.layers_curves[4]
-        # zs_types = context.layers_types[5][::-1] + context.layers_types[4]
-        atol = 10 ** -POINT_TOL
-        for j in range(n_layers):
-            if j == 0:
-                continue
-            lx, ly, lnx, lny = (cs.layers[i][j] for i in range(4))
-            n_x, n_y, n_nx, n_ny = (cs.layers_curves[i][j][0] for i in range(4))
-            lt_x, lt_y, lt_nx, lt_ny = (cs.layers_types[i][j] for i in range(4))
-            # print(lt_x, lt_y, lt_nx, lt_ny)
-            if np.isclose(py, ly0, atol=atol) and np.isclose(px, lx, atol=atol):  # I sector X
-                # logging.debug('I sector X')
-                if n_y == 'circle_arc' and n_x == 'circle_arc' and lt_x == 'in':
-                    r = abs(lx)
-                    px = r / 2 ** 0.5 - lx0
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = lx - lx0
-                    py = ly - ly0
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, ly, atol=atol):  # I sector Y
-                # logging.debug('I sector Y')
-                if n_x == 'circle_arc' and n_y == 'circle_arc' and lt_y == 'in':
-                    r = abs(ly)
-                    px = r / 2 ** 0.5 - lx0
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = lx - lx0
-                    py = ly - ly0
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, ly, atol=atol):  # II sector Y
-                # logging.debug('II sector Y')
-                py = ly - ly0
-                break
-            elif np.isclose(py, ly0, atol=atol) and np.isclose(px, lnx, atol=atol):  # II sector X
-                # logging.debug('II sector NX')
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lnx, atol=atol):  # III sector X
-                # logging.debug('III sector NX')
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, lny, atol=atol):  # III sector Y
-                # logging.debug('III sector NY')
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, lny, atol=atol):  # IV sector Y
-                # logging.debug('IV sector NY')
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lx, atol=atol):  # IV sector X
-                # logging.debug('IV sector X')
-                px = lx - lx0
-                break
-            else:
+    def is_skipped(self, coordinate_system):
+        return not isinstance(coordinate_system, QuarterLayer)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        cs = coordinate_system
+        xs, ys, zs = np.array(coordinates, dtype=float, ndmin=2).T
+        lxs, lys, lnxs, lnys = (np.asarray(x, dtype=float) for x in cs.layers[:4])
+        js, ss = find_layers_sectors(cs, xs, ys, start=1)
+        for s in (0, 1):  # I sector X and Y
+            m = ss == s
+            if not np.any(m):
                 continue
-        px -= lnx0
-        py -= lny0
-        p.coordinates = np.array([px, py, pz]) + cs.origin
-        p.coordinate_system = self.cs_to
-        return p
-
-    @staticmethod
-    def update_coordinate(p0, pn, n0, nn, l00, l0n, ln0, lnn, lt):
-        if n0 == 'circle_arc' and nn == 'circle_arc' and lt == 'in':
-            r = abs(pn)  # radius
-            p0 = np.sign(p0) * r / 2 ** 0.5 - l0n
-            pn = np.sign(pn) * r / 2 ** 0.5 - l00
-        else:
-            p0 = l0n
-        return p0, pn
+            j = js[m]
+            k0, kn = LAYER_SECTORS[s]
+            is_arc = get_layers_arcs(cs, k0, kn)[j]
+            r = np.abs(lxs[j] if s == 0 else lys[j])
+            xs[m] = np.where(is_arc, r / 2 ** 0.5 - lxs[0], lxs[j] - lxs[0])
+            ys[m] = np.where(is_arc, r / 2 ** 0.5 - lys[0], lys[j] - lys[0])
+        m = ss == 2  # II sector Y
+        ys[m] = lys[js[m]] - lys[0]
+        m = ss == 7  # IV sector X
+        xs[m] = lxs[js[m]] - lxs[0]
+        xs -= lnxs[0]
+        ys -= lnys[0]
+        cds = np.array([xs, ys, zs]).T + cs.origin
+        return cds.reshape(np.shape(coordinates))
+
+
+class HalfLayerToCartesian(Conversion):
+    """Convert coordinates of the Point from HalfLayer to Cartesian system.
+
+    Points of all grid of the layer are converted at once by apply.
+    """
 
+    is_grouped_by_coordinate_system = True
 
-class HalfLayerToCartesian(Transform):
     def __init__(self, **kwargs):
         super().__init__(cs_to=Cartesian(), **kwargs)
 
-    def __call__(self, p):
-        p = super().__call__(p)
-        if isinstance(p.coordinate_system, type(self.cs_to)):
-            return p
-        if not isinstance(p.coordinate_system, HalfLayer):
-            return p
-        cs = p.coordinate_system
-        px, py, pz = p.coordinates
-        n_layers = len(cs.layers[0])
-        lx0, ly0, lnx0, lny0 = (cs.layers[i][0] for i in range(4))
-        # lz0, lnz0 = 0, 0
-        # zs = context.layers[5][::-1] + context.layers[4]
-        # n_zs = len(zs)
-        # zs_curves = context.layers_curves[5][::-1] + context.layers_curves[4]
-        # zs_types = context.layers_types[5][::-1] + context.layers_types[4]
-        atol = 10 ** -POINT_TOL
-        for j in range(n_layers):
-            if j == 0:
-                lx, ly, lnx, lny = (cs.layers[i][j] for i in range(4))
-                if np.isclose(py, ly0, atol=atol) and np.isclose(px, lx, atol=atol):  # I sector X
-                    py = ly - ly0
-                elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, ly, atol=atol):  # II sector Y
-                    py = ly - ly0
-                continue
-            lx, ly, lnx, lny = (cs.layers[i][j] for i in range(4))
-            n_x, n_y, n_nx, n_ny = (cs.layers_curves[i][j][0] for i in range(4))
-            lt_x, lt_y, lt_nx, lt_ny = (cs.layers_types[i][j] for i in range(4))
-            # print(lt_x, lt_y, lt_nx, lt_ny)
-            if np.isclose(py, ly0, atol=atol) and np.isclose(px, lx, atol=atol):  # I sector X
-                # logging.debug('I sector X')
-                if n_y == 'circle_arc' and n_x == 'circle_arc' and lt_x == 'in':
-                    r = abs(lx)
-                    px = r / 2 ** 0.5
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = lx
-                    py = ly - ly0
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, ly, atol=atol):  # I sector Y
-                # logging.debug('I sector Y')
-                if n_x == 'circle_arc' and n_y == 'circle_arc' and lt_y == 'in':
-                    r = abs(ly)
-                    px = r / 2 ** 0.5
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = lx
-                    py = ly - ly0
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, ly, atol=atol):  # II sector Y
-                # logging.debug('II sector Y')
-                # py = ly - ly0
-                if n_y == 'circle_arc' and n_x == 'circle_arc' and lt_x == 'in':
-                    r = abs(lx)
-                    px = -(r / 2 ** 0.5)
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = -lx
-                    py = ly - ly0
-                break
-            elif np.isclose(py, ly0, atol=atol) and np.isclose(px, lnx, atol=atol):  # II sector X
-                # logging.debug('II sector NX')
-                if n_y == 'circle_arc' and n_x == 'circle_arc' and lt_x == 'in':
-                    r = abs(lx)
-                    px = -(r / 2 ** 0.5)
-                    py = r / 2 ** 0.5 - ly0
-                else:
-                    px = -lx
-                    py = ly - ly0
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lnx, atol=atol):  # III sector X
-                # logging.debug('III sector NX')
-                px = -lx
-                break
-            elif np.isclose(px, lnx0, atol=atol) and np.isclose(py, lny, atol=atol):  # III sector Y
-                # logging.debug('III sector NY')
-                break
-            elif np.isclose(px, lx0, atol=atol) and np.isclose(py, lny, atol=atol):  # IV sector Y
-                # logging.debug('IV sector NY')
-                break
-            elif np.isclose(py, lny0, atol=atol) and np.isclose(px, lx, atol=atol):  # IV sector X
-                # logging.debug('IV sector X')
-                px = lx
-                break
-            else:
+    def is_skipped(self, coordinate_system):
+        return not isinstance(coordinate_system, HalfLayer)
+
+    def transform_coordinates(self, coordinates, coordinate_system=None):
+        cs = coordinate_system
+        xs, ys, zs = np.array(coordinates, dtype=float, ndmin=2).T
+        lxs, lys, lnxs, lnys = (np.asarray(x, dtype=float) for x in cs.layers[:4])
+        atol = 10 ** -POINT_TOL  # I sector X and II sector Y of the first layer
+        m = np.isclose(ys, lys[0], atol=atol) & np.isclose(xs, lxs[0], atol=atol)
+        m |= np.isclose(xs, lnxs[0], atol=atol) & np.isclose(ys, lys[0], atol=atol)
+        ys[m] = 0
+        js, ss = find_layers_sectors(cs, xs, ys, start=1)
+        for s in (0, 1, 2, 3):  # I sector X and Y, II sector Y and X
+            m = ss == s
+            if not np.any(m):
                 continue
-        # px -= lnx0
-        py -= lny0
-        p.coordinates = np.array([px, py, pz]) + cs.origin
-        p.coordinate_system = self.cs_to
-        return p
+            j = js[m]
+            k0, kn = LAYER_SECTORS[s] if s < 2 else LAYER_SECTORS[0]
+            is_arc = get_layers_arcs(cs, k0, kn)[j]
+            r = np.abs(lys[j] if s == 1 else lxs[j])
+            sign = 1 if s < 2 else -1
+            xs[m] = np.where(is_arc, sign * (r / 2 ** 0.5), sign * lxs[j])
+            ys[m] = np.where(is_arc, r / 2 ** 0.5 - lys[0], lys[j] - lys[0])
+        m = ss == 4  # III sector X
+        xs[m] = -lxs[js[m]]
+        m = ss == 7  # IV sector X
+        xs[m] = lxs[js[m]]
+        ys -= lnys[0]
+        cds = np.array([xs, ys, zs]).T + cs.origin
+        return cds.reshape(np.shape(coordinates))
 
 
 class AnyAsSome(Transform):
@@ -710,6 +750,55 @@ class TransformationMatrix(Transform):
         p.coordinates = np.dot(self.matrix, list(p.coordinates) + [1])[:-1]
         return p
 
+    def get_matrix(self):
+        """Matrix if it's affine, i.e. the last row is [0, 0, 0, 1]"""
+        if self.matrix.shape != (4, 4):
+            return None
+        if not np.array_equal(self.matrix[3], [0, 0, 0, 1]):
+            return None
+        return self.matrix.astype(float)
+
+
+class AffineMatrix(Transform):
+    """Fused affine transforms of 3D coordinates (see compile_transforms)
+
+    Args:
+        matrix (np.ndarray): homogeneous 4x4 matrix
+    """
+
+    def __init__(self, matrix, **kwargs):
+        super().__init__(**kwargs)
+        self.matrix = matrix
+        self.linear = matrix[:3, :3]
+        self.translation = matrix[:3, 3]
+
+    def __call__(self, p):
+        p = super().__call__(p)
+        p.coordinates = self.linear.dot(p.coordinates) + self.translation
+        return p
+
+    def get_matrix(self):
+        return self.matrix
+
+    def apply(self, points):
+        if len(points) == 0 or not all(len(p.coordinates) == 3 for p in points):
+            return super().apply(points)
+        cs = self.transform_coordinates(np.array([p.coordinates for p in points]))
+        for p, c in zip(points, cs):
+            p.coordinates = c
+        return points
+
+    def transform_coordinates(self, coordinates):
+        """Transform array of coordinates
+
+        Args:
+            coordinates (np.ndarray): coordinates of shape (N, 3)
+
+        Returns:
+            np.ndarray: new coordinates of shape (N, 3)
+        """
+        return coordinates.dot(self.linear.T) + self.translation
+
 
 str2obj = {
     Transform.__name__: Transform,
@@ -732,7 +821,7 @@ str2obj = {
     Toroidal.__name__: ToroidalToCartesian,
     'tor2car': ToroidalToCartesian,
     TokamakToCartesian.__name__: TokamakToCartesian,
-    Tokamak: TokamakToCartesian,
+    Tokamak.__name__: TokamakToCartesian,
     'tok2car': TokamakToCartesian,
     BlockToCartesian.__name__: BlockToCartesian,
     Block.__name__: BlockToCartesian,
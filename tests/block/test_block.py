@@ -0,0 +1,50 @@
+import copy
+
+import numpy as np
+
+from gmsh_scripts import registry
+from gmsh_scripts.factory import FACTORY
+from gmsh_scripts.entity.point import Point
+from gmsh_scripts.coordinate_system.coordinate_system import Path
+from gmsh_scripts.transform.transform import AnyAsSome, PathToCartesian, \
+    Translate
+
+
+def test_transform_leaves(matrix):
+    block = FACTORY({'class': 'block.Matrix',
+                     'matrix': matrix,
+                     'transforms': [{'name': 'Rotate', 'origin': [0, 0, 0],
+                                     'direction': [0, 0, 1], 'angle': 90}]})
+    block.transform()
+    a, b = block.children[:2]
+    assert all(x.is_transformed for x in block.children)
+    # Shared node of neighbouring items: (1, 1, 0) -> (-1, 1, 0)
+    pa, pb = a.points[0], b.points[1]
+    assert pa is not pb and pa.coordinates is pb.coordinates
+    assert np.allclose(pa.coordinates, [-1, 1, 0])
+    # Writes to pooled points don't change neighbouring blocks
+    qa, qb = a.points[4], b.points[5]  # (1, 1, 1) -> (-1, 1, 1)
+    assert qa.coordinates is qb.coordinates
+    Translate(delta=[0, 0, 1])(qa)
+    assert np.allclose(qa.coordinates, [-1, 1, 2])
+    assert np.allclose(qb.coordinates, [-1, 1, 1])
+    registry.reset(factory=registry.DRY_FACTORY, point_tol=12)
+    cs = pb.coordinates.copy()
+    q = registry.register_point(Point(coordinates=cs + [1e-13, 0, 0]))
+    registry.register_point(pa)
+    assert pa.tag == q.tag
+    assert np.array_equal(pa.coordinates, q.coordinates)
+    assert np.array_equal(pb.coordinates, cs)
+
+
+def test_matrix_shared_path(matrix):
+    path = Path(curves=[['line', [[0, 0, 0], [0, 0, 1]]]])
+    ts = [AnyAsSome(cs_to=path), PathToCartesian()]
+    block = FACTORY({'class': 'block.Matrix',
+                     'matrix': matrix,
+                     'items_self_transforms': [ts]})
+    a, b = block.children[:2]
+    assert a.self_transforms[0] is not b.self_transforms[0]  # Copies
+    assert a.self_transforms[0].cs_to is path  # Shared
+    assert b.self_transforms[0].cs_to is path
+    assert copy.deepcopy(path) is not path
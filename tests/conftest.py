@@ -4,6 +4,8 @@ from pathlib import Path
 
 import pytest
 
+from gmsh_scripts.load import load
+
 
 @pytest.fixture()
 def run(request, monkeypatch):
@@ -23,3 +25,10 @@ def plot(request, monkeypatch):
     args = [python, '-m', 'gmsh_scripts', str(p), '--plot']
     result = subprocess.run(args)
     return result.returncode
+
+
+@pytest.fixture()
+def matrix():
+    """Matrix of 3 items with shared nodes from yaml_test/geometry.yml"""
+    p = Path(__file__).parent / 'yaml_test' / 'geometry.yml'
+    return load(p)['data']['matrix']
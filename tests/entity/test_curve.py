@@ -0,0 +1,74 @@
+import gmsh
+import numpy as np
+
+from gmsh_scripts import registry
+from gmsh_scripts.entity.curve import CurveEvaluator
+from gmsh_scripts.coordinate_system.coordinate_system import Path
+
+
+def test_curve_evaluator():
+    ps = np.array([[0, 0, 0], [1, 0.2, 0], [2, 1, 0.5], [3, 1, 1], [4, 0, 1]])
+    arc = np.array([[1, 0, 0], [0, 0, 0], [np.cos(2), np.sin(2), 0]])
+    us = np.linspace(0, 1, 17)
+    gmsh.initialize()
+    try:
+        for factory in ['geo', 'occ']:
+            gmsh.model.add(factory)
+            m = getattr(gmsh.model, factory)
+            tags = [m.addPoint(*x) for x in ps]
+            arc_tags = [m.addPoint(*x) for x in arc]
+            curves = [('line', ps[[0, -1]], m.addLine(tags[0], tags[-1])),
+                      ('circle_arc', arc, m.addCircleArc(*arc_tags)),
+                      ('bspline', ps, m.addBSpline(tags))]
+            if factory == 'geo':
+                curves.append(('polyline', ps, m.addPolyline(tags)))
+                curves.append(('spline', ps, m.addSpline(tags)))
+            else:
+                curves.append(('polyline', ps, m.addBSpline(tags, degree=1)))
+                assert not CurveEvaluator.is_supported('spline', ps, factory)
+            m.synchronize()
+            for name, cs, tag in curves:
+                e = CurveEvaluator(name, cs, factory)
+                bs = gmsh.model.getParametrizationBounds(1, tag)
+                assert np.isclose(e.bounds[1] - e.bounds[0], bs[1][0] - bs[0][0])
+                vs, dvs = e.evaluate(us)
+                gus = bs[0][0] + us * (bs[1][0] - bs[0][0])
+                assert np.allclose(vs, np.reshape(
+                    gmsh.model.getValue(1, tag, gus), (-1, 3)), rtol=0, atol=1e-12)
+                if factory == 'occ':  # geo derivatives are numerical
+                    assert np.allclose(dvs[1:-1], np.reshape(gmsh.model.getDerivative(
+                        1, tag, gus[1:-1]), (-1, 3)), rtol=0, atol=1e-12)
+            gmsh.model.remove()
+    finally:
+        gmsh.finalize()
+    assert np.isclose(CurveEvaluator('circle_arc', arc).get_length(), 2)
+    assert np.isclose(CurveEvaluator('polyline', ps).get_length(),
+                      np.sum(np.linalg.norm(np.diff(ps, axis=0), axis=1)))
+    us = np.linspace(0, 1, 100001)
+    vs, _ = CurveEvaluator('spline', ps).evaluate(us)
+    assert np.isclose(CurveEvaluator('spline', ps).get_length(),
+                      np.sum(np.linalg.norm(np.diff(vs, axis=0), axis=1)))
+
+
+def test_curve_evaluator_kwargs():
+    ps = np.array([[0, 0, 0], [1, 0.2, 0], [2, 1, 0.5], [3, 1, 1], [4, 0, 1]])
+    assert CurveEvaluator.is_supported('bspline', ps, 'occ', {'degree': 3, 'tag': 7})
+    assert not CurveEvaluator.is_supported('bspline', ps, 'occ', {'degree': 2})
+    assert not CurveEvaluator.is_supported('bspline', ps, 'occ', {'knots': [0, 1]})
+    assert not CurveEvaluator.is_supported('circle_arc', ps[:3], 'geo', {'nz': 1})
+    gmsh.initialize()
+    try:  # Non-default degree is evaluated by gmsh
+        registry.reset(factory='occ')
+        path = Path(curves=[{'name': 'bspline', 'points': ps.tolist(), 'degree': 2}])
+        vs, _, _, _ = path.get_values_derivatives_orientations([0.25, 0.5])
+        assert path.evaluators is None and path.is_registered
+        tag = gmsh.model.occ.addBSpline(
+            [gmsh.model.occ.addPoint(*x) for x in ps], degree=2)
+        gmsh.model.occ.synchronize()
+        bs = gmsh.model.getParametrizationBounds(1, tag)
+        us = bs[0][0] + np.array([0.25, 0.5]) * (bs[1][0] - bs[0][0])
+        assert np.allclose(vs, np.reshape(gmsh.model.getValue(1, tag, us), (-1, 3)))
+        assert not np.allclose(vs, CurveEvaluator('bspline', ps, 'occ').evaluate(
+            np.array([0.25, 0.5]))[0])
+    finally:
+        gmsh.finalize()
@@ -23,3 +23,13 @@ def test_generate_random_cube(request, monkeypatch):
 @pytest.mark.parametrize("run", ["random_cube.yml"], indirect=True)
 def test_random_cube(run):
     assert run == 0
+
+
+def test_cache(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    args = [sys.executable, '-m', 'gmsh_scripts', 'cube.yml',
+            '--cache', '--cache_dir', str(tmp_path)]
+    for _ in range(2):  # miss and hit
+        result = subprocess.run(args)
+        assert result.returncode == 0
+    assert len(list(tmp_path.glob('*.pickle'))) == 1
@@ -0,0 +1,16 @@
+import importlib
+
+from gmsh_scripts.factory import Factory, MANIFEST
+
+
+def test_manifest():
+    for prefix, module, names in MANIFEST:
+        str2obj = importlib.import_module(module).str2obj
+        assert list(str2obj) == names
+
+
+def test_register():
+    factory = Factory()
+    factory.register('plugin.Dict', dict)
+    assert factory({'class': 'plugin.Dict', 'a': 1}) == {'a': 1}
+    assert 'strategy.Base' in factory.keys('strategy')
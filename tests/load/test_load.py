@@ -0,0 +1,22 @@
+from gmsh_scripts.load import load_include, get_includes_statistics, \
+    reset_includes
+
+
+def test_load_include(tmp_path):
+    reset_includes()
+    p = tmp_path / 'include.yml'
+    p.write_text('class: block.Block\nzone: [A, B]\n')
+    a = load_include(p)
+    assert get_includes_statistics() == {'hits': 0, 'misses': 1, 'files': 1}
+    a['zone'].append('C')  # Cached data isn't changed
+    a['do_register'] = False
+    b = load_include(str(p))
+    assert get_includes_statistics() == {'hits': 1, 'misses': 1, 'files': 1}
+    assert b == {'class': 'block.Block', 'zone': ['A', 'B']}
+    assert b['zone'] is not a['zone']
+    p.write_text('class: block.Block\nzone: [D]\n')  # Other size
+    c = load_include(p)
+    assert get_includes_statistics() == {'hits': 1, 'misses': 2, 'files': 1}
+    assert c == {'class': 'block.Block', 'zone': ['D']}
+    reset_includes()
+    assert get_includes_statistics() == {'hits': 0, 'misses': 0, 'files': 0}
@@ -0,0 +1,100 @@
+import pickle
+
+from gmsh_scripts import registry
+from gmsh_scripts.factory import FACTORY
+from gmsh_scripts.entity.point import Point
+from gmsh_scripts.entity.curve import Curve
+from gmsh_scripts.structure.structure import Structure
+
+
+def test_merge_points():
+    registry.reset(factory=registry.DRY_FACTORY, point_tol=12)
+    a = registry.register_point(Point([0.12345678901249, 1, 2]))
+    b = registry.register_point(Point([0.12345678901251, 1, 2]))  # Other side
+    c = registry.register_point(Point([0.12345678901251, 1, 2 + 1e-9]))
+    d = registry.register_point(Point([0.12345678901251, 1, 2]))  # Repeat
+    assert a.tag == b.tag == d.tag != c.tag
+    assert list(a.coordinates) == list(b.coordinates)
+    assert registry.get_counts()['points'] == 2
+    assert registry.get_counts()['merged_points'] == 1
+    registry.set_state(pickle.loads(pickle.dumps(registry.get_state())))
+    e = registry.register_point(Point([0.12345678901251, 1, 2]))  # Repeat
+    assert e.tag == a.tag
+    assert registry.get_counts()['merged_points'] == 1
+
+
+def test_curve_loop_key():
+    key, sign = registry.get_curve_loop_key([3, -7, 2, 5])
+    assert key == (2, 5, 3, -7) and sign == 1
+    assert registry.get_curve_loop_key([5, 3, -7, 2]) == (key, 1)
+    assert registry.get_curve_loop_key([-5, -2, 7, -3]) == (key, -1)
+    assert registry.get_surface_loop_key([4, 1, 3]) == (1, 3, 4)
+
+
+def test_structure_index():
+    registry.reset(factory=registry.DRY_FACTORY, point_tol=12)
+    ps = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    registry.register_surface_structure([Point(x) for x in ps], 'structure')
+    registry.register_curve_structure([Point(x) for x in ps[:2]], 'curve')
+    assert registry.get_surface_structure(ps[::-1]) == 'structure'
+    assert registry.get_surface_structure(ps[1:] + [[0, 0, 1]]) is None
+    assert registry.get_curve_structure(ps[1::-1]) == 'curve'
+
+
+def test_kwargs_builders():
+    structure = Structure(nPoints=5, meshType=1, coef=1.2, unknown=0)
+    for factory in ['geo', 'occ']:
+        registry.reset(factory=factory)
+        kwargs = registry.KWARGS_BUILDERS['structure_curve'](structure)['kwargs']
+        assert kwargs == registry.correct_kwargs(
+            Structure(**structure.kwargs), 'structure_curve')['kwargs']
+    assert kwargs == {'numNodes': 5, 'meshType': 'Bump', 'coef': 1.2}
+    assert structure.kwargs['nPoints'] == 5  # Not modified
+
+
+def test_statistics():
+    registry.reset(factory=registry.DRY_FACTORY)
+    assert registry.get_statistics() is None
+    registry.reset(factory=registry.DRY_FACTORY, statistics=True)
+    ps = registry.register_points([Point([0, 0, 0]), Point([1, 0, 0]),
+                                   Point([0, 0, 0])])
+    for _ in range(2):
+        registry.register_curve(Curve(points=ps[:2]))
+    registry.register_curve(Curve(points=ps[1::-1]))
+    statistics = registry.get_statistics()
+    assert statistics['point']['attempts'] == 3
+    assert statistics['point']['new'] == 2
+    assert statistics['curve']['hits'] == 2
+    assert statistics['total']['new'] == 3
+    assert statistics['total']['gmsh_time'] > 0
+
+
+def test_state():
+    registry.reset(factory=registry.DRY_FACTORY, point_tol=12)
+    ps = registry.register_points([Point([0.1, 0, 0]), Point([0.3, 0, -0.])])
+    registry.register_curve(Curve(points=ps))
+    state = pickle.loads(pickle.dumps(registry.get_state()))
+    points = dict(registry.POINTS)
+    registry.reset(factory='geo')
+    registry.set_state(state)
+    assert registry.get_factory() == registry.DRY_FACTORY
+    assert registry.POINTS == points
+    assert registry.get_counts()['curves'] == 1
+    p = registry.register_point(Point([0.1 + 1e-13, 0, 0]))  # Near-duplicate
+    c = registry.register_curve(Curve(points=ps[::-1]))
+    assert p.tag == ps[0].tag and c.tag == -1
+    assert registry.get_counts()['points'] == 2
+
+
+def test_shared_structures(matrix):
+    registry.reset(factory=registry.DRY_FACTORY)
+    block = FACTORY({'class': 'block.Matrix', 'matrix': matrix})
+    block.transform()
+    block.register()
+    a, b = block.children[:2]
+    assert a.curves_structures[0] is b.curves_structures[0]
+    assert a.surfaces_structures[0] is b.surfaces_structures[0]
+    assert 'cornerTags' not in a.surfaces_structures[0].kwargs  # Not modified
+    ps = [a.points[x] for x in a.surfaces_points[0]]
+    assert registry.get_surface_structure(ps).kwargs['cornerTags'] == [
+        x.tag for x in ps]
@@ -0,0 +1,126 @@
+from gmsh_scripts import run
+from gmsh_scripts.factory import FACTORY
+from gmsh_scripts.block.block import Block
+from gmsh_scripts.block.matrix import Matrix
+from gmsh_scripts.run import init_walk
+
+
+class RecordingFactory:
+    def __init__(self):
+        self.keys = []
+
+    def is_constructible(self, obj):
+        return FACTORY.is_constructible(obj)
+
+    def __call__(self, obj):
+        if isinstance(obj, dict):
+            self.keys.append(obj['class'])
+        elif isinstance(obj, list):
+            self.keys.append(obj[0])
+        else:
+            self.keys.append(obj)
+        return FACTORY(obj)
+
+
+def init_walk_recursive(obj, factory, fields=None, index=()):
+    """Reference recursive traversal
+
+    Children fields are propagated here independently of
+    pop_children_fields and set_children_fields.
+    """
+    if isinstance(obj, dict):
+        if fields is not None:  # Field -> values by indices of the child
+            for k, v in fields.items():
+                for i in index:
+                    v = v[i]
+                if v is not None:
+                    obj[k] = v
+        children_fields = {'children': {}, 'items_children': {}}
+        for k in list(obj):
+            if k.startswith('items_children_') and k not in [
+                    'items_children_map', 'items_children_transforms',
+                    'items_children_transforms_map']:
+                children_fields['items_children'][k[15:]] = obj.pop(k)
+            elif k.startswith('children_') and k != 'children_transforms':
+                children_fields['children'][k[9:]] = obj.pop(k)
+        for k in [x for x in obj if x != 'class']:
+            v = obj[k]
+            if k in children_fields:  # List of children or list of lists
+                depth = 1 if k == 'children' else 2
+                walk_children(v, factory, children_fields[k], depth)
+            elif isinstance(v, (dict, list)):
+                init_walk_recursive(v, factory)
+            if factory.is_constructible(obj[k]):
+                obj[k] = factory(obj[k])
+    else:
+        for i, v in enumerate(obj):
+            if isinstance(v, (dict, list)):
+                init_walk_recursive(v, factory)
+            if factory.is_constructible(v):
+                obj[i] = factory(v)
+
+
+def walk_children(obj, factory, fields, depth, index=()):
+    for i, v in enumerate(obj):
+        if len(index) + 1 < depth:
+            walk_children(v, factory, fields, depth, index + (i,))
+        else:
+            init_walk_recursive(v, factory, fields, index + (i,))
+        if factory.is_constructible(v):
+            obj[i] = factory(v)
+
+
+def make_data():
+    return {'data': {
+        'class': 'block.Block',
+        'children': [
+            {'class': 'block.Matrix',
+             'matrix': [[0, 1, 2], [0, 1], [0, 1]],
+             'items_children': [[{'class': 'block.Block'},
+                                 {'class': 'block.Block',
+                                  'transforms': [{
+                                      'class': 'transform.Translate',
+                                      'delta': [0.1, 0, 0]}]}]],
+             'items_children_zone': [['A', None]],
+             'items_children_map': [0, 0]},
+            {'class': 'block.Block',
+             'transforms': [{'class': 'transform.Translate',
+                             'delta': [1, 0, 0]}],
+             'children': [{'class': 'block.Block'}],
+             'children_zone': ['C']}],
+        'children_zone': ['M', 'B'],
+        'children_boolean_level': [None, 2]}}
+
+
+def describe(block):
+    return (type(block).__name__, block.volume_zone, block.boolean_level,
+            [type(x).__name__ for x in block.transforms],
+            [describe(x) for x in block.children])
+
+
+def test_init_walk(monkeypatch):
+    factories = [RecordingFactory(), RecordingFactory()]
+    monkeypatch.setattr(run, 'FACTORY', factories[0])
+    data = make_data()
+    init_walk(data)
+    ref_data = make_data()
+    init_walk_recursive(ref_data, factories[1])
+    assert factories[0].keys == factories[1].keys
+    assert factories[0].keys == [
+        'block.Block', 'transform.Translate', 'block.Block', 'block.Matrix',
+        'transform.Translate', 'block.Block', 'block.Block', 'block.Block']
+    block, ref_block = data['data'], ref_data['data']
+    assert isinstance(block, Block)
+    assert describe(block) == describe(ref_block)
+    item = ('Block', 'Matrix', 0, [], [('Block', 'A', 0, [], []),
+                                       ('Block', 'V', 0, ['Translate'], [])])
+    assert describe(block) == (
+        'Block', 'V', 0, [], [
+            ('Matrix', 'M', 0, [], [item, item]),
+            ('Block', 'B', 2, ['Translate'], [('Block', 'C', 0, [], [])])])
+    matrix, child = block.children
+    assert isinstance(matrix, Matrix)
+    assert matrix.volume_zone == 'M' and matrix.boolean_level == 0
+    assert child.volume_zone == 'B' and child.boolean_level == 2
+    assert [x.volume_zone for x in matrix.children[0].children] == ['A', 'V']
+    assert [x.volume_zone for x in child.children] == ['C']
@@ -0,0 +1,31 @@
+import math
+
+import numpy as np
+
+from gmsh_scripts.support.support import beta_function, beta_pdf, beta_cdf, \
+    beta_complete
+
+
+def test_beta():
+    xs = np.linspace(0, 1, 11)
+    assert np.isclose(beta_complete(2, 3), 1 / 12)
+    assert np.allclose(beta_cdf(xs, 0.5, 0.5), 2 / np.pi * np.arcsin(np.sqrt(xs)))
+    assert np.allclose(beta_cdf(xs, 1, 3.5), 1 - (1 - xs) ** 3.5)
+    cs = [math.factorial(29) // (math.factorial(j) * math.factorial(29 - j))
+          for j in range(30)]  # Binomial coefficients
+    vs = [sum(cs[j] * x ** j * (1 - x) ** (29 - j) for j in range(10, 30))
+          for x in xs]  # Integer alpha = 10 and beta = 20
+    assert np.allclose(beta_cdf(xs, 10, 20), vs, rtol=0, atol=1e-14)
+    assert beta_cdf(0, 2, 2) == 0 and beta_cdf(1, 2, 2) == 1
+    assert np.isclose(beta_cdf(0.3, 2, 2), 3 * 0.3 ** 2 - 2 * 0.3 ** 3)
+    assert np.isclose(beta_function(1, 2, 3), 1 / 12)
+    vs = beta_cdf(xs, 1000, 1000)  # B(a, b) underflows
+    assert np.all(np.isfinite(vs)) and np.isclose(vs[5], 0.5)
+    assert np.allclose(beta_pdf(xs, 2, 2), 6 * xs * (1 - xs))
+    v = 1999 * math.factorial(1998) // math.factorial(999) ** 2 / 2 ** 1998
+    assert np.isclose(beta_pdf(0.5, 1000, 1000), v)  # About 35.7
+    assert beta_pdf(0, 1000, 1000) == 0 and beta_pdf(1, 1000, 1000) == 0
+    ys = np.array([0, 0.5, 1])
+    assert np.all(np.isfinite(beta_pdf(ys, 0.5, 0.5)))  # Corrected 0 and 1
+    assert np.array_equal(beta_pdf(ys, 1, 1), [1, 1, 1])
+    assert np.array_equal(ys, [0, 0.5, 1])  # Not changed
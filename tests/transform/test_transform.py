@@ -0,0 +1,175 @@
+import gmsh
+import numpy as np
+
+from gmsh_scripts.entity.point import Point
+from gmsh_scripts.block.block import Block
+from gmsh_scripts.coordinate_system.coordinate_system import Affine, \
+    Block as BlockCS, Layer, LayerBoundaries, Path, QuarterLayer, HalfLayer
+from gmsh_scripts import registry
+from gmsh_scripts.transform.transform import Rotate, Translate, \
+    TransformationMatrix, CylindricalToCartesian, AffineMatrix, \
+    TokamakToCartesian, AffineToAffine, AffineToCartesian, \
+    BlockToCartesian, CartesianToCartesianByBlock, LayerToCartesian, \
+    QuarterLayerToCartesian, HalfLayerToCartesian, PathToCartesian, \
+    reduce_transforms, compile_transforms, transform_points
+
+
+def test_compile_transforms():
+    projective = TransformationMatrix(matrix=[[1, 0, 0, 0], [0, 1, 0, 0],
+                                              [0, 0, 1, 0], [1, 0, 0, 1]])
+    ts = [Translate(delta=[1, 0, 0]),
+          Rotate(origin=[0, 0, 1], direction=[0, 0, 1], angle=0.5),
+          CylindricalToCartesian(),  # Barrier
+          Translate(delta=[0, 1, 0]),
+          TransformationMatrix(matrix=[2, 0, 0, 0, 0, 1, 0, 0,
+                                       0, 0, 1, 0, 0, 0, 0, 1]),
+          projective]  # Not affine
+    compiled = compile_transforms(ts)
+    assert [type(x) for x in compiled] == [
+        AffineMatrix, CylindricalToCartesian, AffineMatrix, TransformationMatrix]
+    cs = [[1, 0.5, 2], [2, 1.5, -1], [0.5, 3, 0]]
+    ps0 = [reduce_transforms(ts, Point(x + ['Cylindrical'])) for x in cs]
+    ps1 = transform_points(compiled, [Point(x + ['Cylindrical']) for x in cs])
+    assert np.allclose([x.coordinates for x in ps0],
+                       [x.coordinates for x in ps1], rtol=0, atol=1e-12)
+
+
+def test_conversions():
+    cs = Affine(origin=[1, 2, 3], vs=[[1, 1, 0], [0, 2, 0], [0, 0, 3]])
+    items = [
+        (TokamakToCartesian(), [[1, 0.1, 0.2, 3, 2, 0.5, 'Tokamak'],
+                                [1, 2, 0.2, 3, 2, 0.5, 'Tokamak'],  # Inner
+                                [1, 6, 0.2, 3, 2, 0.5, 'Tokamak']]),
+        (AffineToAffine(cs_to=cs), [[1, 2, 3], [0.5, -1, 2]]),
+        (AffineToCartesian(), [[1, 2, 3, cs], [0.5, -1, 2, cs]])]
+    for t, ps in items:
+        ps0 = [t(Point(list(x))) for x in ps]
+        ps1 = t.apply([Point(list(x)) for x in ps])
+        assert np.allclose([x.coordinates for x in ps0],
+                           [x.coordinates for x in ps1], rtol=0, atol=1e-12)
+        assert all(x.coordinate_system is t.cs_to for x in ps1)
+
+
+def test_block_mapping():
+    block = Block()  # Cube [-1, 1]
+    for p in block.points:  # Box [0, 4] x [1, 3] x [-3, 3]
+        p.coordinates = p.coordinates * [2, 1, 3] + [2, 2, 0]
+    cs = [[0, 0, 0], [1, -1, 0.5], [-0.5, 1, -1]]
+    b2car = BlockToCartesian(cs_from=BlockCS(ps=[x.coordinates for x in block.points]))
+    ps = b2car.apply([Point(list(x)) for x in cs])
+    expected = np.array(cs) * [2, 1, 3] + [2, 2, 0]
+    assert np.allclose([x.coordinates for x in ps], expected, rtol=0, atol=1e-12)
+    t = CartesianToCartesianByBlock(block=block, block_coordinates=[1, -1, 0.5])
+    assert np.allclose(t(Point([0, 0, 0])).coordinates, [4, 1, 1.5])
+    block.points[3].coordinates[:] += 1  # Changed in place, weight 0.25
+    assert np.allclose(t.get_delta(), [4.25, 1.25, 1.75])
+    ps = [Point(list(x)) for x in cs]
+    ps0 = [reduce_transforms([t], Point(list(x))) for x in cs]
+    ps1 = transform_points(compile_transforms([t]), ps)
+    assert np.allclose([x.coordinates for x in ps0],
+                       [x.coordinates for x in ps1], rtol=0, atol=1e-12)
+
+
+def test_layer_boundaries():
+    values = [3, 1, 2, 1 + 1e-6, 10, 1]  # Unsorted with close boundaries
+    xs = np.array([1, 1 + 2e-5, 2.00001, 3, 5, 10.0001, 0])
+    boundaries = LayerBoundaries(values)
+    for start in (0, 1, 4):
+        expected = [next((j for j, v in enumerate(values)
+                          if j >= start and np.isclose(x, v, atol=1e-12)),
+                         len(values)) for x in xs]
+        assert boundaries.find(xs, start=start, atol=1e-12).tolist() == expected
+
+
+def test_layer_to_cartesian():
+    cs = Layer(layers=[[1, 2], [1, 2], [1, 2], [1, 2], [1], [1]],
+               layers_curves=[[['line'], ['circle_arc']] for _ in range(6)],
+               layers_types=[['in', 'in'] for _ in range(6)])
+    cds = [[1, 1, 0], [2, 1, 0], [-1, -2, 1], [0.5, 0.5, 0]]
+    t = LayerToCartesian()
+    ps0 = [t(Point(coordinates=np.array(x, dtype=float), coordinate_system=cs))
+           for x in cds]
+    ps1 = t.apply([Point(coordinates=np.array(x, dtype=float),
+                         coordinate_system=cs) for x in cds])
+    r = 2 / 2 ** 0.5
+    expected = [[1, 1, 0], [r, r, 0], [-r, -r, 1], [0.5, 0.5, 0]]
+    assert np.allclose([x.coordinates for x in ps0], expected)
+    assert np.array_equal([x.coordinates for x in ps0],
+                          [x.coordinates for x in ps1])
+
+
+def check_layer_to_cartesian(t, cs, cds, expected):
+    ps0 = [t(Point(coordinates=np.array(x, dtype=float), coordinate_system=cs))
+           for x in cds]
+    ps1 = t.apply([Point(coordinates=np.array(x, dtype=float),
+                         coordinate_system=cs) for x in cds])
+    assert np.allclose([x.coordinates for x in ps0], expected)
+    assert np.array_equal([x.coordinates for x in ps0],
+                          [x.coordinates for x in ps1])
+
+
+def test_quarter_layer_to_cartesian():
+    cs = QuarterLayer(layers=[[1, 2, 3], [1, 2, 3], [1, 2, 3], [1, 2, 3], [1], [1]],
+                      layers_curves=[[['line'], ['circle_arc'], ['line']]
+                                     for _ in range(6)],
+                      layers_types=[['in', 'in', 'in'] for _ in range(6)])
+    cds = [[2, 1, 0.5], [3, 1, 0.5],  # I sector X (arc, line)
+           [1, 2, 0.5], [1, 3, 0.5],  # I sector Y (arc, line)
+           [-1, 2, 0.5],  # II sector Y
+           [-2, -1, 0.5],  # III sector X
+           [3, -1, 0.5],  # IV sector X
+           [0.5, 0.3, 0.5]]  # Inside the first layer
+    r = 2 / 2 ** 0.5
+    expected = [[r, r, 0.5], [3, 3, 0.5], [r, r, 0.5], [3, 3, 0.5],
+                [0, 2, 0.5], [-1, 0, 0.5], [3, 0, 0.5], [1.5, 1.3, 0.5]]
+    check_layer_to_cartesian(QuarterLayerToCartesian(), cs, cds, expected)
+
+
+def test_half_layer_to_cartesian():
+    cs = HalfLayer(layers=[[1, 2, 3], [1, 2, 3], [1, 2, 3], [1, 2, 3], [1], [1]],
+                   layers_curves=[[['line'], ['circle_arc'], ['line']]
+                                  for _ in range(6)],
+                   layers_types=[['in', 'in', 'in'] for _ in range(6)])
+    cds = [[1, 1, 0.5], [-1, 1, 0.5],  # First layer: I sector X, II sector Y
+           [2, 1, 0.5], [3, 1, 0.5],  # I sector X (arc, line)
+           [1, 2, 0.5], [1, 3, 0.5],  # I sector Y (arc, line)
+           [-1, 2, 0.5], [-1, 3, 0.5],  # II sector Y (arc, line)
+           [-2, 1, 0.5], [-3, 1, 0.5],  # II sector X (arc, line)
+           [-2, -1, 0.5],  # III sector X
+           [3, -1, 0.5],  # IV sector X
+           [0.2, 0.4, 0.5]]  # Inside the first layer
+    r = 2 / 2 ** 0.5
+    expected = [[1, 1, 0.5], [-1, 1, 0.5], [r, r, 0.5], [3, 3, 0.5],
+                [r, r, 0.5], [3, 3, 0.5], [-r, r, 0.5], [-3, 3, 0.5],
+                [-r, r, 0.5], [-3, 3, 0.5], [-2, 0, 0.5], [3, 0, 0.5],
+                [0.2, 1.4, 0.5]]
+    check_layer_to_cartesian(HalfLayerToCartesian(), cs, cds, expected)
+
+
+def test_path_to_cartesian():
+    gmsh.initialize()
+    try:
+        registry.reset(factory='geo')
+        path = Path(curves=[['line', [[0, 0, 0], [1, 0, 0]]],
+                            ['circle_arc', [[1, 0, 0], [1, 1, 0], [1, 1, 1]]]],
+                    orientations=[[[0, 0, 1], [0, 1, 0], [1, 0, 0]],
+                                  [[0, 0, 1], [0, 1, 0], [1, 0, 0]],
+                                  [[0, 1, 0], [1, 0, 0], [0, 0, -1]]],
+                    local_weights=[[], [2, 3]], do_normalize=True)
+        cds = [[0.1, 0.2, 0], [0, 0, 0.25], [0.5, -0.5, 0.5], [1, 1, 0.8], [0, 0, 1]]
+        t = PathToCartesian()
+        ps0 = [t(Point(coordinates=np.array(x, dtype=float), coordinate_system=path))
+               for x in cds]
+        ps1 = t.apply([Point(coordinates=np.array(x, dtype=float),
+                             coordinate_system=path) for x in cds])
+        assert np.allclose([x.coordinates for x in ps0],
+                           [x.coordinates for x in ps1], rtol=0, atol=1e-12)
+        assert np.allclose(ps0[1].coordinates, [0.5, 0, 0])
+        assert np.allclose(ps0[4].coordinates, [1, 1, 1])
+        assert not path.is_registered  # Evaluated without gmsh
+        curves, lus = path.get_local_coordinates([0, 0.5, 0.6, 0.9, 1])
+        assert curves.tolist() == [0, 0, 1, 1, 1]
+        assert lus[0] == 0 and lus[-1] == 1
+        assert 0 < lus[2] < lus[3] < 1
+    finally:
+        gmsh.finalize()
@@ -1,3 +1,10 @@
+import csv
+import json
+import time
+import socket
+import subprocess
+import sys
+
 import pytest
 
 
@@ -11,4 +18,95 @@ def test_action(run):
     assert run == 0
 
 
+def test_batch(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    args = [sys.executable, '-m', 'gmsh_scripts', 'cast_iron.yml', 'fill*.yml',
+            '--batch', '-n', '2', '-o', str(tmp_path)]
+    result = subprocess.run(args)
+    assert result.returncode == 0
+    assert (tmp_path / 'batch.csv').is_file()
+    assert (tmp_path / 'filling.log').is_file()
+
+
+def test_sweep(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    args = [sys.executable, '-m', 'gmsh_scripts', 'sweep.yml',
+            '--sweep', '-n', '2', '-o', str(tmp_path)]
+    result = subprocess.run(args)
+    assert result.returncode == 0
+    with open(tmp_path / 'index.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+    assert all(int(x['elements']) > 0 for x in rows)
+
+
+def test_service(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    with socket.socket() as s:  # Free port
+        s.bind(('127.0.0.1', 0))
+        port = str(s.getsockname()[1])
+    service = subprocess.Popen([sys.executable, '-m', 'gmsh_scripts', '--serve',
+                                '-n', '1', '--port', port, '-o', str(tmp_path)])
+    try:
+        args = [sys.executable, '-m', 'gmsh_scripts', '--submit', '--port', port]
+        for _ in range(100):  # Wait for the service
+            if subprocess.run(args, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE).returncode == 0:
+                break
+            time.sleep(0.1)
+        for p in ['cast_iron.yml', 'filling.yml']:
+            result = subprocess.run(args + [p])
+            assert result.returncode == 0
+        assert (tmp_path / 'filling_2.log').is_file()
+    finally:
+        service.terminate()
+        service.wait()
+
+
+def test_preflight(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    report_path = tmp_path / 'report.json'
+    args = [sys.executable, '-m', 'gmsh_scripts', 'sweep.yml', '--preflight',
+            '--report_path', str(report_path), '-l', str(tmp_path / 'sweep.log')]
+    result = subprocess.run(args)
+    assert result.returncode == 0
+    with open(report_path) as f:
+        report = json.load(f)
+    assert report['entities']['points'] == 8
+    assert report['entities']['volumes'] == 1
+    assert report['elements'] > 0
+    result = subprocess.run(args + ['--max_elements', '1'])
+    assert result.returncode == 1
+
+
+def test_geometry(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    args = [sys.executable, '-m', 'gmsh_scripts', 'geometry.yml',
+            '-l', str(tmp_path / 'geometry.log')]
+    script_path, api_path = tmp_path / 'script', tmp_path / 'api'
+    result = subprocess.run(args + ['-o', str(script_path)])
+    assert result.returncode == 0
+    result = subprocess.run(args + ['-o', str(api_path), '-s', 'strategy.Geometry'])
+    assert result.returncode == 0
+    assert not (tmp_path / 'script.msh2').exists()
+    assert (tmp_path / 'api.geo_unrolled').is_file()
+    with open(f'{script_path}.geo_unrolled') as f:
+        script = f.read()
+    assert script.count('Volume(') == 2
+    assert 'Transfinite Volume {2}' in script
+    assert 'Recursive Delete {\n  Volume{1};\n}' in script
+
 
+def test_snapshot(request, monkeypatch, tmp_path):
+    monkeypatch.chdir(request.fspath.dirname)
+    args = [sys.executable, '-m', 'gmsh_scripts', 'sweep.yml', '-f', 'msh2',
+            '-l', str(tmp_path / 'sweep.log')]
+    base_path = str(tmp_path / 'base')
+    result = subprocess.run(args + ['-o', str(tmp_path / 'full'),
+                                    '--snapshot_path', base_path])
+    assert result.returncode == 0
+    result = subprocess.run(args + ['-o', str(tmp_path / 'resumed'),
+                                    '--resume_path', base_path])
+    assert result.returncode == 0
+    with open(tmp_path / 'full.msh2') as f, open(tmp_path / 'resumed.msh2') as g:
+        assert f.read() == g.read()